@@ -2,11 +2,35 @@ import streamlit as st
 import streamlit as st
 from PIL import Image, ImageDraw
 import os
-import json
-from matplotlib.path import Path
 import numpy as np
 import random
-import math
+import time
+from districts import DISTRICT_BOUNDARIES, detect_district, load_label_raster
+from render import draw_units_on_image, resolve_boundary_key, frame_key, image_key, units_snapshot
+from renderer import FrameRenderer
+from vector import svg_overlay, svg_map, background_url
+from encoder import FRAME_PRESETS, DEFAULT_PRESET, encode_frame, preset_format, streamlit_format
+from game_data import get_game_data, GAME_STATE_PATH
+from datafiles import load_json, file_signature
+from assets import load_board_image, load_level, PYRAMID_LEVELS
+from engine import GameEngine, IllegalActionError, Move, Reclaim, Firefight, Netrun, format_action, load_rules, district_firefights, load_combat_hands, get_netrun_tables, SearchPool, get_distance_table
+from topology import get_adjacency_report
+from games import GameStore, DEFAULT_GAME, valid_game_id
+from replay import REPLAY_FORMATS, export_replay, replay_states, replay_path, replay_reader
+import perf
+from perf import span
+
+logger = perf.get_logger("app")
+
+# Clicks kept per session for the history panel and export
+CLICK_HISTORY_LIMIT = 100
+
+# Seconds between checks for a frame still rendering in the background
+RENDER_POLL_INTERVAL = 0.25
+
+# Seconds span recording stays on after a rerun with the performance panel open
+PERF_PANEL_LEASE = 300
+rerun_start = time.perf_counter()
 
 # Import streamlit-image-coordinates
 try:
@@ -19,273 +43,224 @@ except ImportError:
 # Configuration
 st.set_page_config(page_title="Night City: District Click Detection", layout="wide")
 
-# District boundary coordinates (collected from your coordinate collector)
-DISTRICT_BOUNDARIES = {
-    "Watson": [(116,39), (887,36), (893,211), (866,254), (721,307), (629,313), (571,473), (516,506), (245,500), (98,353), (98,64), (119,43)],
-    "Westbrook": [(629,309), (983,312), (985,819), (944,816), (655,645), (634,573), (519,501), (568,473), (632,309), (983,312)],
-    "City Center": [(58,501), (517,501), (629,573), (655,642), (517,814), (483,826), (445,837), (412,837), (378,821), (350,791), (337,742), (69,755), (25,698), (23,540), (56,499)],
-    "Heywood": [(23,698), (66,760), (332,744), (358,801), (396,826), (442,844), (486,832), (532,808), (657,642), (762,714), (460,1088), (176,1090), (56,960), (20,993), (20,698)],
-    "Pacifica": [(20,995), (51,962), (176,1090), (463,1090), (463,1118), (691,1331), (547,1523), (20,1520), (23,993)],
-    "Santo Domingo": [(765,714), (942,819), (988,819), (1018,816), (1018,1525), (565,1523), (706,1323), (478,1116), (478,1090), (770,727), (768,711)]
-}
-
-# Load and prepare image
-@st.cache_data
+# Load and prepare image (cached as a shared resource so the render caches see the same base image)
+@st.cache_resource
 def load_image():
-    image_path = os.path.join(os.path.dirname(__file__), "board_with_overlay.png")
     try:
-        board_img = Image.open(image_path)
-        original_size = board_img.size
-        
-        # Resize for display
-        max_width = 800
-        max_height = 600
-        scale_factor = min(max_width / original_size[0], max_height / original_size[1])
-        new_width = int(original_size[0] * scale_factor)
-        new_height = int(original_size[1] * scale_factor)
-        
-        display_img = board_img.resize((new_width, new_height), Image.Resampling.LANCZOS)
-        
-        return display_img, original_size, scale_factor
+        return load_board_image()
     except Exception as e:
         st.error(f"Error loading image: {e}")
         return None, None, 1.0
 
-# Load game data
-@st.cache_data
-def load_game_data():
-    """Load game state and gang data"""
-    try:
-        # Load game state
-        with open('game_state.json', 'r') as f:
-            game_state = json.load(f)
-        
-        # Load gang data
-        with open('gangs.json', 'r') as f:
-            gangs = json.load(f)
-        
-        return game_state, gangs
-    except Exception as e:
-        st.error(f"Error loading game data: {e}")
-        return None, None
+@st.cache_resource
+def load_debug_canvas():
+    """Debug-size board (from the image pyramid) with a reference grid; shared, so never draw on it"""
+    debug_canvas = load_level("debug")
+    debug_width, debug_height = debug_canvas.size
+    debug_draw = ImageDraw.Draw(debug_canvas)
+    
+    # Add subtle grid overlay for reference
+    for i in range(0, debug_width, 80):
+        debug_draw.line([(i, 0), (i, debug_height)], fill='lightblue', width=1)
+    for i in range(0, debug_height, 80):
+        debug_draw.line([(0, i), (debug_width, i)], fill='lightblue', width=1)
+    return debug_canvas
 
-def point_in_polygon(point, polygon):
-    """Check if a point is inside a polygon using matplotlib's Path.contains_point"""
-    try:
-        path = Path(polygon)
-        return path.contains_point(point)
-    except Exception as e:
-        st.error(f"Error in polygon detection: {e}")
-        return False
+# Data files are cached per process on (path, mtime, size): every session shares one parsed
+# copy, and an edit on disk is picked up on the next rerun without re-reading unchanged files
+def load_registry():
+    """Shared GameData registry, rebuilt only when a rules file changes"""
+    return get_game_data()
 
-def detect_district(x, y):
-    """Detect which district a point belongs to"""
-    point = (x, y)
-    
-    # Check each district
-    for district_name, boundaries in DISTRICT_BOUNDARIES.items():
-        if point_in_polygon(point, boundaries):
-            return district_name
-    
-    return None  # No district found
+def load_game_state():
+    """Parsed game_state.json (shared and read-only)"""
+    return load_json(GAME_STATE_PATH)
 
-def get_district_center(district_name, boundaries):
-    """Calculate the center point of a district for unit placement"""
-    if not boundaries:
-        return None
-    
-    # Calculate centroid of the polygon
-    x_coords = [point[0] for point in boundaries]
-    y_coords = [point[1] for point in boundaries]
-    
-    center_x = sum(x_coords) / len(x_coords)
-    center_y = sum(y_coords) / len(y_coords)
-    
-    return (int(center_x), int(center_y))
+def load_hands():
+    """Load combat card hands"""
+    return load_combat_hands()
 
-def create_unit_positions(center, unit_count, spread=30):
-    """Create positions for units around the district center"""
-    if not center or unit_count == 0:
-        return []
-    
-    positions = []
-    center_x, center_y = center
-    
-    if unit_count == 1:
-        positions.append((center_x, center_y))
-    else:
-        # Arrange units in a circle around the center
-        for i in range(unit_count):
-            angle = (2 * math.pi * i) / unit_count
-            offset_x = int(spread * math.cos(angle))
-            offset_y = int(spread * math.sin(angle))
-            
-            pos_x = center_x + offset_x
-            pos_y = center_y + offset_y
-            positions.append((pos_x, pos_y))
-    
-    return positions
+# Move-hint search workers, started once per process
+@st.cache_resource
+def get_search_pool():
+    """Process pool for the move-hint search"""
+    return SearchPool()
 
-def draw_units_on_image(image, game_state, gangs, scale_factor):
-    """Draw gang units as colored dots on the image"""
-    # Create a copy of the image to draw on
-    img_copy = image.copy()
-    draw = ImageDraw.Draw(img_copy)
-    
-    print(f"\n🎨 DEBUG: draw_units_on_image called with scale_factor={scale_factor}")
-    print(f"🎨 DEBUG: Image mode: {img_copy.mode}, Size: {img_copy.size}")
-    
-    # Process each district
-    units_drawn = 0
-    for district_name, district_data in game_state['districts'].items():
-        print(f"  📍 Processing district: {district_name}")
-        
-        if 'units' not in district_data or not district_data['units']:
-            print(f"    ❌ No units in {district_name}")
-            continue
-            
-        print(f"    ✅ Units found in {district_name}: {district_data['units']}")
-        
-        # Map district names (handle case differences)
-        boundary_key = district_name
-        if boundary_key not in DISTRICT_BOUNDARIES:
-            # Try title case
-            boundary_key = district_name.title()
-            if boundary_key not in DISTRICT_BOUNDARIES:
-                # Try with space handling
-                boundary_key = district_name.replace('_', ' ').title()
-                if boundary_key not in DISTRICT_BOUNDARIES:
-                    print(f"    ❌ No boundary found for {district_name}")
-                    continue
-        
-        print(f"    🗺️ Using boundary key: {boundary_key}")
-        
-        # Get district center
-        boundaries = DISTRICT_BOUNDARIES[boundary_key]
-        center = get_district_center(district_name, boundaries)
-        
-        if not center:
-            print(f"    ❌ Could not calculate center for {district_name}")
-            continue
-        
-        print(f"    📍 District center: {center}")
-        
-        # Scale center to display coordinates
-        display_center = (int(center[0] * scale_factor), int(center[1] * scale_factor))
-        print(f"    📍 Display center: {display_center}")
-        
-        # Process units for each gang in this district
-        gang_offset = 0
-        for gang_id, units in district_data['units'].items():
-            if not units:
-                continue
-                
-            print(f"      🎭 Processing gang {gang_id} with {len(units)} units")
-                
-            # Get gang color
-            gang_name = None
-            gang_color = "gray"  # Default color
-            
-            # Find gang name and color
-            for name, data in gangs.items():
-                if data.get('id') == gang_id:
-                    gang_name = name
-                    gang_color = data.get('color', 'gray')
-                    break
-            
-            # Convert color names to RGB-like values for PIL
-            color_map = {
-                'red': '#FF0000',
-                'lime': '#00FF00', 
-                'blue': '#0000FF',
-                'pink': '#FF69B4',
-                'purple': '#800080',
-                'cyan': '#00FFFF',
-                'yellow': '#FFFF00',
-                'gray': '#808080'
-            }
-            
-            if gang_color in color_map:
-                gang_color = color_map[gang_color]
-            elif not gang_color.startswith('#'):
-                gang_color = '#808080'  # Default gray
-            
-            # Create unit positions
-            unit_count = len(units)
-            
-            # Offset each gang's units to avoid overlap
-            offset_center = (display_center[0] + gang_offset, display_center[1])
-            positions = create_unit_positions(offset_center, unit_count, spread=int(60 * scale_factor))
-            
-            print(f"      🎨 Drawing {len(positions)} units at positions: {positions}")
-            
-            # Draw units
-            for i, pos in enumerate(positions):
-                x, y = pos
-                radius = int(40 * scale_factor)  # Make dots much larger like the circles in the image
-                
-                print(f"        🔵 Drawing unit {i+1} at ({x}, {y}) with radius {radius}")
-                
-                # Draw unit dot with very thick white outline for maximum visibility
-                draw.ellipse([x-radius, y-radius, x+radius, y+radius],
-                           fill=gang_color, outline='white', width=int(5 * scale_factor))
-                
-                # Add black inner outline for better contrast
-                inner_radius = radius - int(3 * scale_factor)
-                if inner_radius > 0:
-                    draw.ellipse([x-inner_radius, y-inner_radius, x+inner_radius, y+inner_radius],
-                               fill=gang_color, outline='black', width=int(3 * scale_factor))
-                
-                units_drawn += 1
-                
-                # Optional: Add unit type indicator (different sizes/shapes)
-                if i < len(units):
-                    unit_type = units[i]
-                    if "drone" in unit_type:
-                        # Draw smaller white dot for drones with thick black outline
-                        small_radius = int(12 * scale_factor)
-                        draw.ellipse([x-small_radius, y-small_radius, x+small_radius, y+small_radius], 
-                                   fill='white', outline='black', width=int(4 * scale_factor))
-                        print(f"        ⚪ Added drone indicator")
-            
-            gang_offset += int(150 * scale_factor)  # Move next gang's units
-    
-    print(f"🎨 DEBUG: Total units drawn: {units_drawn}")
-    return img_copy
+# Map frames are drawn and encoded on worker threads shared by every session
+@st.cache_resource
+def get_frame_renderer():
+    """Background renderer for the unit map and the debug canvas"""
+    return FrameRenderer()
+
+def request_frame(view, image, game_state, game_data, scale_factor, frame_format, frame_quality):
+    """(frame, ready) for a unit map view; never waits on a render
+
+    While the frame for the current units is rendering, this returns the
+    view's last completed frame. If the view has none yet, it returns the bare
+    board so the page is usable at once.
+    """
+    snapshot = units_snapshot(game_state)
+    frame, ready = get_frame_renderer().request(
+        (view, current_game_id(), frame_format, frame_quality),
+        frame_key(image, snapshot, game_data, scale_factor),
+        lambda: draw_units_on_image(image, snapshot, game_data, scale_factor),
+        frame_format, frame_quality)
+    if frame is None:
+        frame = encode_frame(("board", image_key(image)), lambda: image, frame_format, frame_quality)
+    return frame, ready
+
+@st.fragment(run_every=RENDER_POLL_INTERVAL)
+def await_frames(views, frame_format, frame_quality):
+    """Rerun the page once the frames rendering for these views are done"""
+    renderer = get_frame_renderer()
+    if not any(renderer.pending((view, current_game_id(), frame_format, frame_quality)) for view in views):
+        st.rerun()
+
+# Hosted games, one append-only event log each, keyed by the table id in the URL (?game=<id>).
+# Assets, boundaries and rules are shared by the whole process; a session only keeps its
+# table id, its widget values and a short click history.
+@st.cache_resource
+def get_game_store():
+    """Every game this process hosts; new games start from game_state.json"""
+    return GameStore(load_game_state)
+
+def current_game_id():
+    """Table in the URL if it has been started, otherwise the default one"""
+    game_id = st.query_params.get("game", DEFAULT_GAME)
+    return game_id if get_game_store().exists(game_id) else DEFAULT_GAME
 
-# Initialize session state
+def get_game_log():
+    """Event log of this session's game, opened on first use"""
+    return get_game_store().get(current_game_id(), load_rules())
+
+# game_state.json signature the logged game was last started from
+@st.cache_resource
+def get_state_file_marker():
+    return {"signature": file_signature(GAME_STATE_PATH)}
+
+def sync_game_state():
+    """Restart the default game from game_state.json when an operator edits it on disk
+
+    Other tables keep playing; only games started after the edit use the new file.
+    """
+    if current_game_id() != DEFAULT_GAME:
+        return
+    marker = get_state_file_marker()
+    signature = file_signature(GAME_STATE_PATH)
+    if signature == marker["signature"]:
+        return
+    game_log = get_game_log()
+    with game_log.lock:
+        if signature != marker["signature"]:
+            marker["signature"] = signature
+            game_log.reset(load_game_state())
+            logger.info("🔄 game_state.json changed on disk; restarted the game from it")
+
+def get_engine():
+    """Read-only rules engine over a snapshot of the logged game's current state
+
+    Every session at a table shares the game log, which changes its state in
+    place under game_log.lock; the script only reads the snapshot and sends
+    state changes through game_log.apply().
+    """
+    game_log = get_game_log()
+    rules = load_rules()
+    if game_log.rules is not rules:
+        # A rules file changed on disk; keep playing the same game under the new rules
+        with game_log.lock:
+            game_log.rules = game_log.engine.rules = rules
+    return GameEngine(game_log.snapshot(), rules)
+
+def apply_action(action, game_data):
+    """Append an action to this table's game log; returns False (after showing why) if it's illegal"""
+    try:
+        get_game_log().apply(action)
+    except IllegalActionError as e:
+        st.error(f"Illegal action: {e}")
+        return False
+    logger.info("🎲 %s", format_action(action, game_data))
+    return True
+
+def load_game_data():
+    """Load a snapshot of the current game state (owned by the game log) and the shared rules registry"""
+    try:
+        sync_game_state()
+        return get_engine().state, load_registry()
+    except Exception as e:
+        st.error(f"Error loading game data: {e}")
+        return None, None
+
+# Initialize session state (kept small: many sessions share one process)
 if 'click_history' not in st.session_state:
     st.session_state.click_history = []
+    st.session_state.click_counts = {}
 
 # UI
 st.title("🗺️ Night City: Interactive Gang Territory Map")
 
+# Timing spans are recorded while any session has the panel open (or NIGHTCITY_PERF=1 is set);
+# each rerun with it open keeps recording on for PERF_PANEL_LEASE seconds
+show_perf = st.checkbox("⏱️ Show Performance Panel", value=False, help="Time loading, drawing, detection and sidebar rendering across reruns")
+if show_perf:
+    perf.enable_for(PERF_PANEL_LEASE)
+
 col1, col2 = st.columns([2, 1])
 
 with col1:
     st.subheader("Interactive District Map")
     
     # Load image and game data
-    display_img, original_size, scale_factor = load_image()
-    game_state, gangs = load_game_data()
+    with span("load_image"):
+        display_img, original_size, scale_factor = load_image()
+    with span("load_game_data"):
+        game_state, game_data = load_game_data()
+    load_label_raster()  # Warm the click lookup raster (built once per boundary set)
     
     # Unit visualization toggle
     show_units = st.checkbox("🎯 Show Gang Units", value=True, help="Display gang units as colored dots on the map")
     
-    if display_img and HAS_IMAGE_COORDS:
-        # Apply unit visualization if enabled
-        final_img = display_img
-        if show_units and game_state and gangs:
-            final_img = draw_units_on_image(display_img, game_state, gangs, scale_factor)
-            st.info("👆 Click anywhere on the map to detect districts! Colored dots show gang units.")
+    # Frames are encoded once per distinct content and quality, then reused across reruns
+    presets = list(FRAME_PRESETS)
+    frame_preset = st.selectbox("🖼️ Map Image Quality", presets,
+                                index=presets.index(DEFAULT_PRESET) if DEFAULT_PRESET in presets else 0,
+                                help="Lossy presets send much smaller images to the browser")
+    frame_format, frame_quality = streamlit_format(*preset_format(frame_preset))
+    rendering = []  # views still showing an older frame while the current one renders
+    
+    # Vector mode keeps the board as a static cached background and draws units, outlines
+    # and the selected district as an SVG overlay in original image coordinates
+    vector_mode = st.toggle("✏️ Vector Overlay", value=False, help="Send units as a small SVG overlay instead of redrawing the board bitmap")
+    
+    if display_img and (vector_mode or HAS_IMAGE_COORDS):
+        if vector_mode:
+            # Highlight the district under the latest click (the component value is ready before it renders)
+            last_click = st.session_state.get("district_detection_svg")
+            highlight = detect_district(last_click["orig_x"], last_click["orig_y"]) if last_click else None
+            with span("svg_overlay"):
+                overlay = svg_overlay(game_state, game_data, show_units=show_units and bool(game_state), highlight=highlight)
+            background = encode_frame(("board", image_key(display_img)), lambda: display_img, frame_format, frame_quality)
+            clicked_coords = svg_map(background_url(background, "svg_map_background"), overlay, original_size,
+                                     display_img.width, key="district_detection_svg")
+            st.info("👆 Click anywhere on the map to detect districts! Units are drawn as a vector overlay.")
         else:
-            st.info("👆 Click anywhere on the map to detect which district you clicked!")
+            # Apply unit visualization if enabled
+            if show_units and game_state and game_data:
+                with span("draw_units_on_image"):
+                    final_frame, ready = request_frame("map", display_img, game_state, game_data, scale_factor,
+                                                       frame_format, frame_quality)
+                if not ready:
+                    rendering.append("map")
+                st.info("👆 Click anywhere on the map to detect districts! Colored dots show gang units.")
+            else:
+                final_frame = encode_frame(("board", image_key(display_img)), lambda: display_img, frame_format, frame_quality)
+                st.info("👆 Click anywhere on the map to detect which district you clicked!")
         
-        # Get click coordinates
-        clicked_coords = streamlit_image_coordinates(
-            final_img, 
-            key="district_detection"
-        )
+            # Get click coordinates
+            clicked_coords = streamlit_image_coordinates(
+                final_frame, 
+                key="district_detection",
+                image_format=final_frame.format
+            )
         
         # Process clicks
         if clicked_coords is not None:
@@ -296,43 +271,105 @@ with col1:
             else:
                 display_x, display_y = clicked_coords[0], clicked_coords[1]
             
-            # Scale to original image size
-            orig_x = int(display_x / scale_factor)
-            orig_y = int(display_y / scale_factor)
+            # Scale to original image size (the vector map already maps clicks through its viewBox)
+            if isinstance(clicked_coords, dict) and 'orig_x' in clicked_coords:
+                orig_x, orig_y = clicked_coords['orig_x'], clicked_coords['orig_y']
+            else:
+                orig_x = int(display_x / scale_factor)
+                orig_y = int(display_y / scale_factor)
             
             # Detect district
-            detected_district = detect_district(orig_x, orig_y)
+            with span("detect_district"):
+                detected_district = detect_district(orig_x, orig_y)
             
             if detected_district:
                 st.success(f"🎯 **{detected_district}** detected!")
                 st.write(f"📍 Click coordinates: ({orig_x}, {orig_y})")
                 
                 # Show gang information for this district
-                if game_state and gangs and detected_district in game_state['districts']:
+                if game_state and game_data and detected_district in game_state['districts']:
                     district_data = game_state['districts'][detected_district]
                     if 'units' in district_data and district_data['units']:
                         st.write("**Active Gangs in this District:**")
                         for gang_id, units in district_data['units'].items():
                             if units:
-                                # Find gang info
-                                gang_name = None
-                                for name, data in gangs.items():
-                                    if data.get('id') == gang_id:
-                                        gang_name = name
-                                        break
+                                gang_name = game_data.gang_name(gang_id)
                                 if gang_name:
                                     st.write(f"• {gang_name}: {len(units)} units")
                     
                     # Show district status
                     if 'dominant' in district_data and district_data['dominant']:
-                        dom_gang = None
-                        for name, data in gangs.items():
-                            if data.get('id') == district_data['dominant']:
-                                dom_gang = name
-                                break
+                        dom_gang = game_data.gang_name(district_data['dominant'])
                         if dom_gang:
                             st.write(f"🏴 **Dominant Gang:** {dom_gang}")
                 
+                # Firefight odds between every pair of gangs sharing the district
+                engine = get_engine()
+                with span("firefight_odds"):
+                    odds = district_firefights(engine.rules, engine.state, detected_district, load_hands())
+                if odds:
+                    st.write("⚔️ **Firefight Odds:**")
+                    for o in odds:
+                        st.write(f"• {game_data.gang_name(o.attacker) or o.attacker} attacking "
+                                 f"{game_data.gang_name(o.defender) or o.defender}: "
+                                 f"win {o.attacker_win:.1%}, lose {o.defender_win:.1%}, tie {o.tie:.1%}")
+                    
+                    # Firefights are resolved at the table; the log records who fought and what was lost
+                    with st.expander(f"⚔️ Record a firefight in {detected_district}"):
+                        fighters = list(dict.fromkeys(o.attacker for o in odds))
+                        gang_label = lambda g: game_data.gang_name(g) or g
+                        attacker = st.selectbox("Attacker:", fighters, format_func=gang_label, key="firefight_attacker")
+                        defender = st.selectbox("Defender:", [g for g in fighters if g != attacker], format_func=gang_label, key="firefight_defender")
+                        district_units = engine.state['districts'][detected_district]['units']
+                        casualties = [(g, unit_type) for g in (attacker, defender) for unit_type in district_units.get(g, [])]
+                        lost = st.multiselect("Units lost:", range(len(casualties)), key="firefight_losses",
+                                              format_func=lambda i: f"{gang_label(casualties[i][0])}: {casualties[i][1]}")
+                        if st.button("Record Firefight") and apply_action(
+                                Firefight(attacker, detected_district, defender, tuple(casualties[i] for i in lost)), game_data):
+                            st.rerun()
+                
+                # Moves out of this district, generated by the rules engine
+                adjacent = sorted(engine.rules.adjacency.get(detected_district, ()))
+                if adjacent:
+                    st.write(f"🧭 **Adjacent:** {', '.join(adjacent)}")
+                
+                # Movement range per movement type, looked up from the precomputed distance table
+                distances = get_distance_table(engine.rules)
+                for movement_type, steps in distances.ranges.items():
+                    reach = distances.reachable(movement_type, detected_district)
+                    if reach:
+                        st.write(f"🏃 **{movement_type.title()} reach ({steps} moves):** {', '.join(reach)}")
+                
+                report = get_adjacency_report(engine.rules)
+                mismatches = [pair for pair in report.only_in_geometry + report.only_in_rules if detected_district in pair]
+                if mismatches:
+                    st.caption("⚠️ Boundary outlines disagree with the rules about: "
+                               + ", ".join(" - ".join(pair) for pair in mismatches))
+                
+                gangs_here = [gang_id for gang_id, units in engine.state['districts'].get(detected_district, {}).get('units', {}).items()
+                              if units and gang_id in engine.state.get('gangs', {})]
+                if gangs_here:
+                    with st.expander(f"🎲 Move units out of {detected_district}"):
+                        acting_gang = st.selectbox("Gang:", gangs_here, format_func=lambda g: game_data.gang_name(g) or g, key="acting_gang")
+                        moves = [a for a in engine.legal_actions(acting_gang, district=detected_district) if isinstance(a, Move)]
+                        if moves:
+                            move = st.selectbox("Move:", moves, format_func=lambda a: format_action(a, game_data), key="chosen_move")
+                            if st.button("Apply Move") and apply_action(move, game_data):
+                                st.rerun()
+                        else:
+                            st.write("No legal moves - all matching action discs are used.")
+                        
+                        if st.button("💡 Suggest Best Action"):
+                            with span("search"), st.spinner("Searching..."):
+                                hint = get_search_pool().search(engine.state, acting_gang, time_budget=1.0)
+                            if hint.action is not None:
+                                visits, mean_score = hint.stats[hint.action]
+                                st.success(f"💡 {format_action(hint.action, game_data)}")
+                                st.caption(f"{hint.rollouts} rollouts on {hint.workers} worker(s) in {hint.elapsed:.2f}s; "
+                                           f"mean score {mean_score:.2f} over {visits} visits")
+                            else:
+                                st.write("No legal actions to suggest.")
+                
                 # Add to history
                 click_record = {
                     "coordinates": (orig_x, orig_y),
@@ -340,47 +377,37 @@ with col1:
                     "display_coords": (int(display_x), int(display_y))
                 }
                 
-                # Avoid duplicates
+                # Avoid duplicates; only the latest clicks are kept, with running counts per district
                 if not st.session_state.click_history or st.session_state.click_history[-1]["coordinates"] != (orig_x, orig_y):
                     st.session_state.click_history.append(click_record)
+                    del st.session_state.click_history[:-CLICK_HISTORY_LIMIT]
+                    counts = st.session_state.click_counts
+                    counts[detected_district] = counts.get(detected_district, 0) + 1
                 
-                # Terminal output
-                print(f"\n🎯 DISTRICT DETECTED: {detected_district}")
-                print(f"   Coordinates: ({orig_x}, {orig_y})")
-                print(f"   Display: ({int(display_x)}, {int(display_y)})")
+                logger.info("🎯 District detected: %s at (%d, %d), display (%d, %d)",
+                            detected_district, orig_x, orig_y, int(display_x), int(display_y))
                 
             else:
                 st.warning(f"❓ No district detected at ({orig_x}, {orig_y})")
                 st.write("This might be outside all district boundaries or in a gap between districts.")
                 
-                # Terminal output
-                print(f"\n❓ NO DISTRICT: ({orig_x}, {orig_y})")
+                logger.info("❓ No district at (%d, %d)", orig_x, orig_y)
     
-    elif not HAS_IMAGE_COORDS:
+    elif display_img:
         st.error("Please install: pip install streamlit-image-coordinates")
     else:
         st.error("Could not load image")
 
     # Separate unit visualization area for debugging
-    if show_units and game_state and gangs:
+    if show_units and game_state and game_data:
         st.subheader("🔍 Gang Unit Debug Visualization")
         st.write("This area shows gang units overlaid on the actual board image:")
         
         # Use actual board image as debug canvas background
         if display_img:
-            # Create debug canvas using actual board image at smaller scale
-            debug_scale = 0.4  # Make it smaller for the debug area
-            debug_width = int(display_img.width * debug_scale)
-            debug_height = int(display_img.height * debug_scale)
-            debug_canvas = display_img.resize((debug_width, debug_height), Image.Resampling.LANCZOS)
-            debug_draw = ImageDraw.Draw(debug_canvas)
-            
-            # Add subtle grid overlay for reference
-            grid_color = '#FFFFFF80'  # Semi-transparent white
-            for i in range(0, debug_width, 80):
-                debug_draw.line([(i, 0), (i, debug_height)], fill='lightblue', width=1)
-            for i in range(0, debug_height, 80):
-                debug_draw.line([(0, i), (debug_width, i)], fill='lightblue', width=1)
+            # Pre-scaled debug level of the board with its grid, built once per process
+            debug_scale = PYRAMID_LEVELS["debug"]
+            debug_canvas = load_debug_canvas()
         else:
             # Fallback to simple canvas if image not available
             debug_canvas = Image.new('RGB', (400, 300), 'white')
@@ -389,92 +416,32 @@ with col1:
         
         unit_count = 0
         
-        # Now draw gang units on the debug canvas using actual district positions
+        # List gang units per district for reference
         for district_name, district_data in game_state['districts'].items():
             if 'units' not in district_data or not district_data['units']:
                 continue
+            if resolve_boundary_key(district_name) is None:
+                continue
                 
             st.write(f"**{district_name}:**")
             
-            # Get district center and scale it for debug canvas
-            boundary_key = district_name
-            if boundary_key not in DISTRICT_BOUNDARIES:
-                boundary_key = district_name.title()
-                if boundary_key not in DISTRICT_BOUNDARIES:
-                    boundary_key = district_name.replace('_', ' ').title()
-                    if boundary_key not in DISTRICT_BOUNDARIES:
-                        continue
-            
-            boundaries = DISTRICT_BOUNDARIES[boundary_key]
-            center = get_district_center(district_name, boundaries)
-            
-            if not center:
-                continue
-            
-            # Scale center to debug canvas coordinates
-            debug_center_x = int(center[0] * debug_scale)
-            debug_center_y = int(center[1] * debug_scale)
-            
-            gang_offset = 0
             for gang_id, units in district_data['units'].items():
                 if not units:
                     continue
                     
-                # Get gang info
-                gang_name = None
-                gang_color = "gray"
-                for name, data in gangs.items():
-                    if data.get('id') == gang_id:
-                        gang_name = name
-                        gang_color = data.get('color', 'gray')
-                        break
-                
-                # Convert color
-                color_map = {
-                    'red': '#FF0000',
-                    'lime': '#00FF00', 
-                    'blue': '#0000FF',
-                    'pink': '#FF69B4',
-                    'purple': '#800080',
-                    'cyan': '#00FFFF',
-                    'yellow': '#FFFF00',
-                    'gray': '#808080'
-                }
-                
-                if gang_color in color_map:
-                    gang_color = color_map[gang_color]
-                elif not gang_color.startswith('#'):
-                    gang_color = '#808080'
-                
-                # Create unit positions around district center (scaled)
-                offset_center = (debug_center_x + gang_offset, debug_center_y)
-                positions = create_unit_positions(offset_center, len(units), spread=int(40 * debug_scale))
-                
-                # Draw units on debug canvas
-                for i, unit_type in enumerate(units):
-                    if i < len(positions):
-                        x, y = positions[i]
-                        
-                        # Ensure position is within canvas bounds
-                        if 0 <= x < debug_canvas.width and 0 <= y < debug_canvas.height:
-                            radius = int(6 * debug_scale)  # Slightly larger for visibility
-                            
-                            # Draw unit dot
-                            debug_draw.ellipse([x-radius, y-radius, x+radius, y+radius], 
-                                             fill=gang_color, outline='black', width=2)
-                            
-                            # Mark drones differently
-                            if "drone" in unit_type:
-                                small_radius = int(3 * debug_scale)
-                                debug_draw.ellipse([x-small_radius, y-small_radius, x+small_radius, y+small_radius], 
-                                                 fill='white', outline='black', width=1)
-                            
-                            unit_count += 1
-                
-                st.write(f"  • {gang_name}: {len(units)} units ({gang_color}) at center ({debug_center_x}, {debug_center_y})")
-                gang_offset += int(60 * debug_scale)  # Adjust offset for debug scale
+                gang_name, gang_color = game_data.gang_name(gang_id), game_data.gang_color(gang_id)
+                st.write(f"  • {gang_name}: {len(units)} units ({gang_color})")
+                unit_count += len(units)
         
-        st.image(debug_canvas, caption=f"Debug: {unit_count} units overlaid on actual board image (scale: {debug_scale:.1f})")
+        # Draw units with the same sprite atlas as the main map, scaled down to the debug canvas
+        with span("draw_units_on_image"):
+            debug_frame, ready = request_frame("debug", debug_canvas, game_state, game_data, scale_factor * debug_scale,
+                                               frame_format, frame_quality)
+        if not ready:
+            rendering.append("debug")
+        
+        st.image(debug_frame.data, output_format=debug_frame.format, caption=f"Debug: {unit_count} units overlaid on actual board image (scale: {debug_scale:.1f})"
+                 + (" - updating..." if not ready else ""))
         
         if unit_count == 0:
             st.warning("⚠️ No units found in game state!")
@@ -482,12 +449,15 @@ with col1:
             st.success(f"✅ Successfully drew {unit_count} units on debug canvas with board background")
             st.info("👆 This shows the same drawing logic applied to the actual board image. If dots appear here but not on the main map, the issue is with layering/z-order on the main image.")
 
-with col2:
+    # Swap in the new frames as soon as the render workers finish them
+    if rendering:
+        await_frames(rendering, frame_format, frame_quality)
+
+with col2, span("sidebar"):
     st.subheader("Detection Results")
     
-    # Show unit information if available
-    game_state, gangs = load_game_data()
-    if game_state and gangs:
+    # Show unit information if available (game_state/game_data were loaded once at the top of col1)
+    if game_state and game_data:
         st.subheader("🎯 Gang Units Overview")
         
         # Gang legend
@@ -498,23 +468,9 @@ with col2:
                 active_gangs.update(district_data['units'].keys())
         
         for gang_id in active_gangs:
-            for name, data in gangs.items():
-                if data.get('id') == gang_id:
-                    color = data.get('color', 'gray')
-                    # Create a simple color indicator
-                    color_emoji = {
-                        'red': '🔴',
-                        'lime': '🟢', 
-                        'blue': '🔵',
-                        'pink': '🩷',
-                        'purple': '🟣',
-                        'cyan': '🔵',
-                        'yellow': '🟡',
-                        'gray': '⚫'
-                    }
-                    emoji = color_emoji.get(color, '⚫')
-                    st.write(f"  {emoji} **{name}**")
-                    break
+            gang = game_data.gang(gang_id)
+            if gang:
+                st.write(f"  {gang.emoji} **{gang.name}**")
         
         st.write("**District Units:**")
         for district_name, district_data in game_state['districts'].items():
@@ -522,15 +478,7 @@ with col2:
                 st.write(f"**{district_name}:**")
                 for gang_id, units in district_data['units'].items():
                     if units:
-                        # Find gang info
-                        gang_name = None
-                        gang_color = "gray"
-                        for name, data in gangs.items():
-                            if data.get('id') == gang_id:
-                                gang_name = name
-                                gang_color = data.get('color', 'gray')
-                                break
-                        
+                        gang_name = game_data.gang_name(gang_id)
                         if gang_name:
                             st.write(f"  • {gang_name} ({len(units)} units)")
                             # Show unit types
@@ -560,6 +508,80 @@ with col2:
         else:
             st.warning(f"Coordinate ({test_x}, {test_y}) is not in any district")
     
+    # Game controls (state changes go through the rules engine)
+    st.subheader("🎲 Game Controls")
+    requested = st.query_params.get("game", DEFAULT_GAME)
+    table = st.text_input("🎮 Table", value=requested if valid_game_id(requested) else current_game_id(), max_chars=64,
+                          help="Each table is a separate game; players who open the same ?game=<table> link share it")
+    if table != current_game_id():
+        if not valid_game_id(table):
+            st.warning("Table names may only use letters, digits, '-' and '_'")
+        elif get_game_store().exists(table):
+            st.query_params["game"] = table
+            st.rerun()
+        else:
+            # Only an explicit click starts a table, never a link to one that doesn't exist
+            st.info(f"There is no table {table} yet; showing the {current_game_id()} table")
+            if st.button(f"Start Table {table}"):
+                try:
+                    get_game_store().create(table, load_rules())
+                except ValueError as e:
+                    st.error(f"Can't start table {table}: {e}")
+                else:
+                    logger.info("🎮 Started table %s", table)
+                    st.query_params["game"] = table
+                    st.rerun()
+    game_log = get_game_log()
+    engine = get_engine()
+    st.write(f"Actions played this game: {game_log.current_ply()}")
+    
+    if st.button("Reclaim Used Discs"):
+        for gang_id, gang_data in engine.state.get('gangs', {}).items():
+            if gang_data.get('action_discs_used'):
+                game_log.apply(Reclaim(gang_id))
+        st.rerun()
+    
+    if st.button("↩️ Undo Last Action"):
+        try:
+            game_log.undo()
+            st.rerun()
+        except IllegalActionError as e:
+            st.warning(str(e))
+    
+    if st.button("Reset Game State"):
+        game_log.reset(load_game_state())
+        st.rerun()
+    
+    # Netrun odds come straight from the precomputed tables
+    with st.expander("🕸️ Netrun Odds"):
+        netrun_tables = get_netrun_tables(engine.rules, rerolls=1 if st.checkbox("Edgerunner Netrunner (reroll failed Netwatch die)") else 0)
+        start_step = st.selectbox("Net token at step:", netrun_tables.steps)
+        st.table([
+            {"steps": o.depth, "expected street cred": f"{o.expected_street_cred:.2f}", "caught": f"{o.p_caught:.1%}"}
+            for o in (netrun_tables.outcome(start_step, d) for d in range(1, netrun_tables.max_depth(start_step) + 1))
+        ])
+        depth = st.number_input("Steps already taken:", min_value=0, max_value=max(netrun_tables.max_depth(start_step) - 1, 0), value=0, step=1)
+        extra_cred, extra_caught, added_risk = netrun_tables.push_one_more(start_step, int(depth))
+        st.write(f"**Push one more step?** +{extra_cred:.2f} expected street cred, +{extra_caught:.1%} chance of being caught")
+        for effect, risk in added_risk.items():
+            st.write(f"  ⚠️ {effect}: {risk:.1%}")
+    
+    # Each netrun step is logged as it's rolled at the table
+    if game_data and engine.state.get('gangs'):
+        with st.expander("🕸️ Record Netrun Step"):
+            netrun_gang = st.selectbox("Gang:", list(engine.state['gangs']), format_func=lambda g: game_data.gang_name(g) or g, key="netrun_gang")
+            token = engine.state['gangs'][netrun_gang].get('net_token', 0)
+            next_step = next((s for s in engine.rules.data.netrun_track if s.step == token + 1), None)
+            if next_step is None:
+                st.write(f"Net token on step {token}: the track is complete.")
+            else:
+                st.write(f"Net token on step {token}; next is step {next_step.step}"
+                         + (f" (Netwatch roll {next_step.netwatch_roll}+)" if next_step.netwatch_roll is not None else ""))
+                passed = st.checkbox("Netwatch roll passed", value=True, key="netrun_passed",
+                                     disabled=next_step.netwatch_roll is None)
+                if st.button("Record Step") and apply_action(Netrun(netrun_gang, next_step.step, passed), game_data):
+                    st.rerun()
+    
     # Click history
     if st.session_state.click_history:
         st.subheader("Click History")
@@ -573,6 +595,7 @@ with col2:
         # Clear history button
         if st.button("Clear History"):
             st.session_state.click_history = []
+            st.session_state.click_counts = {}
             st.rerun()
 
 # District statistics
@@ -586,15 +609,12 @@ with col1:
 
 with col2:
     if st.session_state.click_history:
-        # Count clicks per district
-        district_clicks = {}
-        for click in st.session_state.click_history:
-            district = click["district"]
-            district_clicks[district] = district_clicks.get(district, 0) + 1
+        # Running counts per district (the history itself only keeps the latest clicks)
+        district_clicks = st.session_state.click_counts
         
         most_clicked = max(district_clicks.keys(), key=lambda k: district_clicks[k]) if district_clicks else "None"
         st.metric("Most Clicked District", most_clicked)
-        st.metric("Total Clicks", len(st.session_state.click_history))
+        st.metric("Total Clicks", sum(district_clicks.values()))
     else:
         st.metric("Most Clicked District", "None")
         st.metric("Total Clicks", 0)
@@ -609,7 +629,7 @@ with col3:
         st.metric("Current Phase", "N/A")
 
 # Gang territory summary
-if game_state and gangs:
+if game_state and game_data:
     st.subheader("🏴 Territory Control")
     
     gang_territories = {}
@@ -619,12 +639,7 @@ if game_state and gangs:
         if 'units' in district_data:
             for gang_id, units in district_data['units'].items():
                 if units:
-                    gang_name = None
-                    for name, data in gangs.items():
-                        if data.get('id') == gang_id:
-                            gang_name = name
-                            break
-                    
+                    gang_name = game_data.gang_name(gang_id)
                     if gang_name:
                         if gang_name not in gang_territories:
                             gang_territories[gang_name] = []
@@ -659,6 +674,42 @@ if st.button("Export All Data to Terminal"):
     print("\n" + "="*60)
     st.success("Full data exported to terminal!")
 
+# Replay of this table's game from its last reset, one frame per action
+with st.expander("🎞️ Export Replay"):
+    replay_labels = {"gif": "Animated GIF", "apng": "Animated PNG", "frames": "Numbered PNG frames"}
+    replay_format = st.selectbox("Format:", REPLAY_FORMATS, format_func=replay_labels.get, key="replay_format")
+    replay_level = st.selectbox("Board size:", list(PYRAMID_LEVELS), key="replay_level")
+    if st.button("Export Replay"):
+        game_log = get_game_log()
+        path = replay_path(current_game_id(), game_log.current_ply(), replay_format)
+        with span("export_replay"), st.spinner("Rendering replay..."):
+            frames = export_replay(replay_states(game_log), path, replay_format, level=replay_level)
+        st.success(f"🎞️ Exported {frames} frames to {path}")
+        logger.info("🎞️ Replay of %s exported to %s", current_game_id(), path)
+        if replay_format != "frames":
+            # The file is read on Streamlit's download thread only when the button is clicked
+            st.download_button("⬇️ Download Replay", replay_reader(path), file_name=os.path.basename(path),
+                               mime="image/gif" if replay_format == "gif" else "image/png", on_click="ignore")
+
+# Performance panel
+if perf.is_enabled():
+    perf.record("rerun", time.perf_counter() - rerun_start)
+if show_perf:
+    st.subheader("⏱️ Performance")
+    stats = perf.span_stats()
+    if stats:
+        st.table([
+            {"span": name, "samples": s["count"], "p50 (ms)": f"{s['p50_ms']:.2f}",
+             "p95 (ms)": f"{s['p95_ms']:.2f}", "last (ms)": f"{s['last_ms']:.2f}"}
+            for name, s in sorted(stats.items())
+        ])
+        st.caption(f"Over the last {perf.SPAN_HISTORY} samples per span; 'rerun' covers the script up to this panel.")
+        renders = get_frame_renderer().stats()
+        st.caption(f"🖼️ Background renders on {renders['workers']} thread(s): {renders['completed']} completed, "
+                   f"{renders['cancelled']} cancelled, {renders['superseded']} superseded")
+    else:
+        st.info("No timings yet - interact with the map to collect samples.")
+
 # Instructions
 with st.expander("ℹ️ How to Use This Interface"):
     st.write("""
@@ -683,7 +734,8 @@ with st.expander("ℹ️ How to Use This Interface"):
     **Technical Details:**
     - District boundaries defined by collected coordinate polygons
     - Automatic coordinate scaling from display to original image size
-    - Uses matplotlib's Path.contains_point() for polygon detection
+    - Clicks are resolved with a precomputed district label raster (one array read)
+    - Uses matplotlib's Path.contains_point() as the exact-mode fallback
     - Real-time click history tracking with duplicate prevention
     """)
     
@@ -1,7 +1,11 @@
 import streamlit as st
-from PIL import Image
 import os
 import json
+from assets import load_board_image
+from polygons import load_source, promote_draft, SOURCE_PATH, DRAFT_PATH
+from datafiles import DebouncedWriter
+from encoder import encode_frame, preset_format, streamlit_format
+from render import image_key
 
 # Import streamlit-image-coordinates
 try:
@@ -13,168 +17,293 @@ except ImportError:
 # Configuration
 st.set_page_config(page_title="Night City Coordinate Collector", layout="wide")
 
-# Load and prepare image
-@st.cache_data
+DISTRICT_NAMES = ["Watson", "Westbrook", "City Center", "Heywood", "Pacifica", "Santo Domingo"]
+
+# Collected points are written to the draft file once clicking pauses for this long;
+# district_boundaries.json (what the game compiles) only changes on "Promote Draft"
+AUTOSAVE_DELAY = 1.0
+
+# Buffered map clicks are added to the district this many at a time (the autosaver gets every one)
+CLICK_BATCH = 10
+
+# The board never changes while collecting, so it is encoded once at this quality
+MAP_QUALITY = "high"
+
+# Load and prepare image (the display level of the pre-scaled board pyramid)
+@st.cache_resource
 def load_image():
-    image_path = os.path.join(os.path.dirname(__file__), "board_with_overlay.png")
     try:
-        board_img = Image.open(image_path)
-        original_size = board_img.size
-        
-        # Resize for display
-        max_width = 800
-        max_height = 600
-        scale_factor = min(max_width / original_size[0], max_height / original_size[1])
-        new_width = int(original_size[0] * scale_factor)
-        new_height = int(original_size[1] * scale_factor)
-        
-        display_img = board_img.resize((new_width, new_height), Image.Resampling.LANCZOS)
-        
-        return display_img, original_size, scale_factor
+        return load_board_image()
     except Exception as e:
         st.error(f"Error loading image: {e}")
         return None, None, 1.0
 
+# One background writer per process for the collector's draft
+@st.cache_resource
+def get_autosaver():
+    return DebouncedWriter(DRAFT_PATH, delay=AUTOSAVE_DELAY)
+
+def save_districts():
+    """Hand a snapshot of every district, buffered clicks included, to the autosaver; returns immediately
+
+    Buffered clicks are saved as if already added, so a browser refresh
+    never loses them; only re-rendering the district waits for the batch.
+    """
+    snapshot = {district: [list(p) for p in coords] for district, coords in st.session_state.districts.items()}
+    buffer = st.session_state.get('click_buffer')
+    if buffer:
+        district = st.session_state.buffer_district
+        snapshot[district] = snapshot.get(district, []) + [list(p) for p in buffer]
+    get_autosaver().submit(snapshot)
+
+def ask_confirm(action):
+    """Button callback: show (or, with None, dismiss) the confirmation for a destructive action"""
+    st.session_state.confirm = action
+
+def apply_clicks():
+    """Add the buffered clicks to their district and autosave; returns how many were added"""
+    buffer = st.session_state.click_buffer
+    if not buffer:
+        return 0
+    st.session_state.districts[st.session_state.buffer_district].extend(buffer)
+    st.session_state.click_buffer = []
+    save_districts()
+    return len(buffer)
+
 # Initialize session state
 def init_session_state():
     if 'districts' not in st.session_state:
-        st.session_state.districts = {
-            "Watson": [(116,39), (887,36), (893,211), (866,254), (721,307), (629,313), (571,473), (516,506), (245,500), (98,353), (98,64), (119,43)],  # Pre-collected
-            "Westbrook": [(629,309), (983,312), (985,819), (944,816), (655,645), (634,573), (519,501), (568,473), (632,309), (983,312)],  # Pre-collected
-            "City Center": [(58,501), (517,501), (629,573), (655,642), (517,814), (483,826), (445,837), (412,837), (378,821), (350,791), (337,742), (69,755), (25,698), (23,540), (56,499)],  # Pre-collected
-            "Heywood": [[23,698],[66,760],[332,744],[358,801],[396,826],[442,844],[486,832],[532,808],[657,642],[762,714],[460,1088],[176,1090],[56,960],[20,993],[20,698]],
-            "Pacifica": [[20,995],[51,962],[176,1090],[463,1090],[463,1118],[691,1331],[547,1523],[20,1520],[23,993]],
-            "Santo Domingo": [[765,714],[942,819],[988,819],[1018,816],[1018,1525],[565,1523],[706,1323],[478,1116],[478,1090],[770,727],[768,711]]
-        }
+        # Start from the draft, including points from a refreshed session the autosaver
+        # hasn't written yet; without a draft, from the source the game compiles
+        pending = get_autosaver().pending()
+        if pending is not None:
+            st.session_state.districts = {district: [tuple(p) for p in coords] for district, coords in pending.items()}
+        elif os.path.exists(DRAFT_PATH):
+            st.session_state.districts = load_source(DRAFT_PATH)
+        else:
+            st.session_state.districts = load_source()
+        for district in DISTRICT_NAMES:
+            st.session_state.districts.setdefault(district, [])
     if 'last_click' not in st.session_state:
         st.session_state.last_click = None
+    if 'click_buffer' not in st.session_state:
+        # Clicks not yet added to buffer_district
+        st.session_state.click_buffer = []
+        st.session_state.buffer_district = None
+    if 'confirm' not in st.session_state:
+        # Destructive action waiting for a second click ("clear", "reset" or "promote")
+        st.session_state.confirm = None
 
 init_session_state()
 
 # UI
 st.title("🗺️ Night City: Clean Coordinate Collector")
 
-col1, col2 = st.columns([2, 1])
+# District selection (switching districts reruns the whole page; clicks only rerun the capture panel)
+current_district = st.selectbox(
+    "Select district to map:", 
+    DISTRICT_NAMES,
+    index=3  # Start with Heywood (next district)
+)
 
-with col1:
-    # District selection
-    current_district = st.selectbox(
-        "Select district to map:", 
-        ["Watson", "Westbrook", "City Center", "Heywood", "Pacifica", "Santo Domingo"],
-        index=3  # Start with Heywood (next district)
-    )
-    
-    # Show current progress
-    current_count = len(st.session_state.districts[current_district])
-    st.write(f"**{current_district}**: {current_count} points collected")
+def district_panel(district):
+    """Coordinates collected for one district"""
+    coords = st.session_state.districts[district]
+    st.subheader(f"📋 {district} ({len(coords)} points)")
+    if st.session_state.click_buffer:
+        st.caption(f"⏳ {len(st.session_state.click_buffer)} buffered clicks not added yet")
+    if not coords:
+        st.caption("No points yet")
+        return
+
+    # Human readable
+    coord_text = ", ".join([f"({x},{y})" for x, y in coords])
+    st.text_area("Human readable:", coord_text, height=60, key=f"human_{district}")
     
-    # Load image
-    display_img, original_size, scale_factor = load_image()
+    # JSON format
+    json_text = json.dumps(coords, separators=(',', ':'))
+    st.text_area("JSON format:", json_text, height=60, key=f"json_{district}")
     
-    if display_img and HAS_IMAGE_COORDS:
-        st.write("👆 Click on the map to add boundary points")
-        
-        # Create unique key for each district to avoid conflicts
-        image_key = f"map_clicks_{current_district.lower().replace(' ', '_')}"
+    # Terminal output button
+    if st.button(f"Print {district} to Terminal", key=f"print_{district}"):
+        print(f"\n=== {district.upper()} COORDINATES ===")
+        print(f"Human: {coord_text}")
+        print(f"JSON: {json_text}")
+        print(f"Points: {len(coords)}")
+        st.success(f"Printed {district} coordinates to terminal")
+
+@st.fragment
+def capture_panel(current_district):
+    """Map, point controls and the active district's coordinates
+
+    A fragment, so each click reruns only this panel. Clicks are buffered
+    and added to the district CLICK_BATCH at a time, but every change,
+    buffered clicks included, goes straight to the autosaver, which writes
+    one draft file per pause in clicking.
+    """
+    # Clicks buffered for another district land there before this one collects any
+    if st.session_state.buffer_district != current_district:
+        apply_clicks()
+        st.session_state.buffer_district = current_district
+    buffer = st.session_state.click_buffer
+
+    col1, col2 = st.columns([2, 1])
+
+    with col1:
+        # Show current progress (filled in after this run's click is applied)
+        progress = st.empty()
         
-        # Get click coordinates
-        clicked_coords = streamlit_image_coordinates(
-            display_img, 
-            key=image_key
-        )
+        # Load image
+        display_img, original_size, scale_factor = load_image()
         
-        # Process clicks
-        if clicked_coords is not None:
-            # Convert to original coordinates
-            if isinstance(clicked_coords, dict):
-                display_x = clicked_coords.get('x', 0)
-                display_y = clicked_coords.get('y', 0)
-            else:
-                display_x, display_y = clicked_coords[0], clicked_coords[1]
+        if display_img and HAS_IMAGE_COORDS:
+            st.write("👆 Click on the map to add boundary points")
             
-            # Scale to original image size
-            orig_x = int(display_x / scale_factor)
-            orig_y = int(display_y / scale_factor)
+            # Create unique key for each district to avoid conflicts
+            click_key = f"map_clicks_{current_district.lower().replace(' ', '_')}"
             
-            # Check if this is a new click (avoid duplicates)
-            new_point = (orig_x, orig_y)
-            if st.session_state.last_click != new_point:
-                st.session_state.last_click = new_point
-                st.session_state.districts[current_district].append(new_point)
-                
-                # Visual feedback
-                st.success(f"✅ Added point ({orig_x}, {orig_y}) to {current_district}")
+            # Get click coordinates
+            frame_format, frame_quality = streamlit_format(*preset_format(MAP_QUALITY))
+            frame = encode_frame(("board", image_key(display_img)), lambda: display_img, frame_format, frame_quality)
+            clicked_coords = streamlit_image_coordinates(
+                frame, 
+                key=click_key,
+                image_format=frame.format
+            )
+            
+            # Process clicks
+            if clicked_coords is not None:
+                # Convert to original coordinates
+                if isinstance(clicked_coords, dict):
+                    display_x = clicked_coords.get('x', 0)
+                    display_y = clicked_coords.get('y', 0)
+                    click_id = (click_key, clicked_coords.get('unix_time'), display_x, display_y)
+                else:
+                    display_x, display_y = clicked_coords[0], clicked_coords[1]
+                    click_id = (click_key, display_x, display_y)
                 
-                # Terminal output
-                print(f"\n[{current_district}] New point: ({orig_x}, {orig_y})")
-                print(f"JSON format: [{orig_x}, {orig_y}],")
-                print(f"Total points for {current_district}: {len(st.session_state.districts[current_district])}")
+                # Scale to original image size
+                orig_x = int(display_x / scale_factor)
+                orig_y = int(display_y / scale_factor)
                 
-                # Refresh the page to show updated count
-                st.rerun()
-    
-    elif not HAS_IMAGE_COORDS:
-        st.error("Please install: pip install streamlit-image-coordinates")
-    else:
-        st.error("Could not load image")
-
-with col2:
-    # Manual entry backup
-    st.subheader("Manual Entry")
-    manual_x = st.number_input("X:", value=0, step=1)
-    manual_y = st.number_input("Y:", value=0, step=1)
-    
-    if st.button("Add Manual Point"):
-        new_point = (manual_x, manual_y)
-        st.session_state.districts[current_district].append(new_point)
-        st.success(f"Added ({manual_x}, {manual_y})")
-        print(f"\n[{current_district}] Manual: ({manual_x}, {manual_y})")
-        st.rerun()
-    
-    # District management
-    st.subheader("District Management")
-    
-    if st.button("Remove Last Point"):
-        if st.session_state.districts[current_district]:
-            removed = st.session_state.districts[current_district].pop()
-            st.success(f"Removed {removed}")
-            st.rerun()
+                # The component keeps returning its last click on every rerun; only buffer new clicks,
+                # and never the same point twice in a row
+                new_point = (orig_x, orig_y)
+                coords = st.session_state.districts[current_district]
+                if st.session_state.last_click != click_id:
+                    st.session_state.last_click = click_id
+                    last_point = buffer[-1] if buffer else coords[-1] if coords else None
+                    if new_point != last_point:
+                        buffer.append(new_point)
+                        
+                        # Terminal output
+                        print(f"\n[{current_district}] New point: ({orig_x}, {orig_y})")
+                        print(f"JSON format: [{orig_x}, {orig_y}],")
+                        
+                        if len(buffer) >= CLICK_BATCH:
+                            added = apply_clicks()
+                            print(f"Total points for {current_district}: {len(coords)}")
+                            st.success(f"✅ Added {added} points to {current_district}")
+                        else:
+                            save_districts()
+                            st.success(f"✅ Buffered point ({orig_x}, {orig_y})")
+        
+        elif not HAS_IMAGE_COORDS:
+            st.error("Please install: pip install streamlit-image-coordinates")
         else:
-            st.warning("No points to remove")
-    
-    if st.button("Clear District"):
-        st.session_state.districts[current_district] = []
-        st.success(f"Cleared {current_district}")
-        st.rerun()
-    
-    if st.button("Reset All"):
-        for district in st.session_state.districts:
-            if district != "Watson":  # Keep Watson
-                st.session_state.districts[district] = []
-        st.success("Reset all except Watson")
-        st.rerun()
-
-# Display all collected coordinates
-st.subheader("📋 Collected Coordinates")
-
-for district, coords in st.session_state.districts.items():
-    if coords:  # Only show districts with coordinates
-        with st.expander(f"{district} ({len(coords)} points)", expanded=(district == current_district)):
-            # Human readable
-            coord_text = ", ".join([f"({x},{y})" for x, y in coords])
-            st.text_area("Human readable:", coord_text, height=60, key=f"human_{district}")
-            
-            # JSON format
-            json_text = json.dumps(coords, separators=(',', ':'))
-            st.text_area("JSON format:", json_text, height=60, key=f"json_{district}")
-            
-            # Terminal output button
-            if st.button(f"Print {district} to Terminal", key=f"print_{district}"):
-                print(f"\n=== {district.upper()} COORDINATES ===")
-                print(f"Human: {coord_text}")
-                print(f"JSON: {json_text}")
-                print(f"Points: {len(coords)}")
-                st.success(f"Printed {district} coordinates to terminal")
+            st.error("Could not load image")
+
+    with col2:
+        # Manual entry backup
+        st.subheader("Manual Entry")
+        manual_x = st.number_input("X:", value=0, step=1)
+        manual_y = st.number_input("Y:", value=0, step=1)
+        
+        if st.button("Add Manual Point"):
+            new_point = (manual_x, manual_y)
+            apply_clicks()
+            st.session_state.districts[current_district].append(new_point)
+            save_districts()
+            st.success(f"Added ({manual_x}, {manual_y})")
+            print(f"\n[{current_district}] Manual: ({manual_x}, {manual_y})")
+        
+        if buffer and st.button(f"Add {len(buffer)} Buffered Points"):
+            added = apply_clicks()
+            st.success(f"Added {added} points to {current_district}")
+        
+        # District management
+        st.subheader("District Management")
+        
+        if st.button("Remove Last Point"):
+            if buffer:
+                removed = buffer.pop()
+                save_districts()
+                st.success(f"Removed buffered {removed}")
+            elif st.session_state.districts[current_district]:
+                removed = st.session_state.districts[current_district].pop()
+                save_districts()
+                st.success(f"Removed {removed}")
+            else:
+                st.warning("No points to remove")
+        
+        # Clearing, resetting and promoting take a second click to confirm
+        st.button("Clear District", on_click=ask_confirm, args=("clear",))
+        st.button("Reset All", on_click=ask_confirm, args=("reset",))
+        
+        # The game only sees the draft once it's promoted
+        st.subheader("Game Boundaries")
+        st.button("Promote Draft", on_click=ask_confirm, args=("promote",))
+        
+        confirm = st.session_state.confirm
+        if confirm == "clear":
+            st.warning(f"Clear all {len(st.session_state.districts[current_district]) + len(buffer)} points of {current_district}?")
+        elif confirm == "reset":
+            st.warning("Clear every district except Watson?")
+        elif confirm == "promote":
+            empty = [district for district, coords in st.session_state.districts.items() if len(coords) < 3]
+            st.warning(f"Replace {os.path.basename(SOURCE_PATH)} (the boundaries the game uses) with this draft?"
+                       + (f" These districts would have no boundary: {', '.join(empty)}" if empty else ""))
+        if confirm is not None:
+            yes, no = st.columns(2)
+            no.button("Cancel", on_click=ask_confirm, args=(None,))
+            if yes.button("Confirm", type="primary"):
+                st.session_state.confirm = None
+                apply_clicks()
+                if confirm == "clear":
+                    st.session_state.districts[current_district] = []
+                    save_districts()
+                    st.success(f"Cleared {current_district}")
+                elif confirm == "reset":
+                    for district in st.session_state.districts:
+                        if district != "Watson":  # Keep Watson
+                            st.session_state.districts[district] = []
+                    save_districts()
+                    st.success("Reset all except Watson")
+                    # The other districts' summary lives outside this panel
+                    st.rerun()
+                else:
+                    autosaver = get_autosaver()
+                    save_districts()
+                    autosaver.flush()
+                    compiled = promote_draft()
+                    st.success(f"Promoted the draft: {len(compiled['districts'])} districts compiled")
+        
+        autosaver = get_autosaver()
+        if autosaver.pending() is not None:
+            st.caption(f"💾 Saving to {os.path.basename(DRAFT_PATH)}...")
+        else:
+            st.caption(f"💾 Saved to {os.path.basename(DRAFT_PATH)}")
+
+    progress.write(f"**{current_district}**: {len(st.session_state.districts[current_district]) + len(buffer)} points collected")
+
+    # Only the active district's coordinates are rendered
+    district_panel(current_district)
+
+capture_panel(current_district)
+
+# Other districts as a one-line summary
+others = [f"{district}: {len(coords)}" for district, coords in st.session_state.districts.items() if district != current_district]
+st.caption("Other districts (points): " + ", ".join(others))
 
 # Export all data
 if st.button("Export All to Terminal"):
@@ -0,0 +1,131 @@
+import os
+import json
+import numpy as np
+from PIL import Image
+
+from datafiles import file_signature
+
+BASE_DIR = os.path.dirname(os.path.abspath(__file__))
+BOARD_IMAGE_PATH = os.path.join(BASE_DIR, "board_with_overlay.png")
+
+# Pre-scaled copies of the board, stored as raw RGB arrays that load with a memory map
+PYRAMID_DIR = os.path.join(BASE_DIR, ".asset_cache")
+PYRAMID_VERSION = 1
+
+# Display size the board is fitted into
+MAX_DISPLAY_WIDTH = 800
+MAX_DISPLAY_HEIGHT = 600
+
+# Pyramid levels as a fraction of the display level; each is resized from the display
+# level with LANCZOS, exactly as the apps did on every rerun before
+PYRAMID_LEVELS = {
+    "display": 1.0,
+    "debug": 0.4,
+    "thumbnail": 0.2,
+}
+
+_levels = {}
+
+
+def display_scale(original_size, max_width=MAX_DISPLAY_WIDTH, max_height=MAX_DISPLAY_HEIGHT):
+    """Scale factor that fits the board into the display box"""
+    return min(max_width / original_size[0], max_height / original_size[1])
+
+
+def level_size(display_size, factor):
+    return (int(display_size[0] * factor), int(display_size[1] * factor))
+
+
+def build_pyramid(image_path=BOARD_IMAGE_PATH, cache_dir=PYRAMID_DIR):
+    """Decode the board once and write every pyramid level plus a manifest to cache_dir"""
+    signature = file_signature(image_path)
+    board_img = Image.open(image_path).convert("RGB")
+    original_size = board_img.size
+
+    scale_factor = display_scale(original_size)
+    display_img = board_img.resize(level_size(original_size, scale_factor), Image.Resampling.LANCZOS)
+
+    os.makedirs(cache_dir, exist_ok=True)
+    manifest = {
+        "version": PYRAMID_VERSION,
+        "source": os.path.basename(image_path),
+        "signature": list(signature),
+        "original_size": list(original_size),
+        "scale_factor": scale_factor,
+        "levels": {},
+    }
+    for name, factor in PYRAMID_LEVELS.items():
+        level = display_img if factor == 1.0 else display_img.resize(level_size(display_img.size, factor),
+                                                                     Image.Resampling.LANCZOS)
+        filename = f"board.{name}.npy"
+        tmp = os.path.join(cache_dir, filename + ".tmp")
+        with open(tmp, 'wb') as f:
+            np.save(f, np.asarray(level))
+        os.replace(tmp, os.path.join(cache_dir, filename))
+        manifest["levels"][name] = {"file": filename, "size": list(level.size), "factor": factor}
+
+    # Manifest last, so a half-built pyramid is never mistaken for a complete one
+    tmp = os.path.join(cache_dir, "manifest.json.tmp")
+    with open(tmp, 'w') as f:
+        json.dump(manifest, f, indent=2)
+    os.replace(tmp, os.path.join(cache_dir, "manifest.json"))
+    return manifest
+
+
+def load_manifest(image_path=BOARD_IMAGE_PATH, cache_dir=PYRAMID_DIR):
+    """Pyramid manifest for the board, rebuilding the pyramid if it's missing or the PNG changed"""
+    try:
+        with open(os.path.join(cache_dir, "manifest.json"), 'r') as f:
+            manifest = json.load(f)
+        if (manifest.get("version") == PYRAMID_VERSION
+                and manifest.get("signature") == list(file_signature(image_path))
+                and set(manifest.get("levels", {})) == set(PYRAMID_LEVELS)):
+            return manifest
+    except (OSError, ValueError, TypeError):
+        pass
+    return build_pyramid(image_path, cache_dir)
+
+
+def load_level(name, image_path=BOARD_IMAGE_PATH, cache_dir=PYRAMID_DIR):
+    """One pyramid level as a new PIL image (safe to draw on)
+
+    The raw array is memory-mapped, so loading costs one copy of the level
+    rather than a PNG decode and resize.
+    """
+    manifest = load_manifest(image_path, cache_dir)
+    path = os.path.join(cache_dir, manifest["levels"][name]["file"])
+    signature = file_signature(path)
+    cached = _levels.get(path)
+    if cached is None or cached[0] != signature:
+        try:
+            cached = (signature, np.load(path, mmap_mode='r'))
+        except (OSError, ValueError):
+            # A level file went missing or was damaged; rebuild everything once
+            build_pyramid(image_path, cache_dir)
+            cached = (file_signature(path), np.load(path, mmap_mode='r'))
+        _levels[path] = cached
+    return Image.fromarray(np.array(cached[1]))
+
+
+def load_board_image(image_path=BOARD_IMAGE_PATH, max_width=MAX_DISPLAY_WIDTH, max_height=MAX_DISPLAY_HEIGHT):
+    """Board resized for display
+
+    Returns (display_img, original_size, scale_factor). The default display
+    box comes from the pre-scaled pyramid; any other box decodes the PNG.
+    Raises on a missing or unreadable image; the apps turn that into an st.error.
+    """
+    if (max_width, max_height) == (MAX_DISPLAY_WIDTH, MAX_DISPLAY_HEIGHT):
+        manifest = load_manifest(image_path)
+        return load_level("display", image_path), tuple(manifest["original_size"]), manifest["scale_factor"]
+
+    board_img = Image.open(image_path)
+    original_size = board_img.size
+    scale_factor = display_scale(original_size, max_width, max_height)
+    display_img = board_img.resize(level_size(original_size, scale_factor), Image.Resampling.LANCZOS)
+    return display_img, original_size, scale_factor
+
+
+if __name__ == "__main__":
+    manifest = build_pyramid()
+    for name, level in manifest["levels"].items():
+        print(f"🖼️ {name}: {level['size'][0]}x{level['size'][1]} -> {os.path.join(PYRAMID_DIR, level['file'])}")
@@ -0,0 +1,90 @@
+"""Benchmark legal move generation: GameEngine vs Bitboard vs batched Bitboard
+
+Usage: python benchmarks/bench_bitboard.py [--states 4096] [--gang maelstrom] [--seconds 1.0]
+"""
+import os
+import sys
+import copy
+import json
+import time
+import random
+import argparse
+
+import numpy as np
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from engine import GameEngine, Move, load_rules
+from engine.bitboard import Bitboard, batch_move_triples
+
+BASE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def random_states(state, rules, count, seed):
+    """Positions reached by a few random actions from the starting state"""
+    rng = random.Random(seed)
+    gangs = list(state["gangs"])
+    states = []
+    for i in range(count):
+        engine = GameEngine(copy.deepcopy(state), rules)
+        for ply in range(rng.randint(0, 8)):
+            actions = engine.legal_actions(gangs[ply % len(gangs)])
+            if actions:
+                engine.apply(rng.choice(actions))
+        states.append(engine.state)
+    return states
+
+
+def rate(fn, seconds):
+    """Moves generated per second by calling fn() (which returns a move count) for ~seconds"""
+    moves = calls = 0
+    start = time.perf_counter()
+    while time.perf_counter() - start < seconds:
+        moves += fn()
+        calls += 1
+    elapsed = time.perf_counter() - start
+    return moves / elapsed, calls / elapsed
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--states", type=int, default=4096, help="positions in the batched run")
+    parser.add_argument("--gang", default="maelstrom")
+    parser.add_argument("--seconds", type=float, default=1.0)
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    rules = load_rules()
+    with open(os.path.join(BASE_DIR, "game_state.json"), "r") as f:
+        state = json.load(f)
+
+    sample = random_states(state, rules, 64, args.seed)
+    engines = [GameEngine(s, rules) for s in sample]
+    boards = [Bitboard.from_json(s, rules) for s in sample]
+    g = boards[0].index.gang_index[args.gang]
+    i = iter(range(10 ** 12))
+
+    def engine_moves():
+        engine = engines[next(i) % len(engines)]
+        return sum(1 for a in engine.legal_actions(args.gang) if isinstance(a, Move))
+
+    def board_moves():
+        return len(boards[next(i) % len(boards)].legal_moves(args.gang))
+
+    def board_triples():
+        return len(boards[next(i) % len(boards)].move_triples(g, "techie"))
+
+    batch = np.stack([boards[k % len(boards)].counts for k in range(args.states)])
+
+    def batched():
+        return len(batch_move_triples(batch, g, "techie", boards[0].index)[0])
+
+    print(f"{'generator':<28} {'moves/s':>14} {'calls/s':>12}")
+    for name, fn in [("GameEngine.legal_actions", engine_moves), ("Bitboard.legal_moves", board_moves),
+                     ("Bitboard.move_triples", board_triples), (f"batch_move_triples[{args.states}]", batched)]:
+        moves_per_s, calls_per_s = rate(fn, args.seconds)
+        print(f"{name:<28} {moves_per_s:>14,.0f} {calls_per_s:>12,.0f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,59 @@
+"""Benchmark batch district detection against the scalar detect_district loop
+
+Usage: python benchmarks/bench_detection.py [--sizes 1000 100000 1000000] [--seed 0]
+"""
+import os
+import sys
+import time
+import argparse
+import numpy as np
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from districts import detect_district, detect_districts, district_names, get_board_size
+
+
+def random_points(count, seed):
+    """Uniform random points over the board, including a margin outside it"""
+    width, height = get_board_size()
+    rng = np.random.default_rng(seed)
+    xs = rng.uniform(-20, width + 20, count)
+    ys = rng.uniform(-20, height + 20, count)
+    return np.column_stack((xs, ys))
+
+
+def time_scalar(points, mode):
+    start = time.perf_counter()
+    results = [detect_district(x, y, mode=mode) for x, y in points]
+    return time.perf_counter() - start, results
+
+
+def time_batch(points):
+    start = time.perf_counter()
+    results = detect_districts(points)
+    return time.perf_counter() - start, results
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--sizes", type=int, nargs="+", default=[1_000, 100_000, 1_000_000])
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    names = district_names()
+    detect_districts(np.zeros((1, 2)))  # Compile the Paths outside the timed region
+
+    print(f"{'points':>10} {'scalar (s)':>12} {'batch (s)':>11} {'speedup':>9} {'match':>6}")
+    for count in args.sizes:
+        points = random_points(count, args.seed)
+        scalar_time, scalar_results = time_scalar(points, mode="exact")
+        batch_time, batch_results = time_batch(points)
+
+        decoded = [names[i] if i >= 0 else None for i in batch_results]
+        match = decoded == scalar_results
+        speedup = scalar_time / batch_time if batch_time > 0 else float("inf")
+        print(f"{count:>10} {scalar_time:>12.3f} {batch_time:>11.4f} {speedup:>8.0f}x {str(match):>6}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,77 @@
+"""Time replay export of a long random game in every format
+
+Plays --actions random legal actions from game_state.json into a temporary
+event log (as the search rollouts do), then exports the replay as a GIF, an
+APNG and a numbered PNG sequence, reporting frames per second and peak RSS.
+
+Usage: python benchmarks/bench_replay.py [--actions 500] [--workers N] [--level display]
+"""
+import os
+import sys
+import json
+import time
+import random
+import argparse
+import tempfile
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+from datafiles import load_json
+from game_data import GAME_STATE_PATH
+from engine import EventLog, Reclaim
+from replay import export_replay, replay_states, REPLAY_FORMATS
+
+
+def peak_rss_mb():
+    with open("/proc/self/status") as f:
+        for line in f:
+            if line.startswith("VmHWM:"):
+                return int(line.split()[1]) / 1024
+    return 0.0
+
+
+def random_game(path, actions, seed):
+    """Event log with `actions` random legal actions, every gang taking turns"""
+    rng = random.Random(seed)
+    game_log = EventLog.open(path, initial_state=json.loads(json.dumps(load_json(GAME_STATE_PATH))))
+    gangs = list(game_log.engine.state.get("gangs", {}))
+    turn = 0
+    while game_log.current_ply() < actions:
+        legal = game_log.engine.legal_actions(gangs[turn])
+        playable = [a for a in legal if not isinstance(a, Reclaim)] or legal
+        if playable:
+            game_log.apply(rng.choice(playable))
+        turn = (turn + 1) % len(gangs)
+    return game_log
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--actions", type=int, default=500)
+    parser.add_argument("--workers", type=int, default=os.cpu_count())
+    parser.add_argument("--level", default="display")
+    parser.add_argument("--seed", type=int, default=25)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        start = time.perf_counter()
+        game_log = random_game(os.path.join(tmp, "game.jsonl"), args.actions, args.seed)
+        print(f"🎲 Played {args.actions} actions in {time.perf_counter() - start:.2f}s")
+
+        outputs = {"gif": "replay.gif", "apng": "replay.png", "frames": "frames"}
+        for format in REPLAY_FORMATS:
+            path = os.path.join(tmp, outputs[format])
+            start = time.perf_counter()
+            frames = export_replay(replay_states(game_log), path, format=format, level=args.level, workers=args.workers)
+            elapsed = time.perf_counter() - start
+            if os.path.isdir(path):
+                size = sum(os.path.getsize(os.path.join(path, name)) for name in os.listdir(path))
+            else:
+                size = os.path.getsize(path)
+            print(f"🎞️ {format:<6} {frames} frames in {elapsed:6.2f}s ({frames / elapsed:6.1f} frames/s) "
+                  f"on {args.workers} worker(s), {size / 2 ** 20:.1f} MB, peak RSS {peak_rss_mb():.0f} MB")
+
+
+if __name__ == "__main__":
+    main()
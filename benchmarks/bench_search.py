@@ -0,0 +1,41 @@
+"""Benchmark search rollout throughput at 1, 2, 4 and 8 worker processes
+
+Usage: python benchmarks/bench_search.py [--workers 1 2 4 8] [--budget 2.0] [--gang maelstrom]
+"""
+import os
+import sys
+import json
+import argparse
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from engine.search import SearchPool
+
+BASE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--workers", type=int, nargs="+", default=[1, 2, 4, 8])
+    parser.add_argument("--budget", type=float, default=2.0, help="seconds per decision")
+    parser.add_argument("--gang", default="maelstrom")
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    with open(os.path.join(BASE_DIR, "game_state.json"), "r") as f:
+        state = json.load(f)
+
+    print(f"CPU cores: {os.cpu_count()}")
+    print(f"{'workers':>8} {'rollouts':>10} {'rollouts/s':>12} {'speedup':>8}  best action")
+    baseline = None
+    for workers in args.workers:
+        with SearchPool(workers) as pool:
+            pool.warm_up()
+            result = pool.search(state, args.gang, time_budget=args.budget, seed=args.seed)
+        rate = result.rollouts / result.elapsed
+        baseline = baseline or rate
+        print(f"{workers:>8} {result.rollouts:>10} {rate:>12.0f} {rate / baseline:>7.2f}x  {result.action}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,134 @@
+"""Measure app.py memory per Streamlit session with 1, 50 and 200 concurrent sessions
+
+Every session is an AppTest run of app.py in one process, seated at a table
+(?game=table-N, --players sessions per table) and clicking one district, so
+the process-wide caches (board pyramid, label raster, rules, encoded frames,
+game store) are shared exactly as on a server. Each count runs in a fresh
+subprocess; the per-session figure is the growth from 1 session to N divided
+by N - 1.
+
+Each AppTest also keeps its rendered element tree, which a real session only
+holds until it is sent to the browser, so the per-session numbers here are an
+upper bound. Game logs go to a temporary directory.
+
+Measured on the dev box (4 players per table):
+
+  sessions  games  traced (MB)  RSS (MB)  per session (KB)  session_state (B)
+         1      1         47.3     203.4                 -                280
+        50     13         53.3     229.8             125.0                280
+       200     50         65.7     294.9              94.6                280
+
+so one process carries ~47 MB of shared assets, boundaries and rules, and
+each further session adds ~100 KB (mostly its rendered page), of which its
+own mutable state is a few hundred bytes. Each table adds one game state,
+and only NIGHTCITY_MAX_LIVE_GAMES of those stay in memory.
+
+Usage: python benchmarks/bench_sessions.py [--sessions 1 50 200] [--players 4]
+"""
+import os
+import sys
+import gc
+import json
+import time
+import pickle
+import argparse
+import tempfile
+import subprocess
+import tracemalloc
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+APP_PATH = os.path.join(ROOT, "app.py")
+
+
+def rss_mb():
+    with open("/proc/self/status") as f:
+        for line in f:
+            if line.startswith("VmRSS:"):
+                return int(line.split()[1]) / 1024
+    return 0.0
+
+
+def run_sessions(count, players):
+    """Start `count` sessions in this process; returns measurements as a dict"""
+    import contextlib
+    import io
+    import logging
+    from streamlit.testing.v1 import AppTest
+
+    logging.disable(logging.WARNING)
+    # Tables only start from an explicit action; start them all before seating anyone
+    from games import GameStore
+    from datafiles import load_json
+    from game_data import GAME_STATE_PATH
+    starter = GameStore(lambda: json.loads(json.dumps(load_json(GAME_STATE_PATH))))
+    for table in range((count + players - 1) // players):
+        if not starter.exists(f"table-{table}"):
+            starter.create(f"table-{table}")
+    del starter
+
+    tracemalloc.start()
+    sessions = []
+    start = time.perf_counter()
+    for i in range(count):
+        at = AppTest.from_file(APP_PATH, default_timeout=120)
+        at.query_params["game"] = f"table-{i // players}"
+        # Click Watson, as a player inspecting the board would
+        at.session_state["district_detection"] = {"x": 80, "y": 60}
+        with contextlib.redirect_stdout(io.StringIO()):
+            at.run()
+        if at.exception:
+            raise RuntimeError(f"session {i}: {at.exception[0].value}")
+        sessions.append(at)
+    elapsed = time.perf_counter() - start
+
+    gc.collect()
+    traced, _ = tracemalloc.get_traced_memory()
+    # Just the per-session mutable state: what the app keeps in st.session_state
+    state_bytes = sum(len(pickle.dumps({k: v for k, v in at._session_state.filtered_state.items()
+                                        if not callable(v)}, protocol=pickle.HIGHEST_PROTOCOL))
+                      for at in sessions) / count
+
+    store = next((v for v in gc.get_objects() if isinstance(v, GameStore)), None)
+    return {
+        "sessions": count,
+        "traced_mb": traced / 2 ** 20,
+        "rss_mb": rss_mb(),
+        "seconds_per_session": elapsed / count,
+        "session_state_bytes": state_bytes,
+        "games": store.stats() if store else {},
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--sessions", type=int, nargs="+", default=[1, 50, 200])
+    parser.add_argument("--players", type=int, default=4, help="sessions seated at each table")
+    parser.add_argument("--run", type=int, help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.run is not None:
+        print(json.dumps(run_sessions(args.run, args.players)))
+        return
+
+    results = []
+    with tempfile.TemporaryDirectory() as games_dir:
+        env = dict(os.environ, NIGHTCITY_GAMES_DIR=games_dir)
+        for count in args.sessions:
+            output = subprocess.run([sys.executable, os.path.abspath(__file__), "--run", str(count),
+                                     "--players", str(args.players)],
+                                    cwd=ROOT, env=env, capture_output=True, text=True, check=True).stdout
+            results.append(json.loads(output.strip().splitlines()[-1]))
+
+    base = results[0]
+    print(f"{'sessions':>8} {'games':>6} {'traced (MB)':>12} {'RSS (MB)':>9} {'per session (KB)':>17} "
+          f"{'session_state (B)':>18} {'run (ms)':>9}")
+    for r in results:
+        extra = r["sessions"] - base["sessions"]
+        per_session = (r["traced_mb"] - base["traced_mb"]) * 1024 / extra if extra else float("nan")
+        print(f"{r['sessions']:>8} {r['games'].get('games', 0):>6} {r['traced_mb']:>12.1f} {r['rss_mb']:>9.1f} "
+              f"{per_session:>17.1f} {r['session_state_bytes']:>18.0f} {r['seconds_per_session'] * 1e3:>9.1f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,69 @@
+"""Benchmark district query latency on synthetic boards from 6 to 10,000 regions
+
+Compares the grid index against a linear scan over the same polygons.
+Usage: python benchmarks/bench_spatial_index.py [--regions 6 100 1000 10000] [--queries 2000]
+"""
+import os
+import sys
+import time
+import argparse
+import numpy as np
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from districts import DISTRICT_BOUNDARIES, detect_district_exact
+from spatial_index import DistrictGridIndex, generate_synthetic_board
+
+BOARD_SIZE = (1024, 1536)
+
+
+def random_points(count, seed):
+    rng = np.random.default_rng(seed)
+    return np.column_stack((rng.uniform(0, BOARD_SIZE[0], count), rng.uniform(0, BOARD_SIZE[1], count)))
+
+
+def per_query_us(fn, points):
+    start = time.perf_counter()
+    results = [fn(x, y) for x, y in points]
+    return (time.perf_counter() - start) / len(points) * 1e6, results
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--regions", type=int, nargs="+", default=[6, 100, 1000, 10000])
+    parser.add_argument("--queries", type=int, default=2000)
+    parser.add_argument("--linear-queries", type=int, default=200, help="queries for the (slow) linear scan")
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    print(f"{'regions':>8} {'build (ms)':>11} {'index (us)':>11} {'linear (us)':>12} {'batch (us)':>11} {'match':>6}")
+    for region_count in args.regions:
+        if region_count == len(DISTRICT_BOUNDARIES):
+            boundaries = DISTRICT_BOUNDARIES
+        else:
+            boundaries = generate_synthetic_board(region_count, size=BOARD_SIZE, seed=args.seed)
+
+        start = time.perf_counter()
+        index = DistrictGridIndex(boundaries)
+        build_ms = (time.perf_counter() - start) * 1e3
+
+        points = random_points(args.queries, args.seed)
+        index_us, index_results = per_query_us(index.detect_district, points)
+
+        linear_points = points[:args.linear_queries]
+        linear_us, linear_results = per_query_us(
+            lambda x, y: detect_district_exact(x, y, boundaries), linear_points
+        )
+
+        start = time.perf_counter()
+        batch = index.detect_districts(points)
+        batch_us = (time.perf_counter() - start) / len(points) * 1e6
+
+        names = index.names
+        batch_names = [names[i] if i >= 0 else None for i in batch]
+        match = index_results[:len(linear_results)] == linear_results and batch_names == index_results
+        print(f"{region_count:>8} {build_ms:>11.1f} {index_us:>11.1f} {linear_us:>12.1f} {batch_us:>11.2f} {str(match):>6}")
+
+
+if __name__ == "__main__":
+    main()
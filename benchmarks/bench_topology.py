@@ -0,0 +1,58 @@
+"""Benchmark deriving adjacency from polygons and building all-pairs distances on synthetic boards
+
+Usage: python benchmarks/bench_topology.py [--regions 6 100 1000 3000]
+"""
+import os
+import sys
+import time
+import argparse
+import numpy as np
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from districts import DISTRICT_BOUNDARIES
+from spatial_index import generate_synthetic_board
+from topology import derive_adjacency
+from engine.distances import all_pairs_distances
+
+BOARD_SIZE = (1024, 1536)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--regions", type=int, nargs="+", default=[6, 100, 1000, 3000])
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    print(f"{'regions':>8} {'borders':>8} {'derive (ms)':>12} {'apsp (ms)':>10} {'diameter':>9} {'lookup (us)':>12}")
+    for region_count in args.regions:
+        if region_count == len(DISTRICT_BOUNDARIES):
+            boundaries = DISTRICT_BOUNDARIES
+            tolerance, min_contact = 15, 40
+        else:
+            boundaries = generate_synthetic_board(region_count, size=BOARD_SIZE, seed=args.seed)
+            # Synthetic cells share exact edges; keep the tolerance well under a cell so corners don't count
+            tolerance, min_contact = 1, 10
+
+        start = time.perf_counter()
+        adjacency, contact = derive_adjacency(boundaries, tolerance=tolerance, min_contact=min_contact)
+        derive_ms = (time.perf_counter() - start) * 1e3
+
+        names = list(adjacency)
+        start = time.perf_counter()
+        distances = all_pairs_distances(names, adjacency)
+        apsp_ms = (time.perf_counter() - start) * 1e3
+
+        rng = np.random.default_rng(args.seed)
+        pairs = rng.integers(0, len(names), size=(10000, 2))
+        start = time.perf_counter()
+        for i, j in pairs:
+            distances[i, j]
+        lookup_us = (time.perf_counter() - start) / len(pairs) * 1e6
+
+        print(f"{region_count:>8} {len(contact):>8} {derive_ms:>12.1f} {apsp_ms:>10.1f} "
+              f"{int(distances.max()):>9} {lookup_us:>12.2f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,281 @@
+"""Headless benchmark suite for detection, rendering and asset loading
+
+Runs without a Streamlit server and writes machine-readable results so runs
+can be compared. Every benchmark has its own fixed seed.
+
+Usage:
+    python benchmarks/run_benchmarks.py [--output results.json] [--compare previous.json]
+                                        [--only detect draw] [--repeat 5]
+"""
+import os
+import sys
+import json
+import time
+import zlib
+import random
+import argparse
+import platform
+import statistics
+import tempfile
+from datetime import datetime, timezone
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import numpy as np
+import PIL
+
+import assets
+import encoder
+import render
+from assets import load_board_image, display_scale
+from districts import (DISTRICT_BOUNDARIES, point_in_polygon, detect_district, detect_districts,
+                       load_label_raster, get_board_size)
+from game_data import get_game_data
+from render import get_district_center, create_unit_positions, draw_units_on_image, frame_key, units_snapshot
+from renderer import FrameRenderer
+
+BASE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+DEFAULT_OUTPUT = os.path.join(BASE_DIR, "benchmarks", "results.json")
+
+UNIT_COUNTS = [0, 10, 50, 100, 250, 500]
+
+BENCHMARKS = []
+
+
+def benchmark(name):
+    """Register a benchmark; the seed is derived from its name so it never changes between runs"""
+    def register(fn):
+        BENCHMARKS.append((name, fn, zlib.crc32(name.encode("utf-8"))))
+        return fn
+    return register
+
+
+def measure(fn, repeat, ops=1, setup=None):
+    """Time fn() repeat times; returns per-op stats in microseconds"""
+    samples = []
+    for _ in range(repeat):
+        if setup is not None:
+            setup()
+        start = time.perf_counter()
+        fn()
+        samples.append((time.perf_counter() - start) / ops * 1e6)
+    return {
+        "ops": ops,
+        "repeat": repeat,
+        "min_us": min(samples),
+        "median_us": statistics.median(samples),
+        "mean_us": statistics.fmean(samples),
+    }
+
+
+def board_points(count, rng):
+    """Integer click coordinates over the board, like streamlit_image_coordinates produces"""
+    width, height = get_board_size()
+    return np.column_stack((rng.integers(0, width, count), rng.integers(0, height, count)))
+
+
+def synthetic_game_state(unit_count, rng):
+    """Game state shaped like game_state.json with unit_count units spread over the districts"""
+    with open(os.path.join(BASE_DIR, "game_state.json"), "r") as f:
+        game_state = json.load(f)
+
+    game_data = get_game_data()
+    gang_ids = list(game_state["gangs"]) or list(game_data.gangs)
+    unit_types = list(game_data.units)
+    district_names = list(DISTRICT_BOUNDARIES)
+
+    districts = {name: {"units": {}, "hideouts": [], "presence": [], "dominant": None} for name in district_names}
+    for _ in range(unit_count):
+        district = districts[district_names[int(rng.integers(len(district_names)))]]
+        gang_id = gang_ids[int(rng.integers(len(gang_ids)))]
+        district["units"].setdefault(gang_id, []).append(unit_types[int(rng.integers(len(unit_types)))])
+
+    for district in districts.values():
+        district["presence"] = list(district["units"])
+    game_state["districts"] = districts
+    return game_state
+
+
+@benchmark("point_in_polygon")
+def bench_point_in_polygon(repeat, seed):
+    rng = np.random.default_rng(seed)
+    points = [tuple(p) for p in board_points(1000, rng)]
+    polygons = list(DISTRICT_BOUNDARIES.values())
+
+    def run():
+        for i, point in enumerate(points):
+            point_in_polygon(point, polygons[i % len(polygons)])
+
+    return {"point_in_polygon": measure(run, repeat, ops=len(points))}
+
+
+@benchmark("detect_district")
+def bench_detect_district(repeat, seed):
+    rng = np.random.default_rng(seed)
+    points = [(int(x), int(y)) for x, y in board_points(1000, rng)]
+    load_label_raster()
+
+    results = {}
+    for mode in ("raster", "exact"):
+        def run():
+            for x, y in points:
+                detect_district(x, y, mode=mode)
+        results[f"detect_district[{mode}]"] = measure(run, repeat, ops=len(points))
+    return results
+
+
+@benchmark("detect_districts")
+def bench_detect_districts(repeat, seed):
+    rng = np.random.default_rng(seed)
+    results = {}
+    for count in (1_000, 100_000):
+        points = board_points(count, rng)
+        results[f"detect_districts[{count}]"] = measure(lambda: detect_districts(points), repeat, ops=count)
+    return results
+
+
+@benchmark("get_district_center")
+def bench_get_district_center(repeat, seed):
+    items = list(DISTRICT_BOUNDARIES.items())
+
+    def run():
+        for name, boundaries in items:
+            get_district_center(name, boundaries)
+
+    return {"get_district_center": measure(run, repeat, ops=len(items))}
+
+
+@benchmark("create_unit_positions")
+def bench_create_unit_positions(repeat, seed):
+    rng = random.Random(seed)
+    centers = [(rng.randint(0, 400), rng.randint(0, 600)) for _ in range(200)]
+    counts = [rng.randint(1, 12) for _ in centers]
+    spread = int(60 * display_scale(get_board_size()))
+
+    def run():
+        for center, count in zip(centers, counts):
+            create_unit_positions(center, count, spread=spread)
+
+    return {"create_unit_positions": measure(run, repeat, ops=len(centers))}
+
+
+@benchmark("draw_units_on_image")
+def bench_draw_units_on_image(repeat, seed):
+    rng = np.random.default_rng(seed)
+    display_img, _, scale_factor = load_board_image()
+    game_data = get_game_data()
+
+    results = {}
+    for unit_count in UNIT_COUNTS:
+        game_state = synthetic_game_state(unit_count, rng)
+        results[f"draw_units_on_image[{unit_count},cold]"] = measure(
+            lambda: draw_units_on_image(display_img, game_state, game_data, scale_factor),
+            repeat, setup=render.clear_render_caches,
+        )
+        draw_units_on_image(display_img, game_state, game_data, scale_factor)
+        results[f"draw_units_on_image[{unit_count},warm]"] = measure(
+            lambda: draw_units_on_image(display_img, game_state, game_data, scale_factor), repeat,
+        )
+    return results
+
+
+@benchmark("request_frame")
+def bench_request_frame(repeat, seed):
+    # Script-thread cost of a new unit map frame: rendering inline (as before) versus
+    # handing it to the background renderer, which returns the last frame at once
+    rng = np.random.default_rng(seed)
+    display_img, _, scale_factor = load_board_image()
+    game_data = get_game_data()
+    renderer = FrameRenderer()
+
+    def cold():
+        render.clear_render_caches()
+        encoder.clear_encoded_frames()
+        while renderer.pending("map"):
+            time.sleep(0.005)
+
+    results = {}
+    for unit_count in UNIT_COUNTS:
+        game_state = synthetic_game_state(unit_count, rng)
+
+        def request(inline):
+            snapshot = units_snapshot(game_state)
+            key = frame_key(display_img, snapshot, game_data, scale_factor)
+            draw = lambda: draw_units_on_image(display_img, snapshot, game_data, scale_factor)
+            if inline:
+                encoder.encode_frame(key, draw, "JPEG", 80)
+            else:
+                renderer.request("map", key, draw, "JPEG", 80)
+
+        results[f"request_frame[{unit_count},inline]"] = measure(lambda: request(True), repeat, setup=cold)
+        results[f"request_frame[{unit_count},background]"] = measure(lambda: request(False), repeat, setup=cold)
+    cold()
+    renderer.shutdown()
+    return results
+
+
+@benchmark("load_image")
+def bench_load_image(repeat, seed):
+    # Cold start reads the display level from the pre-scaled pyramid; building the
+    # pyramid is the one-off decode + LANCZOS resize every load used to pay
+    load_board_image()
+    with tempfile.TemporaryDirectory() as cache_dir:
+        return {
+            "load_image[cold]": measure(load_board_image, repeat, setup=assets._levels.clear),
+            "load_level[debug]": measure(lambda: assets.load_level("debug"), repeat, setup=assets._levels.clear),
+            "build_pyramid": measure(lambda: assets.build_pyramid(cache_dir=cache_dir), repeat),
+        }
+
+
+def environment():
+    return {
+        "timestamp": datetime.now(timezone.utc).isoformat(),
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "numpy": np.__version__,
+        "pillow": PIL.__version__,
+        "cpu_count": os.cpu_count(),
+    }
+
+
+def compare(results, previous):
+    """Print the median ratio (new / old) for every benchmark present in both runs"""
+    print(f"\n{'benchmark':<42} {'old (us)':>12} {'new (us)':>12} {'ratio':>7}")
+    for name, stats in results.items():
+        old = previous.get(name)
+        if not old:
+            continue
+        ratio = stats["median_us"] / old["median_us"] if old["median_us"] else float("inf")
+        flag = "  ⚠️" if ratio > 1.2 else ""
+        print(f"{name:<42} {old['median_us']:>12.2f} {stats['median_us']:>12.2f} {ratio:>6.2f}x{flag}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--output", default=DEFAULT_OUTPUT)
+    parser.add_argument("--compare", help="previous results file to compare against")
+    parser.add_argument("--only", nargs="+", help="run only benchmarks whose name contains one of these")
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+
+    results = {}
+    seeds = {}
+    for name, fn, seed in BENCHMARKS:
+        if args.only and not any(part in name for part in args.only):
+            continue
+        seeds[name] = seed
+        for case, stats in fn(args.repeat, seed).items():
+            results[case] = stats
+            print(f"{case:<42} median {stats['median_us']:>12.2f} us/op   min {stats['min_us']:>12.2f} us/op")
+
+    with open(args.output, "w") as f:
+        json.dump({"environment": environment(), "seeds": seeds, "results": results}, f, indent=2)
+    print(f"\n📄 Results written to {args.output}")
+
+    if args.compare:
+        with open(args.compare, "r") as f:
+            compare(results, json.load(f)["results"])
+
+
+if __name__ == "__main__":
+    main()
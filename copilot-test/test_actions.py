@@ -0,0 +1,100 @@
+import copy
+
+import pytest
+
+from datafiles import load_json
+from game_data import GAME_STATE_PATH
+from engine import (EventLog, GameEngine, Firefight, Netrun, IllegalActionError, load_rules,
+                    action_to_dict, action_from_dict)
+
+
+@pytest.fixture
+def engine():
+    return GameEngine(copy.deepcopy(load_json(GAME_STATE_PATH)), load_rules())
+
+
+def contested(engine):
+    """(district, gang, other gang) for two gangs sharing a district, moving units in if none do"""
+    for district_id, district in engine.state["districts"].items():
+        gangs = [g for g, units in district.get("units", {}).items() if units and g in engine.state["gangs"]]
+        if len(gangs) >= 2:
+            return district_id, gangs[0], gangs[1]
+    gangs = list(engine.state["gangs"])
+    district_id = next(iter(engine.state["districts"]))
+    district = engine.state["districts"][district_id]
+    district.setdefault("units", {})
+    for gang_id in gangs[:2]:
+        district["units"][gang_id] = ["solo"]
+    return district_id, gangs[0], gangs[1]
+
+
+def test_firefight_returns_losses_to_supply(engine):
+    district_id, gang, defender = contested(engine)
+    lost = (defender, engine.state["districts"][district_id]["units"][defender][0])
+    before = list(engine.state["districts"][district_id]["units"][defender])
+    supply = engine.state["gangs"][defender].get("units_available", {}).get(lost[1], 0)
+
+    engine.apply(Firefight(gang, district_id, defender, (lost,)))
+
+    remaining = engine.state["districts"][district_id]["units"].get(defender, [])
+    assert len(remaining) == len(before) - 1
+    assert engine.state["gangs"][defender]["units_available"][lost[1]] == supply + 1
+
+
+def test_firefight_rejects_units_not_in_the_district(engine):
+    district_id, gang, defender = contested(engine)
+    count = len(engine.state["districts"][district_id]["units"][defender])
+    unit_type = engine.state["districts"][district_id]["units"][defender][0]
+    with pytest.raises(IllegalActionError):
+        engine.apply(Firefight(gang, district_id, defender, ((defender, unit_type),) * (count + 1)))
+    with pytest.raises(IllegalActionError):
+        engine.apply(Firefight(gang, district_id, gang))
+
+
+def test_netrun_advances_token_and_collects_reward(engine):
+    gang = next(iter(engine.state["gangs"]))
+    track = engine.rules.data.netrun_track
+    engine.state["gangs"][gang]["net_token"] = 0
+    first = next(s for s in track if s.step == 1)
+    resources = dict(engine.state["gangs"][gang].get("resources", {}))
+
+    engine.apply(Netrun(gang, 1))
+
+    assert engine.state["gangs"][gang]["net_token"] == 1
+    for key, amount in first.reward.items():
+        assert engine.state["gangs"][gang]["resources"][key] == resources.get(key, 0) + amount
+    with pytest.raises(IllegalActionError):
+        engine.apply(Netrun(gang, 3))
+
+
+def test_failed_netrun_step_keeps_token(engine):
+    gang = next(iter(engine.state["gangs"]))
+    engine.state["gangs"][gang]["net_token"] = 0
+    step = next((s for s in engine.rules.data.netrun_track if s.netwatch_roll is not None), None)
+    if step is None:
+        pytest.skip("no netrun step has a Netwatch roll")
+    engine.state["gangs"][gang]["net_token"] = step.step - 1
+    engine.apply(Netrun(gang, step.step, passed=False))
+    assert engine.state["gangs"][gang]["net_token"] == step.step - 1
+
+
+def test_new_actions_round_trip_through_the_log_format():
+    for action in (Firefight("a", "Heywood", "b", (("b", "solo"), ("a", "netrunner"))),
+                   Firefight("a", "Heywood", "b"), Netrun("a", 2), Netrun("a", 3, False)):
+        assert action_from_dict(action_to_dict(action)) == action
+
+
+def test_snapshot_is_replaced_after_apply(tmp_path, engine):
+    district_id, gang, defender = contested(engine)
+    game_log = EventLog.open(str(tmp_path / "game.jsonl"), initial_state=engine.state)
+    before = game_log.snapshot()
+    assert game_log.snapshot() is before
+    assert before is not game_log.engine.state
+
+    units = list(before["districts"][district_id]["units"][defender])
+    game_log.apply(Firefight(gang, district_id, defender, ((defender, units[0]),)))
+
+    after = game_log.snapshot()
+    assert after is not before
+    assert after == game_log.engine.state
+    assert before["districts"][district_id]["units"][defender] == units
@@ -0,0 +1,70 @@
+import copy
+import random
+
+import pytest
+
+from datafiles import load_json
+from game_data import GAME_STATE_PATH
+from engine import GameEngine, Move, Reclaim, load_rules
+from engine.bitboard import Bitboard
+
+
+def random_states(count, seed, max_plies=60):
+    """Positions reached by random legal play from game_state.json"""
+    rules = load_rules()
+    start = load_json(GAME_STATE_PATH)
+    gangs = list(start["gangs"])
+    rng = random.Random(seed)
+    states = []
+    for _ in range(count):
+        engine = GameEngine(copy.deepcopy(start), rules)
+        for ply in range(rng.randint(0, max_plies)):
+            actions = engine.legal_actions(gangs[ply % len(gangs)])
+            playable = [a for a in actions if not isinstance(a, Reclaim)] or actions
+            if playable:
+                engine.apply(rng.choice(playable))
+        states.append(engine.state)
+    return states
+
+
+@pytest.fixture(scope="module")
+def states():
+    return random_states(150, seed=13)
+
+
+def test_round_trip_is_lossless(states):
+    rules = load_rules()
+    for state in states:
+        assert Bitboard.from_json(state, rules).to_json() == state
+
+
+def test_legal_moves_match_engine(states):
+    rules = load_rules()
+    for state in states:
+        board = Bitboard.from_json(state, rules)
+        for gang_id in state["gangs"]:
+            engine_moves = [a for a in GameEngine(copy.deepcopy(state), rules).legal_actions(gang_id)
+                            if isinstance(a, Move)]
+            board_moves = board.legal_moves(gang_id)
+            # Same moves, with every group's units in the same order
+            assert set(board_moves) == set(engine_moves)
+            assert len(board_moves) == len(engine_moves)
+
+
+def test_apply_move_matches_engine(states):
+    rules = load_rules()
+    rng = random.Random(7)
+    for state in states[:50]:
+        board = Bitboard.from_json(state, rules)
+        index = board.index
+        engine = GameEngine(copy.deepcopy(state), rules)
+        for gang_id in state["gangs"]:
+            singles = [m for m in board.legal_moves(gang_id) if len(m.units) == 1]
+            if not singles:
+                continue
+            move = rng.choice(singles)
+            engine.apply(move)
+            board.apply_move(index.gang_index[gang_id], index.disc_index[move.disc],
+                             index.district_index[move.source], index.district_index[move.target],
+                             index.unit_index[move.units[0]])
+        assert board.to_json() == engine.state
@@ -0,0 +1,21 @@
+from districts import DISTRICT_BOUNDARIES, detect_district, detect_district_exact, verify_label_raster, get_board_size
+
+# Every 7th pixel in both directions: ~1/50 of the board, a couple of seconds
+PARITY_STEP = 7
+
+
+def test_label_raster_matches_exact_detection():
+    assert verify_label_raster(step=PARITY_STEP) == []
+
+
+def test_district_vertices_detect_consistently():
+    # Pixels just inside each polygon's corners are where rasterisation and the
+    # exact test are most likely to disagree
+    width, height = get_board_size()
+    for name, polygon in DISTRICT_BOUNDARIES.items():
+        for x, y in polygon:
+            for dx in (-1, 0, 1):
+                for dy in (-1, 0, 1):
+                    px, py = x + dx, y + dy
+                    if 0 <= px < width and 0 <= py < height:
+                        assert detect_district(px, py) == detect_district_exact(px, py), (name, px, py)
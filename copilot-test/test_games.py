@@ -0,0 +1,46 @@
+import copy
+import os
+
+import pytest
+
+from datafiles import load_json
+from game_data import GAME_STATE_PATH
+from games import GameStore
+
+
+@pytest.fixture
+def store(tmp_path):
+    return GameStore(lambda: copy.deepcopy(load_json(GAME_STATE_PATH)), games_dir=str(tmp_path), max_games=3)
+
+
+def test_unknown_games_are_never_created(store, tmp_path):
+    assert not store.exists("nowhere")
+    with pytest.raises(KeyError):
+        store.get("nowhere")
+    assert os.listdir(tmp_path) == []
+    assert store.games() == []
+
+
+def test_created_games_are_shared(store, tmp_path):
+    log = store.create("table-1")
+    assert store.exists("table-1")
+    assert store.get("table-1") is log
+    assert os.path.exists(tmp_path / "table-1.jsonl")
+    with pytest.raises(ValueError):
+        store.create("table-1")
+
+
+def test_games_on_disk_reopen(store, tmp_path):
+    store.create("table-1")
+    reopened = GameStore(store.initial_state, games_dir=str(tmp_path))
+    assert reopened.exists("table-1")
+    assert reopened.get("table-1").current_ply() == 0
+
+
+def test_hosted_games_are_capped(store):
+    # The default game counts towards the cap
+    store.create("table-1")
+    store.create("table-2")
+    with pytest.raises(ValueError):
+        store.create("table-3")
+    assert not store.exists("table-3")
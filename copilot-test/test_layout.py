@@ -0,0 +1,20 @@
+import numpy as np
+
+from layout import get_layout, MAX_SLOTS, SLOT_RADIUS
+
+
+def test_markers_never_stack_past_the_slot_cap():
+    for name, slots in get_layout().items():
+        count = 3 * MAX_SLOTS
+        positions = np.array(slots.positions(count), dtype=float)
+        assert len(positions) == count
+        distance = np.hypot(*(positions[:, None, :] - positions[None, :, :]).transpose(2, 0, 1))
+        np.fill_diagonal(distance, np.inf)
+        assert distance.min() >= 2 * SLOT_RADIUS, name
+
+
+def test_growing_keeps_the_first_slots():
+    for slots in get_layout().values():
+        first = slots.positions(len(slots.slots))
+        slots.positions(2 * MAX_SLOTS)
+        assert slots.positions(len(first)) == first
@@ -0,0 +1,50 @@
+import threading
+
+import pytest
+
+import perf
+
+
+@pytest.fixture(autouse=True)
+def clean_perf(monkeypatch):
+    monkeypatch.setattr(perf, "_enabled", False)
+    monkeypatch.setattr(perf, "_enabled_until", 0.0)
+    perf.reset_spans()
+    yield
+    perf.reset_spans()
+
+
+def test_recording_lasts_for_the_lease(monkeypatch):
+    now = [100.0]
+    monkeypatch.setattr(perf.time, "monotonic", lambda: now[0])
+    assert not perf.is_enabled()
+    perf.enable_for(60)
+    now[0] += 30
+    # A shorter request never cuts another session's lease short
+    perf.enable_for(1)
+    now[0] += 20
+    assert perf.is_enabled()
+    now[0] += 20
+    assert not perf.is_enabled()
+
+
+def test_span_stats_while_other_threads_add_spans():
+    stop = threading.Event()
+
+    def record():
+        i = 0
+        while not stop.is_set():
+            perf.record(f"span-{i % 500}", 0.001)
+            i += 1
+
+    writers = [threading.Thread(target=record) for _ in range(3)]
+    for writer in writers:
+        writer.start()
+    try:
+        for _ in range(200):
+            perf.span_stats()
+    finally:
+        stop.set()
+        for writer in writers:
+            writer.join()
+    assert perf.span_stats()["span-0"]["count"] >= 1
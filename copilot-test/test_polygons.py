@@ -0,0 +1,85 @@
+import json
+
+import pytest
+
+from polygons import (dedupe_points, clean_ring, signed_area, build_compiled, load_compiled, source_digest,
+                      load_source, promote_draft, COMPILED_PATH, COMPILED_VERSION, SOURCE_PATH)
+
+SQUARE = [(0, 0), (100, 0), (100, 100), (0, 100)]
+
+
+def test_dedupe_drops_runs_and_the_closing_copy():
+    assert dedupe_points([(0, 0), (0, 0), (100, 0), (100, 0.2), (100, 100), (0, 100), (0, 0)]) == SQUARE
+
+
+def test_dedupe_keeps_repeats_inside_the_ring():
+    ring = [(0, 0), (100, 0), (100, 100), (0, 100), (50, 50), (0, 100)]
+    assert dedupe_points(ring) == ring
+
+
+def test_westbrook_closing_repeat():
+    # Westbrook ends by clicking near its first vertex and then on its second one again
+    raw = load_source()["Westbrook"]
+    assert raw[-1] == raw[1]
+    ring = clean_ring(raw)
+    assert len(set(ring)) == len(ring)
+    assert ring.count(raw[1]) == 1
+    assert signed_area(ring) == signed_area(clean_ring(raw[:-1]))
+
+
+@pytest.mark.parametrize("ring", [
+    SQUARE[:3] + [(0, 100), (50, 50), (0, 100)],
+    [(0, 0), (100, 0), (100, 100), (60, 100), (50, 140), (60, 100), (0, 100)],
+    SQUARE + SQUARE[:2],
+])
+def test_clean_ring_keeps_the_shape(ring):
+    assert signed_area(clean_ring(ring)) == 10000
+
+
+def test_bow_tie_keeps_the_larger_loop():
+    ring = clean_ring([(0, 0), (100, 100), (100, 0), (0, 120)])
+    assert len(ring) == 3
+    assert (0, 0) in ring and (0, 120) in ring
+    assert signed_area(ring) > 0
+
+
+def test_rings_are_clockwise_on_screen():
+    assert clean_ring(SQUARE) == SQUARE
+    reversed_ring = clean_ring(SQUARE[::-1])
+    assert sorted(reversed_ring) == sorted(SQUARE) and signed_area(reversed_ring) == 10000
+    for ring in load_compiled().values():
+        assert signed_area(ring) > 0
+
+
+def test_compiled_artifact_is_up_to_date():
+    with open(COMPILED_PATH) as f:
+        compiled = json.load(f)
+    assert compiled["version"] == COMPILED_VERSION
+    assert compiled["source_sha1"] == source_digest(SOURCE_PATH)
+
+
+def test_stale_artifact_is_rebuilt(tmp_path):
+    source, output = str(tmp_path / "source.json"), str(tmp_path / "compiled.json")
+    with open(source, "w") as f:
+        json.dump({"Square": SQUARE}, f)
+    build_compiled(source, output)
+    with open(source, "w") as f:
+        json.dump({"Square": SQUARE, "Triangle": [(0, 0), (50, 0), (0, 50)]}, f)
+    assert set(load_compiled(source, output)) == {"Square", "Triangle"}
+    with open(output) as f:
+        assert json.load(f)["source_sha1"] == source_digest(source)
+
+
+def test_promoting_the_draft_replaces_the_source(tmp_path):
+    draft, source, output = (str(tmp_path / name) for name in ("draft.json", "source.json", "compiled.json"))
+    with open(source, "w") as f:
+        json.dump({"Square": SQUARE}, f)
+    build_compiled(source, output)
+    with open(draft, "w") as f:
+        json.dump({"Square": SQUARE[::-1], "Empty": []}, f)
+
+    compiled = promote_draft(draft, source, output)
+
+    assert load_source(source) == {"Square": SQUARE[::-1], "Empty": []}
+    assert set(compiled["districts"]) == {"Square"}
+    assert compiled["source_sha1"] == source_digest(source)
@@ -0,0 +1,43 @@
+from PIL import ImageChops
+
+import render
+from assets import load_board_image
+from datafiles import load_json
+from game_data import GAME_STATE_PATH, get_game_data
+from render import LRUCache, draw_units_on_image, units_snapshot
+
+
+def test_lru_cache_lookups_keep_cached_none():
+    cache = LRUCache(2)
+    cache.put("a", None)
+    assert "a" in cache and len(cache) == 1
+    assert cache.get("a", render._MISSING) is None
+    cache.put("b", 1)
+    cache.put("c", 2)
+    assert "a" not in cache and len(cache) == 2
+    assert cache.get("a", render._MISSING) is render._MISSING
+
+
+class EvictingCache(LRUCache):
+    """Drops every entry just before each lookup, as if another render thread had evicted it"""
+
+    def get(self, key, default=None):
+        with self._lock:
+            self._data.clear()
+        return super().get(key, default)
+
+
+def test_layer_evicted_mid_lookup_is_redrawn(monkeypatch):
+    image, _, scale_factor = load_board_image()
+    game_data = get_game_data()
+    snapshot = units_snapshot(load_json(GAME_STATE_PATH))
+    render.clear_render_caches()
+    expected = draw_units_on_image(image, snapshot, game_data, scale_factor).copy()
+
+    monkeypatch.setattr(render, "_layer_cache", EvictingCache(render.LAYER_CACHE_SIZE))
+    # Never reuse a composited frame, so every draw looks its layers up again
+    monkeypatch.setattr(render, "_frame_cache", LRUCache(0))
+    for _ in range(2):
+        frame = draw_units_on_image(image, snapshot, game_data, scale_factor)
+        assert ImageChops.difference(frame.convert("RGB"), expected.convert("RGB")).getbbox() is None
+    render.clear_render_caches()
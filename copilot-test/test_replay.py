@@ -0,0 +1,32 @@
+import copy
+import threading
+
+from PIL import Image
+
+import render
+from datafiles import load_json
+from engine import EventLog
+from game_data import GAME_STATE_PATH
+from replay import export_replay, replay_states, replay_reader
+
+
+def test_export_finishes_while_a_render_thread_holds_the_base_lock(tmp_path):
+    game_log = EventLog.open(str(tmp_path / "game.jsonl"), initial_state=copy.deepcopy(load_json(GAME_STATE_PATH)))
+    path = str(tmp_path / "replay.gif")
+    result = {}
+
+    def export():
+        result["frames"] = export_replay(replay_states(game_log), path, workers=1)
+
+    # A worker forked now would inherit the lock held and wait on it forever
+    with render._base_lock:
+        exporter = threading.Thread(target=export, daemon=True)
+        exporter.start()
+        exporter.join(timeout=60)
+    assert not exporter.is_alive(), "export hung"
+    assert result["frames"] == 1
+
+    data = replay_reader(path)()
+    assert data.startswith(b"GIF89a")
+    with Image.open(path) as image:
+        assert image.size[0] > 0
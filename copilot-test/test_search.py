@@ -0,0 +1,26 @@
+import copy
+import threading
+
+import datafiles
+from datafiles import load_json
+from game_data import GAME_STATE_PATH
+from engine import SearchPool
+
+
+def test_search_workers_start_while_another_thread_holds_the_file_lock():
+    state = copy.deepcopy(load_json(GAME_STATE_PATH))
+    gang_id = next(iter(state["gangs"]))
+    result = {}
+
+    def search():
+        with SearchPool(workers=2) as pool:
+            result["hint"] = pool.search(state, gang_id, time_budget=0.2, seed=1)
+
+    # A worker forked now would inherit datafiles._lock held and block in load_rules()
+    with datafiles._lock:
+        searcher = threading.Thread(target=search, daemon=True)
+        searcher.start()
+        searcher.join(timeout=60)
+    assert not searcher.is_alive(), "search hung"
+    assert result["hint"].workers == 2
+    assert result["hint"].rollouts > 0
@@ -0,0 +1,154 @@
+import os
+import json
+import time
+import atexit
+import threading
+
+from perf import get_logger
+
+logger = get_logger("datafiles")
+
+_cache = {}
+_lock = threading.Lock()
+
+
+def file_signature(path):
+    """(mtime_ns, size) of a file, or None if it doesn't exist"""
+    try:
+        stat = os.stat(path)
+    except FileNotFoundError:
+        return None
+    return (stat.st_mtime_ns, stat.st_size)
+
+
+def load_json(path):
+    """Parsed JSON for a file, re-read only when its mtime or size changes
+
+    One parsed instance per file is shared by every caller in the process, so
+    treat the result as read-only (deepcopy before mutating).
+    """
+    path = os.path.abspath(path)
+    signature = file_signature(path)
+    entry = _cache.get(path)
+    if entry is not None and entry[0] == signature:
+        return entry[1]
+
+    with _lock:
+        entry = _cache.get(path)
+        if entry is not None and entry[0] == signature:
+            return entry[1]
+        with open(path, 'r') as f:
+            value = json.load(f)
+        # Stat again after reading: a write that lands mid-read gets picked up next call
+        if file_signature(path) == signature:
+            _cache[path] = (signature, value)
+        if entry is not None:
+            logger.info("🔄 Reloaded %s", os.path.basename(path))
+        return value
+
+
+def files_signature(paths):
+    """Combined signature of several files; changes when any of them does"""
+    return tuple(file_signature(path) for path in paths)
+
+
+def clear_file_cache():
+    with _lock:
+        _cache.clear()
+
+
+def write_json_atomic(path, value, indent=2):
+    """Write JSON to a temporary file next to path, then rename it over path
+
+    A crash or a concurrent reader never sees a half-written file.
+    """
+    tmp = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+    with open(tmp, 'w') as f:
+        json.dump(value, f, indent=indent)
+        f.write("\n")
+        f.flush()
+        os.fsync(f.fileno())
+    os.replace(tmp, path)
+
+
+class DebouncedWriter:
+    """Persists the latest submitted JSON value to a file from a background thread
+
+    submit() only swaps in the new value, so callers never wait on the disk.
+    The thread writes once no new value has arrived for `delay` seconds, so a
+    burst of edits becomes one atomic write. Pending values are flushed at exit.
+    """
+
+    def __init__(self, path, delay=1.0, indent=2):
+        self.path = path
+        self.delay = delay
+        self.indent = indent
+        self.writes = 0
+        self._value = None
+        self._has_value = False
+        # Submission number of the pending value and of the last one written
+        self._sequence = 0
+        self._written = 0
+        self._deadline = 0.0
+        self._condition = threading.Condition()
+        self._write_lock = threading.Lock()
+        self._thread = None
+        atexit.register(self.flush)
+
+    def submit(self, value):
+        """Queue value (treated as read-only from now on) to be written after the next pause"""
+        with self._condition:
+            self._value = value
+            self._has_value = True
+            self._sequence += 1
+            self._deadline = time.monotonic() + self.delay
+            if self._thread is None:
+                self._thread = threading.Thread(target=self._run, name="debounced-writer", daemon=True)
+                self._thread.start()
+            self._condition.notify()
+
+    def pending(self):
+        """The submitted value not yet on disk, or None"""
+        with self._condition:
+            return self._value if self._has_value else None
+
+    def flush(self):
+        """Write any pending value now"""
+        with self._condition:
+            value, sequence = self._take()
+        if sequence:
+            self._write(value, sequence)
+
+    def _take(self):
+        """(value, its submission number), or (None, 0) if nothing is pending"""
+        if not self._has_value:
+            return None, 0
+        value = self._value
+        self._value = None
+        self._has_value = False
+        return value, self._sequence
+
+    def _write(self, value, sequence):
+        with self._write_lock:
+            # flush() and the thread can race; never let an older value overwrite a newer one
+            if sequence <= self._written:
+                return
+            try:
+                write_json_atomic(self.path, value, self.indent)
+                self._written = sequence
+                self.writes += 1
+                logger.debug("💾 Saved %s", os.path.basename(self.path))
+            except OSError as e:
+                logger.error("❌ Could not save %s: %s", self.path, e)
+
+    def _run(self):
+        while True:
+            with self._condition:
+                while not self._has_value:
+                    self._condition.wait()
+                # Keep waiting while new values push the deadline back
+                while self._has_value and time.monotonic() < self._deadline:
+                    self._condition.wait(self._deadline - time.monotonic())
+                value, sequence = self._take()
+            if sequence:
+                self._write(value, sequence)
@@ -0,0 +1,260 @@
+import os
+import json
+import hashlib
+from matplotlib.path import Path
+import numpy as np
+from PIL import Image
+from perf import get_logger
+from polygons import load_compiled
+
+logger = get_logger("districts")
+
+BASE_DIR = os.path.dirname(os.path.abspath(__file__))
+BOARD_IMAGE_PATH = os.path.join(BASE_DIR, "board_with_overlay.png")
+LABEL_RASTER_PATH = os.path.join(BASE_DIR, "board_with_overlay.labels.npz")
+
+# District boundary polygons, compiled from the collector's district_boundaries.json
+# (cleaned and simplified by polygons.py, recompiled whenever the source changes)
+DISTRICT_BOUNDARIES = load_compiled()
+
+# Label value 0 means "no district"; district i is stored as i + 1
+NO_DISTRICT = 0
+
+# Loaded label rasters, keyed by boundary hash
+_label_rasters = {}
+
+# (boundaries, compiled paths) per boundary dict, reused by detect_districts
+_compiled_paths = {}
+
+# (boundaries, labels, names) per boundary dict, so a click skips re-hashing the polygons.
+# Boundary dicts are treated as read-only once loaded; pass a new dict to pick up edits.
+_raster_lookups = {}
+
+
+def point_in_polygon(point, polygon):
+    """Check if a point is inside a polygon using matplotlib's Path.contains_point"""
+    try:
+        path = Path(polygon)
+        return path.contains_point(point)
+    except Exception as e:
+        logger.error("❌ Error in polygon detection: %s", e)
+        return False
+
+
+def detect_district_exact(x, y, boundaries=None):
+    """Detect which district a point belongs to by testing every polygon"""
+    if boundaries is None:
+        boundaries = DISTRICT_BOUNDARIES
+    point = (x, y)
+
+    # Check each district
+    for district_name, polygon in boundaries.items():
+        if point_in_polygon(point, polygon):
+            return district_name
+
+    return None  # No district found
+
+
+def boundaries_hash(boundaries):
+    """Stable hash of a boundary set, used to tell when the label raster is stale"""
+    payload = json.dumps([[name, [list(p) for p in polygon]] for name, polygon in boundaries.items()])
+    return hashlib.sha1(payload.encode("utf-8")).hexdigest()
+
+
+def get_board_size(image_path=BOARD_IMAGE_PATH):
+    """Native (width, height) of the board image, read from the file header"""
+    with Image.open(image_path) as board_img:
+        return board_img.size
+
+
+def build_label_raster(boundaries, size):
+    """Rasterise the district polygons into a uint8 label mask of shape (height, width)
+
+    Every pixel (x, y) gets the label of the first district whose polygon
+    contains it, which is the same order detect_district_exact walks.
+    """
+    if len(boundaries) > 255:
+        raise ValueError(f"Label raster holds at most 255 districts, got {len(boundaries)}")
+
+    width, height = size
+    labels = np.zeros((height, width), dtype=np.uint8)
+
+    for index, polygon in enumerate(boundaries.values()):
+        if len(polygon) < 3:
+            continue
+        vertices = np.asarray(polygon, dtype=float)
+        path = Path(vertices)
+
+        # Only test pixels inside the polygon's bounding box
+        x0 = max(int(np.floor(vertices[:, 0].min())), 0)
+        x1 = min(int(np.ceil(vertices[:, 0].max())), width - 1)
+        y0 = max(int(np.floor(vertices[:, 1].min())), 0)
+        y1 = min(int(np.ceil(vertices[:, 1].max())), height - 1)
+        if x0 > x1 or y0 > y1:
+            continue
+
+        window = labels[y0:y1 + 1, x0:x1 + 1]
+        ys, xs = np.nonzero(window == NO_DISTRICT)
+        if len(xs) == 0:
+            continue
+
+        points = np.column_stack((xs + x0, ys + y0))
+        inside = path.contains_points(points)
+        window[ys[inside], xs[inside]] = index + 1
+
+    return labels
+
+
+def save_label_raster(labels, digest, path=LABEL_RASTER_PATH):
+    """Write the label mask and its boundary hash next to the board image"""
+    tmp_path = path + ".tmp"
+    with open(tmp_path, "wb") as f:
+        np.savez_compressed(f, labels=labels, digest=np.array(digest))
+    os.replace(tmp_path, path)
+
+
+def load_label_raster(boundaries=None, path=LABEL_RASTER_PATH, image_path=BOARD_IMAGE_PATH):
+    """Return the label mask for a boundary set, rebuilding it only when the polygons change"""
+    if boundaries is None:
+        boundaries = DISTRICT_BOUNDARIES
+    digest = boundaries_hash(boundaries)
+
+    if digest in _label_rasters:
+        return _label_rasters[digest]
+
+    labels = None
+    if os.path.exists(path):
+        try:
+            with np.load(path) as cached:
+                if str(cached["digest"]) == digest:
+                    labels = cached["labels"]
+        except Exception as e:
+            logger.warning("⚠️ Could not read label raster %s: %s", path, e)
+
+    if labels is None:
+        logger.info("🗺️ Building district label raster (%d districts)", len(boundaries))
+        labels = build_label_raster(boundaries, get_board_size(image_path))
+        try:
+            save_label_raster(labels, digest, path)
+        except OSError as e:
+            logger.warning("⚠️ Could not save label raster %s: %s", path, e)
+
+    _label_rasters[digest] = labels
+    return labels
+
+
+def _raster_lookup(boundaries):
+    """Label mask and district names for a boundary dict, memoised per dict"""
+    entry = _raster_lookups.get(id(boundaries))
+    if entry is None or entry[0] is not boundaries:
+        entry = (boundaries, load_label_raster(boundaries), list(boundaries))
+        _raster_lookups[id(boundaries)] = entry
+    return entry[1], entry[2]
+
+
+def detect_district(x, y, mode="raster", boundaries=None):
+    """Detect which district a point belongs to
+
+    mode="raster" reads the precomputed label mask (a single array lookup);
+    mode="exact" tests the polygons directly. Points that fall outside the
+    board or are not whole pixels always use the exact polygon test.
+    """
+    if boundaries is None:
+        boundaries = DISTRICT_BOUNDARIES
+
+    if mode == "raster" and x == int(x) and y == int(y):
+        try:
+            labels, names = _raster_lookup(boundaries)
+        except Exception as e:
+            logger.warning("⚠️ Label raster unavailable, using exact detection: %s", e)
+            labels = None
+
+        if labels is not None:
+            height, width = labels.shape
+            if 0 <= x < width and 0 <= y < height:
+                label = labels[int(y), int(x)]
+                if label == NO_DISTRICT:
+                    return None
+                return names[label - 1]
+
+    return detect_district_exact(x, y, boundaries)
+
+
+def compile_district_paths(boundaries=None):
+    """Build one Path and bounding box per district, memoised per boundary dict
+
+    Returns a list of (name, path, (xmin, ymin, xmax, ymax)) in boundary order.
+    """
+    if boundaries is None:
+        boundaries = DISTRICT_BOUNDARIES
+
+    entry = _compiled_paths.get(id(boundaries))
+    if entry is None or entry[0] is not boundaries:
+        compiled = []
+        for name, polygon in boundaries.items():
+            vertices = np.asarray(polygon, dtype=float).reshape(-1, 2)
+            if len(vertices) == 0:
+                compiled.append((name, None, None))
+                continue
+            bbox = (vertices[:, 0].min(), vertices[:, 1].min(), vertices[:, 0].max(), vertices[:, 1].max())
+            compiled.append((name, Path(vertices), bbox))
+        entry = (boundaries, compiled)
+        _compiled_paths[id(boundaries)] = entry
+    return entry[1]
+
+
+def detect_districts(points, boundaries=None):
+    """Classify an (N, 2) array of points in one pass
+
+    Returns an int array of district indices (position in the boundary dict),
+    with -1 where no district contains the point. Matches detect_district_exact
+    point for point: each point gets the first district that contains it.
+    """
+    points = np.asarray(points, dtype=float).reshape(-1, 2)
+    result = np.full(len(points), -1, dtype=np.int16)
+
+    for index, (name, path, bbox) in enumerate(compile_district_paths(boundaries)):
+        if path is None:
+            continue
+        xmin, ymin, xmax, ymax = bbox
+
+        # Bounding-box rejection, then skip points an earlier district already claimed
+        candidates = np.flatnonzero(
+            (result == -1)
+            & (points[:, 0] >= xmin) & (points[:, 0] <= xmax)
+            & (points[:, 1] >= ymin) & (points[:, 1] <= ymax)
+        )
+        if len(candidates) == 0:
+            continue
+
+        inside = path.contains_points(points[candidates])
+        result[candidates[inside]] = index
+
+    return result
+
+
+def district_names(boundaries=None):
+    """District names in index order, for decoding detect_districts results"""
+    if boundaries is None:
+        boundaries = DISTRICT_BOUNDARIES
+    return list(boundaries)
+
+
+def verify_label_raster(boundaries=None, step=1):
+    """Compare raster and exact detection over every pixel (or every step-th pixel)
+
+    Returns a list of (x, y, raster_result, exact_result) for each mismatch.
+    """
+    if boundaries is None:
+        boundaries = DISTRICT_BOUNDARIES
+    labels = load_label_raster(boundaries)
+    height, width = labels.shape
+
+    mismatches = []
+    for y in range(0, height, step):
+        for x in range(0, width, step):
+            raster_result = detect_district(x, y, mode="raster", boundaries=boundaries)
+            exact_result = detect_district_exact(x, y, boundaries)
+            if raster_result != exact_result:
+                mismatches.append((x, y, raster_result, exact_result))
+    return mismatches
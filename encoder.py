@@ -0,0 +1,110 @@
+import io
+import os
+import base64
+import logging
+
+from render import LRUCache
+from perf import get_logger, log_sampled
+
+logger = get_logger("encoder")
+
+# Wire format per quality preset: (PIL format, quality). Lossy presets cut a display
+# frame from ~720 KB (the component's uncompressed PNG) to a few tens of KB.
+FRAME_PRESETS = {
+    "lossless": ("PNG", None),
+    "high": ("WEBP", 90),
+    "balanced": ("WEBP", 80),
+    "compact": ("JPEG", 70),
+}
+DEFAULT_PRESET = os.environ.get("NIGHTCITY_FRAME_QUALITY", "balanced")
+
+# Encoded frames kept per process (entries, not bytes)
+ENCODED_CACHE_SIZE = 32
+
+MIME_TYPES = {"PNG": "image/png", "JPEG": "image/jpeg", "WEBP": "image/webp"}
+
+_encoded = LRUCache(ENCODED_CACHE_SIZE)
+
+
+class EncodedFrame:
+    """Encoded image bytes that can stand in for a PIL image where only save() is called
+
+    streamlit_image_coordinates encodes anything with a save() method, so
+    passing one of these hands it the cached bytes instead of re-encoding.
+    """
+    __slots__ = ('data', 'format', 'size')
+
+    def __init__(self, data, format, size):
+        self.data = data
+        self.format = format
+        self.size = size
+
+    @property
+    def mime_type(self):
+        return MIME_TYPES[self.format]
+
+    def save(self, fp, format=None, **kwargs):
+        fp.write(self.data)
+
+    def data_url(self):
+        return f"data:{self.mime_type};base64," + base64.b64encode(self.data).decode("ascii")
+
+
+def preset_format(preset):
+    """(format, quality) for a preset name, falling back to lossless for unknown names"""
+    return FRAME_PRESETS.get(preset, FRAME_PRESETS["lossless"])
+
+
+def streamlit_format(format, quality):
+    """Format to use for Streamlit elements
+
+    streamlit_image_coordinates only labels PNG and JPEG, and st.image
+    re-encodes anything else on every call, so WebP presets become JPEG at the
+    same quality there. WebP is still used for data URLs (EncodedFrame.data_url).
+    """
+    if format == "WEBP":
+        return "JPEG", quality
+    return format, quality
+
+
+def encode_image(image, format="PNG", quality=None):
+    """Encode a PIL image to bytes"""
+    buffer = io.BytesIO()
+    if format == "PNG":
+        image.save(buffer, format="PNG", compress_level=6)
+    else:
+        if image.mode not in ("RGB", "L"):
+            image = image.convert("RGB")
+        image.save(buffer, format=format, quality=quality)
+    return buffer.getvalue()
+
+
+def encode_frame(key, render, format="PNG", quality=None):
+    """Encoded frame for a content key, rendering and encoding only on a cache miss
+
+    key must change whenever the rendered pixels would (e.g. render.frame_key
+    plus any display toggles); render() is called with no arguments and must
+    return the PIL image to encode.
+    """
+    cache_key = (key, format, quality)
+    frame = _encoded.get(cache_key)
+    if frame is None:
+        image = render()
+        frame = EncodedFrame(encode_image(image, format, quality), format, image.size)
+        _encoded.put(cache_key, frame)
+        log_sampled(logger, logging.DEBUG, "🗜️ Encoded %dx%d frame as %s q=%s: %d bytes",
+                    image.size[0], image.size[1], format, quality, len(frame.data))
+    return frame
+
+
+def cached_frame(key, format="PNG", quality=None):
+    """The encoded frame for a content key if it's already cached, else None (never renders)"""
+    return _encoded.get((key, format, quality))
+
+
+def encoded_cache_stats():
+    return {"entries": len(_encoded), "hits": _encoded.hits, "misses": _encoded.misses}
+
+
+def clear_encoded_frames():
+    _encoded.clear()
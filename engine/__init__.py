@@ -0,0 +1,28 @@
+"""Headless Night City rules engine
+
+Pure Python: loads the rules from the JSON data files and applies actions
+to an in-memory game state, so simulations, tests and batch jobs can run
+without Streamlit.
+"""
+from engine.actions import IllegalActionError, Move, Upgrade, Build, Reclaim, Firefight, Netrun, format_action, action_to_dict, action_from_dict
+from engine.rules import Rules, load_rules, HIDEOUT_COST
+from engine.game import GameEngine, update_control, empty_district
+from engine.firefight import FirefightOdds, firefight_odds, district_firefights, load_combat_hands
+from engine.netrun import NetrunOutcome, NetrunTables, get_netrun_tables, simulate_netrun
+from engine.search import SearchPool, SearchResult, choose_action, evaluate
+from engine.eventlog import EventLog, GAME_LOG_PATH, SNAPSHOT_EVERY
+from engine.bitboard import Bitboard, BoardIndex, board_index, batch_move_triples
+from engine.distances import DistanceTable, get_distance_table, all_pairs_distances, movement_ranges
+
+__all__ = [
+    "GameEngine", "Rules", "load_rules", "HIDEOUT_COST",
+    "IllegalActionError", "Move", "Upgrade", "Build", "Reclaim", "Firefight", "Netrun", "format_action",
+    "action_to_dict", "action_from_dict",
+    "update_control", "empty_district",
+    "FirefightOdds", "firefight_odds", "district_firefights", "load_combat_hands",
+    "NetrunOutcome", "NetrunTables", "get_netrun_tables", "simulate_netrun",
+    "SearchPool", "SearchResult", "choose_action", "evaluate",
+    "EventLog", "GAME_LOG_PATH", "SNAPSHOT_EVERY",
+    "Bitboard", "BoardIndex", "board_index", "batch_move_triples",
+    "DistanceTable", "get_distance_table", "all_pairs_distances", "movement_ranges",
+]
@@ -0,0 +1,84 @@
+from collections import namedtuple
+
+
+class IllegalActionError(ValueError):
+    """Raised when an action breaks the rules for the current game state"""
+
+
+# Move units of the disc's classes from a district to an adjacent one.
+# as_disc names the previously used disc a Wild disc is copying.
+Move = namedtuple("Move", "gang disc source target units as_disc", defaults=(None,))
+
+# Gain an upgrade combat card (draw 2, keep 1: card is the one kept)
+Upgrade = namedtuple("Upgrade", "gang disc card as_disc", defaults=(None,))
+
+# Build a hideout in a district where the gang has presence
+Build = namedtuple("Build", "gang disc district as_disc", defaults=(None,))
+
+# Take every used action disc back into the gang's hand
+Reclaim = namedtuple("Reclaim", "gang")
+
+# Outcome of a firefight as resolved at the table: losses are the (gang, unit type)
+# pairs killed in the district, and they go back to their owners' supply
+Firefight = namedtuple("Firefight", "gang district defender losses", defaults=((),))
+
+# One step of a netrun: the gang's net token moves on to `step` and collects its
+# reward. passed is False when that step's Netwatch roll failed; the token then
+# stays put and the run ends
+Netrun = namedtuple("Netrun", "gang step passed", defaults=(True,))
+
+
+def format_action(action, game_data=None):
+    """Short human readable description of an action"""
+    gang = action.gang
+    if game_data is not None:
+        gang = game_data.gang_name(action.gang) or action.gang
+
+    disc = getattr(action, "disc", None)
+    if getattr(action, "as_disc", None):
+        disc = f"wild as {action.as_disc}"
+
+    if isinstance(action, Move):
+        units = ", ".join(action.units)
+        return f"{gang} [{disc}]: move {units} from {action.source} to {action.target}"
+    if isinstance(action, Upgrade):
+        return f"{gang} [{disc}]: keep upgrade {action.card}"
+    if isinstance(action, Build):
+        return f"{gang} [{disc}]: build hideout in {action.district}"
+    if isinstance(action, Reclaim):
+        return f"{gang}: reclaim used action discs"
+    if isinstance(action, Firefight):
+        defender = action.defender
+        if game_data is not None:
+            defender = game_data.gang_name(action.defender) or action.defender
+        lost = ", ".join(f"{g} {u}" for g, u in action.losses) or "no units"
+        return f"{gang}: firefight against {defender} in {action.district}, lost {lost}"
+    if isinstance(action, Netrun):
+        return f"{gang}: netrun step {action.step}" + ("" if action.passed else " (caught by Netwatch)")
+    return repr(action)
+
+
+ACTION_TYPES = {cls.__name__: cls for cls in (Move, Upgrade, Build, Reclaim, Firefight, Netrun)}
+
+
+def action_to_dict(action):
+    """JSON-friendly dict for an action: {"type": "Move", "gang": ..., ...}"""
+    data = {"type": type(action).__name__}
+    for field, value in action._asdict().items():
+        if field == "losses":
+            value = [list(loss) for loss in value]
+        data[field] = list(value) if isinstance(value, tuple) else value
+    return data
+
+
+def action_from_dict(data):
+    """Inverse of action_to_dict"""
+    fields = dict(data)
+    cls = ACTION_TYPES.get(fields.pop("type", None))
+    if cls is None:
+        raise ValueError(f"Unknown action type in {data!r}")
+    if "units" in fields:
+        fields["units"] = tuple(fields["units"])
+    if "losses" in fields:
+        fields["losses"] = tuple(tuple(loss) for loss in fields["losses"])
+    return cls(**fields)
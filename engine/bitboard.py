@@ -0,0 +1,372 @@
+import copy
+import numpy as np
+
+from engine.actions import Move
+from engine.rules import load_rules
+
+
+class BoardIndex:
+    """Fixed integer indexes for districts, gangs, unit types and discs, plus adjacency bitmasks
+
+    Built once per Rules; every Bitboard made from the same rules shares it.
+    """
+
+    def __init__(self, rules):
+        self.rules = rules
+        data = rules.data
+
+        self.districts = list(rules.adjacency)
+        self.district_index = {name: i for i, name in enumerate(self.districts)}
+        self.gangs = list(data.gangs)
+        self.gang_index = {gang_id: i for i, gang_id in enumerate(self.gangs)}
+        self.unit_types = list(data.units)
+        self.unit_index = {unit_id: i for i, unit_id in enumerate(self.unit_types)}
+        self.discs = list(data.discs)
+        self.disc_index = {disc: i for i, disc in enumerate(self.discs)}
+
+        # adjacency[i] has bit j set when district j borders district i
+        self.adjacency = [0] * len(self.districts)
+        self.adjacency_matrix = np.zeros((len(self.districts), len(self.districts)), dtype=bool)
+        for name, neighbours in rules.adjacency.items():
+            i = self.district_index[name]
+            for neighbour in neighbours:
+                j = self.district_index[neighbour]
+                self.adjacency[i] |= 1 << j
+                self.adjacency_matrix[i, j] = True
+
+        # Unit types each disc moves, as a boolean vector over unit types
+        self.disc_moves = {}
+        for disc_type, disc in data.discs.items():
+            self.disc_moves[disc_type] = np.array(
+                [data.units[u].unit_class in disc.moves_classes for u in self.unit_types], dtype=bool)
+
+        # Directed edge list for the batched generator
+        pairs = np.argwhere(self.adjacency_matrix)
+        self.edge_sources = pairs[:, 0]
+        self.edge_targets = pairs[:, 1]
+
+        # Units that can't end a move alone (drones) vs units that can escort them
+        self.needs_escort = np.array([u in rules.must_end_with_friendly for u in self.unit_types], dtype=bool)
+        self.escorts = ~self.needs_escort
+        self.escort_types = tuple(int(u) for u in np.flatnonzero(self.escorts))
+        self.movable_types = {disc_type: tuple(int(u) for u in np.flatnonzero(movable))
+                              for disc_type, movable in self.disc_moves.items()}
+        self.action_limits = {disc_type: disc.action_limit for disc_type, disc in data.discs.items()}
+
+
+_indexes = {}
+
+
+def board_index(rules=None):
+    """Shared BoardIndex for a Rules object"""
+    if rules is None:
+        rules = load_rules()
+    entry = _indexes.get(id(rules))
+    if entry is None or entry[0] is not rules:
+        entry = (rules, BoardIndex(rules))
+        _indexes[id(rules)] = entry
+    return entry[1]
+
+
+def iter_bits(mask):
+    """Indexes of the set bits in an int, lowest first"""
+    while mask:
+        low = mask & -mask
+        yield low.bit_length() - 1
+        mask ^= low
+
+
+class Bitboard:
+    """Compact game state: bitmasks per gang plus a (district, gang, unit type) count array
+
+    presence[g] / hideouts[g] have bit d set when gang g has units / a hideout
+    in district d, and unit_masks[g][u] when it has a unit of type u there.
+    counts[d, g, u] is how many units of type u gang g has in district d. Everything the rules don't need to search over (resources,
+    agendas, round, phase...) is carried verbatim in `extra`.
+
+    The masks and counts are unordered, so the state's list order is kept
+    alongside them. unit_lists[d] maps each gang index to its unit type
+    indexes in list order, in the district's gang order. disc_lists[g] holds
+    the (available, used) disc indexes in list order. presence_lists[d] is
+    the district's presence list when it isn't simply the gangs with units,
+    else None. apply_move updates these the way GameEngine does, so to_json()
+    reproduces the engine's dict exactly and group moves list their units in
+    the engine's order.
+    """
+    __slots__ = ('index', 'counts', 'presence', 'unit_masks', 'hideouts', 'dominant',
+                 'discs_available', 'discs_used', 'listed', 'extra',
+                 'unit_lists', 'presence_lists', 'disc_lists')
+
+    def __init__(self, index, counts, presence, unit_masks, hideouts, dominant, discs_available, discs_used,
+                 listed, extra, unit_lists, presence_lists, disc_lists):
+        self.index = index
+        self.counts = counts
+        self.presence = presence
+        self.unit_masks = unit_masks
+        self.hideouts = hideouts
+        self.dominant = dominant
+        self.discs_available = discs_available
+        self.discs_used = discs_used
+        self.listed = listed
+        self.extra = extra
+        self.unit_lists = unit_lists
+        self.presence_lists = presence_lists
+        self.disc_lists = disc_lists
+
+    @classmethod
+    def from_json(cls, state, rules=None):
+        """Build a bitboard from a game_state.json dict"""
+        index = board_index(rules)
+        n_districts, n_gangs, n_units = len(index.districts), len(index.gangs), len(index.unit_types)
+
+        counts = np.zeros((n_districts, n_gangs, n_units), dtype=np.int8)
+        presence = [0] * n_gangs
+        unit_masks = [[0] * n_units for _ in range(n_gangs)]
+        hideouts = [0] * n_gangs
+        dominant = np.full(n_districts, -1, dtype=np.int8)
+        listed = 0
+        district_extra = {}
+        unit_lists = [{} for _ in range(n_districts)]
+        presence_lists = [None] * n_districts
+
+        for name, district in state.get("districts", {}).items():
+            if name not in index.district_index:
+                raise ValueError(f"Unknown district {name!r}")
+            d = index.district_index[name]
+            listed |= 1 << d
+            for gang_id, units in district.get("units", {}).items():
+                g = index.gang_index[gang_id]
+                unit_lists[d][g] = [index.unit_index[unit_type] for unit_type in units]
+                for u in unit_lists[d][g]:
+                    counts[d, g, u] += 1
+                    unit_masks[g][u] |= 1 << d
+                if units:
+                    presence[g] |= 1 << d
+            if "presence" in district and district["presence"] != [gang_id for gang_id, units in
+                                                                   district.get("units", {}).items() if units]:
+                presence_lists[d] = [index.gang_index[gang_id] for gang_id in district["presence"]]
+            for gang_id in district.get("hideouts", []):
+                hideouts[index.gang_index[gang_id]] |= 1 << d
+            if district.get("dominant") is not None:
+                dominant[d] = index.gang_index[district["dominant"]]
+            # Hideouts never change on the bitboard, so their list is carried as is
+            known = {"units", "presence", "dominant"}
+            district_extra[name] = {k: copy.deepcopy(v) for k, v in district.items() if k not in known}
+
+        discs_available = [0] * n_gangs
+        discs_used = [0] * n_gangs
+        disc_lists = [([], []) for _ in range(n_gangs)]
+        for gang_id, gang in state.get("gangs", {}).items():
+            g = index.gang_index[gang_id]
+            available, used = disc_lists[g]
+            for disc in gang.get("action_discs_available", []):
+                available.append(index.disc_index[disc])
+                discs_available[g] |= 1 << index.disc_index[disc]
+            for disc in gang.get("action_discs_used", []):
+                used.append(index.disc_index[disc])
+                discs_used[g] |= 1 << index.disc_index[disc]
+
+        extra = {k: copy.deepcopy(v) for k, v in state.items() if k != "districts"}
+        extra["districts"] = district_extra
+        extra["district_order"] = [name for name in state.get("districts", {})]
+        return cls(index, counts, presence, unit_masks, hideouts, dominant, discs_available, discs_used, listed, extra,
+                   unit_lists, presence_lists, disc_lists)
+
+    def to_json(self):
+        """Convert back to the game_state.json dict shape"""
+        index = self.index
+        state = {k: copy.deepcopy(v) for k, v in self.extra.items() if k not in ("districts", "district_order")}
+
+        order = list(self.extra["district_order"])
+        order += [name for d, name in enumerate(index.districts)
+                  if name not in order and (self.listed >> d & 1 or self.counts[d].any())]
+
+        districts = {}
+        for name in order:
+            d = index.district_index[name]
+            units = {index.gangs[g]: [index.unit_types[u] for u in unit_list]
+                     for g, unit_list in self.unit_lists[d].items()}
+            presence = self.presence_lists[d]
+            district = {
+                "units": units,
+                "hideouts": [index.gangs[g] for g in range(len(index.gangs)) if self.hideouts[g] >> d & 1],
+                "presence": ([index.gangs[g] for g in presence] if presence is not None
+                             else [gang_id for gang_id, unit_list in units.items() if unit_list]),
+                "dominant": index.gangs[self.dominant[d]] if self.dominant[d] >= 0 else None,
+            }
+            district.update(copy.deepcopy(self.extra["districts"].get(name, {})))
+            districts[name] = district
+        state["districts"] = districts
+
+        for gang_id, gang in state.get("gangs", {}).items():
+            g = index.gang_index[gang_id]
+            available, used = self.disc_lists[g]
+            gang["action_discs_available"] = [index.discs[i] for i in available]
+            gang["action_discs_used"] = [index.discs[i] for i in used]
+        return state
+
+    def copy(self):
+        return Bitboard(self.index, self.counts.copy(), list(self.presence),
+                        [list(masks) for masks in self.unit_masks], list(self.hideouts),
+                        self.dominant.copy(), list(self.discs_available), list(self.discs_used),
+                        self.listed, self.extra,
+                        [{g: list(units) for g, units in lists.items()} for lists in self.unit_lists],
+                        list(self.presence_lists), [(list(a), list(u)) for a, u in self.disc_lists])
+
+    # --- move generation -----------------------------------------------
+
+    def playable_discs(self, g):
+        """(disc, as_disc) pairs for gang index g, matching GameEngine.playable_discs"""
+        index = self.index
+        playable = []
+        for i in iter_bits(self.discs_available[g]):
+            disc = index.discs[i]
+            if disc == "wild":
+                for j in iter_bits(self.discs_used[g]):
+                    if index.discs[j] != "wild":
+                        playable.append(("wild", index.discs[j]))
+            else:
+                playable.append((disc, None))
+        return playable
+
+    def escorted(self, g):
+        """Districts where gang g has a unit that a drone may end its move with"""
+        masks = self.unit_masks[g]
+        escorted = 0
+        for u in self.index.escort_types:
+            escorted |= masks[u]
+        return escorted
+
+    def move_triples(self, g, disc_type):
+        """(source, target, unit type) index triples for single-unit moves with one disc
+
+        Sources come from the gang's per-unit-type bits, targets from the
+        adjacency masks; drones are only allowed into districts where the
+        gang already has an escorting unit.
+        """
+        index = self.index
+        adjacency = index.adjacency
+        masks = self.unit_masks[g]
+        escorted = None
+
+        triples = []
+        for u in index.movable_types.get(disc_type, ()):
+            if not masks[u]:
+                continue
+            if index.needs_escort[u] and escorted is None:
+                escorted = self.escorted(g)
+            for source in iter_bits(masks[u]):
+                targets = adjacency[source] & escorted if index.needs_escort[u] else adjacency[source]
+                for target in iter_bits(targets):
+                    triples.append((source, target, u))
+        return triples
+
+    def group_moves(self, g, disc_type):
+        """(source, target, unit types) for moving a district's whole movable group, as GameEngine offers"""
+        index = self.index
+        movable = index.movable_types.get(disc_type, ())
+        masks = self.unit_masks[g]
+        # A group needs two movable units: either two types in one district or two of one type
+        sources = 0
+        for u in movable:
+            sources |= masks[u]
+        if not sources:
+            return []
+
+        limit = index.action_limits.get(disc_type)
+        groups = []
+        for source in iter_bits(sources):
+            types = [u for u in movable if masks[u] >> source & 1]
+            size = sum(int(self.counts[source, g, u]) for u in types)
+            if size < 2 or (limit is not None and size > limit):
+                continue
+            # The group lists its units in the state's order, as GameEngine does
+            units = tuple(index.unit_types[u] for u in self.unit_lists[source][g] if u in types)
+            targets = index.adjacency[source]
+            if not any(not index.needs_escort[u] for u in types):
+                targets &= self.escorted(g)
+            for target in iter_bits(targets):
+                groups.append((source, target, units))
+        return groups
+
+    def legal_moves(self, gang_id):
+        """Move actions for a gang in the engine's Move format: the same set GameEngine.legal_actions offers"""
+        index = self.index
+        g = index.gang_index[gang_id]
+        moves = []
+        for disc, as_disc in self.playable_discs(g):
+            effective = as_disc or disc
+            for source, target, u in self.move_triples(g, effective):
+                moves.append(Move(gang_id, disc, index.districts[source], index.districts[target],
+                                  (index.unit_types[u],), as_disc))
+            for source, target, units in self.group_moves(g, effective):
+                moves.append(Move(gang_id, disc, index.districts[source], index.districts[target], units, as_disc))
+        return moves
+
+    def apply_move(self, g, disc_index, source, target, u):
+        """Apply a single-unit move by indexes, updating counts, presence bits, discs and control"""
+        counts = self.counts
+        counts[source, g, u] -= 1
+        counts[target, g, u] += 1
+        if not counts[source, g, u]:
+            self.unit_masks[g][u] &= ~(1 << source)
+            if not counts[source, g].any():
+                self.presence[g] &= ~(1 << source)
+        self.unit_masks[g][u] |= 1 << target
+        self.presence[g] |= 1 << target
+        self.listed |= (1 << source) | (1 << target)
+
+        # Same list edits as GameEngine._move_units and _spend_disc
+        source_units = self.unit_lists[source][g]
+        source_units.remove(u)
+        if not source_units:
+            del self.unit_lists[source][g]
+        self.unit_lists[target].setdefault(g, []).append(u)
+        self.presence_lists[source] = self.presence_lists[target] = None
+
+        self.discs_available[g] &= ~(1 << disc_index)
+        self.discs_used[g] |= 1 << disc_index
+        available, used = self.disc_lists[g]
+        available.remove(disc_index)
+        used.append(disc_index)
+        self._update_dominant(source)
+        self._update_dominant(target)
+
+    def _update_dominant(self, d):
+        """Same rule as engine.update_control: most units wins, ties keep the incumbent if tied"""
+        totals = self.counts[d].sum(axis=1)
+        best = totals.max()
+        if best == 0:
+            self.dominant[d] = -1
+            return
+        leaders = np.flatnonzero(totals == best)
+        if len(leaders) == 1:
+            self.dominant[d] = leaders[0]
+        elif self.dominant[d] not in leaders:
+            self.dominant[d] = -1
+
+
+def batch_move_triples(counts, g, disc_type, index=None):
+    """Vectorised single-unit move generation over a batch of states
+
+    counts has shape (states, districts, gangs, unit types). Returns four
+    arrays (state, source, target, unit type), one entry per legal move of
+    gang g with the given disc, using the same rules as Bitboard.move_triples.
+    """
+    if index is None:
+        index = board_index()
+    movable = index.disc_moves.get(disc_type)
+    if movable is None or not movable.any():
+        empty = np.empty(0, dtype=np.intp)
+        return empty, empty, empty, empty
+
+    gang_counts = counts[:, :, g, :]                                    # (B, D, U)
+    has_unit = (gang_counts > 0) & movable                              # (B, D, U)
+    escorted = (gang_counts[:, :, index.escorts] > 0).any(axis=2)      # (B, D)
+
+    # (B, edge, unit): unit present at the edge's source, and drones only
+    # where an escort already stands at its target
+    valid = has_unit[:, index.edge_sources, :]
+    valid &= ~index.needs_escort[None, None, :] | escorted[:, index.edge_targets, None]
+    states, edges, units = np.nonzero(valid)
+    return states, index.edge_sources[edges], index.edge_targets[edges], units
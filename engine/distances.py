@@ -0,0 +1,152 @@
+import numpy as np
+
+from engine.rules import load_rules
+
+
+def all_pairs_distances(names, adjacency):
+    """Shortest path length in moves between every pair of districts, -1 where unreachable
+
+    Breadth-first search from every district at once: each district keeps a
+    packed bit row of the sources that have reached it, and one level ORs the
+    frontier rows along every edge, so the cost is edges x districts/64 words
+    per level rather than a Python BFS per source.
+    """
+    n = len(names)
+    index = {name: i for i, name in enumerate(names)}
+    distances = np.full((n, n), -1, dtype=np.int16)
+    np.fill_diagonal(distances, 0)
+    if n == 0:
+        return distances
+
+    edges = sorted((index[target], index[source])
+                   for source, neighbours in adjacency.items() if source in index
+                   for target in neighbours if target in index)
+    if not edges:
+        return distances
+    edges = np.array(edges)
+    targets, sources = edges[:, 0], edges[:, 1]
+    nodes, starts = np.unique(targets, return_index=True)
+
+    # reached[v] has bit s set once the search from source s has reached v, packed
+    # into 64-bit words (bytes in packbits order, so unpacking a word's bytes gives bits s..s+63)
+    packed = np.packbits(np.eye(n, dtype=bool), axis=1)
+    reached = np.zeros((n, -(-packed.shape[1] // 8) * 8), dtype=np.uint8)
+    reached[:, :packed.shape[1]] = packed
+    reached = reached.view(np.uint64)
+    frontier = reached.copy()
+    # The level each pair was reached at, one packed bit-plane per bit of the level,
+    # so nothing is unpacked until the search is done
+    planes = []
+    level = 0
+    while True:
+        level += 1
+        arrived = np.zeros_like(frontier)
+        arrived[nodes] = np.bitwise_or.reduceat(frontier[sources], starts, axis=0)
+        arrived &= ~reached
+        if not arrived.any():
+            break
+        reached |= arrived
+        if level.bit_length() > len(planes):
+            planes.append(np.zeros_like(reached))
+        for bit, plane in enumerate(planes):
+            if level >> bit & 1:
+                plane |= arrived
+        frontier = arrived
+
+    def unpack(words):
+        return np.unpackbits(words.view(np.uint8), axis=1, count=n).T
+
+    distances = np.zeros((n, n), dtype=np.int16)
+    for bit, plane in enumerate(planes):
+        distances += unpack(plane).astype(np.int16) << bit
+    distances[unpack(reached) == 0] = -1
+    return distances
+
+
+def movement_ranges(game_data):
+    """Moves per round for each movement type in units.json
+
+    Each disc that moves a unit class is one step, and the wild disc can
+    repeat one of them, so a movement type's range is the number of discs
+    that move any of its unit classes, plus one if there is a wild disc.
+    """
+    classes = {}
+    for unit in game_data.units.values():
+        if unit.movement_type:
+            classes.setdefault(unit.movement_type, set()).add(unit.unit_class)
+
+    wild = 1 if "wild" in game_data.discs else 0
+    ranges = {}
+    for movement_type, unit_classes in classes.items():
+        discs = sum(1 for disc in game_data.discs.values() if unit_classes & set(disc.moves_classes))
+        ranges[movement_type] = discs + wild if discs else 0
+    return ranges
+
+
+class DistanceTable:
+    """All-pairs shortest paths over the district graph plus reachability per movement type
+
+    Built once per Rules; movement-range questions from the UI and the AI are
+    lookups into these arrays instead of graph searches.
+    """
+
+    def __init__(self, rules):
+        self.rules = rules
+        self.names = list(rules.adjacency)
+        self.index = {name: i for i, name in enumerate(self.names)}
+        self.distances = all_pairs_distances(self.names, rules.adjacency)
+
+        self.ranges = movement_ranges(rules.data)
+        # reach[movement_type][i, j] is True when a unit of that type can get from i to j in one round
+        self.reach = {movement_type: (self.distances > 0) & (self.distances <= steps)
+                      for movement_type, steps in self.ranges.items()}
+        self.unit_movement = {unit.id: unit.movement_type for unit in rules.data.units.values()}
+
+    def distance(self, source, target):
+        """Moves needed from source to target, or None if target can't be reached"""
+        d = int(self.distances[self.index[source], self.index[target]])
+        return d if d >= 0 else None
+
+    def within(self, source, steps):
+        """Districts (other than source) at most `steps` moves away, nearest first"""
+        row = self.distances[self.index[source]]
+        found = np.flatnonzero((row > 0) & (row <= steps))
+        return [self.names[i] for i in found[np.argsort(row[found], kind="stable")]]
+
+    def reachable(self, movement_type, source):
+        """Districts a unit with this movement type can reach from source in one round"""
+        table = self.reach.get(movement_type)
+        if table is None:
+            return []
+        return [self.names[i] for i in np.flatnonzero(table[self.index[source]])]
+
+    def unit_reach(self, unit_type, source):
+        """reachable() for a unit id from units.json"""
+        return self.reachable(self.unit_movement.get(unit_type), source)
+
+    def shortest_path(self, source, target):
+        """One shortest route as a list of district names from source to target, or None"""
+        if self.distance(source, target) is None:
+            return None
+        column = self.distances[:, self.index[target]]
+        path = [source]
+        while path[-1] != target:
+            d = column[self.index[path[-1]]]
+            # Neighbours are sorted so the route is deterministic
+            path.append(next(n for n in sorted(self.rules.adjacency[path[-1]])
+                             if column[self.index[n]] == d - 1))
+        return path
+
+
+_tables = {}
+
+
+def get_distance_table(rules=None):
+    """Shared DistanceTable for a Rules object"""
+    if rules is None:
+        rules = load_rules()
+    entry = _tables.get(id(rules))
+    if entry is None or entry[0] is not rules:
+        entry = (rules, DistanceTable(rules))
+        _tables[id(rules)] = entry
+    return entry[1]
@@ -0,0 +1,308 @@
+import os
+import copy
+import json
+import threading
+
+from engine.actions import IllegalActionError, action_to_dict, action_from_dict
+from engine.game import GameEngine
+from engine.rules import load_rules
+from game_data import BASE_DIR
+from perf import get_logger
+
+GAME_LOG_PATH = os.path.join(BASE_DIR, "game_log.jsonl")
+
+# Most actions replayed on load: a snapshot is written once the current
+# state is this many actions away from the last snapshot or reset
+SNAPSHOT_EVERY = 100
+
+logger = get_logger("eventlog")
+
+
+class EventLog:
+    """Append-only JSONL game log with periodic snapshots
+
+    Every record is one line with a sequence number:
+
+      {"seq": 0, "reset": {...state...}}             start (or restart) a game from a full state
+      {"seq": 7, "base": 6, "action": {...}}         an action applied to the state after record `base`
+      {"seq": 8, "undo": 6}                          the current state goes back to the state after record 6
+
+    Appending an action writes one line, so saves cost O(event), not O(state).
+    The state after any record is rebuilt from the nearest snapshot (a
+    `<log>.snapshots/<seq>.json` file) or reset on its chain of bases, which
+    keeps load and undo to at most SNAPSHOT_EVERY replayed actions. A torn or
+    corrupt tail left by a crash is cut off when the log is opened.
+    """
+
+    def __init__(self, path=GAME_LOG_PATH, rules=None, snapshot_every=SNAPSHOT_EVERY, sync=False):
+        self.path = path
+        self.rules = rules if rules is not None else load_rules()
+        self.snapshot_every = snapshot_every
+        self.sync = sync
+        self.snapshot_dir = os.path.splitext(path)[0] + ".snapshots"
+        self.lock = threading.RLock()
+
+        # Per record: (kind, link, payload). kind is "reset", "action" or "undo";
+        # link is the base record for actions and the target record for undos;
+        # payload is the action, or the byte offset of a reset line.
+        self.records = []
+        self.depth = {}   # actions replayed to rebuild the state after a reset/action record
+        self.ply = {}     # actions since the last reset, for display
+        self.snapshots = set()
+        self.head = None
+        self._engine = None
+        self._snapshot = None
+
+    @classmethod
+    def open(cls, path=GAME_LOG_PATH, initial_state=None, rules=None, **kwargs):
+        """Open a log, starting it from initial_state if it doesn't exist or is empty"""
+        log = cls(path, rules, **kwargs)
+        log.load()
+        if log.head is None:
+            if initial_state is None:
+                raise ValueError(f"{path} has no game and no initial state was given")
+            log.reset(initial_state)
+        return log
+
+    @property
+    def engine(self):
+        """GameEngine for the current state, rebuilt from the nearest snapshot after hibernate()"""
+        engine = self._engine
+        if engine is None and self.head is not None:
+            with self.lock:
+                if self._engine is None:
+                    self._engine = GameEngine(self.state_at(self.head), self.rules)
+                engine = self._engine
+        return engine
+
+    @engine.setter
+    def engine(self, engine):
+        self._engine = engine
+        self._snapshot = None
+
+    def snapshot(self):
+        """Copy of the current state for readers; shared until the next change, so never modify it
+
+        apply() mutates the engine's state in place under the lock. Sessions
+        that only display or search the game read this copy instead, so
+        they never iterate a dict another thread is changing.
+        """
+        with self.lock:
+            if self._snapshot is None:
+                self._snapshot = copy.deepcopy(self.engine.state)
+            return self._snapshot
+
+    def hibernate(self):
+        """Drop the in-memory game state; the record index stays, so the log can still be appended to"""
+        with self.lock:
+            self._engine = None
+            self._snapshot = None
+
+    # --- reading -------------------------------------------------------
+
+    def load(self):
+        """Read the log, cut off a damaged tail and rebuild the current state"""
+        with self.lock:
+            self.records, self.depth, self.ply = [], {}, {}
+            self.head = None
+            self._load_snapshot_index()
+
+            if os.path.exists(self.path):
+                with open(self.path, 'rb') as f:
+                    data = f.read()
+                offset = 0
+                while offset < len(data):
+                    end = data.find(b"\n", offset)
+                    try:
+                        if end < 0:
+                            raise ValueError("unterminated record")
+                        record = json.loads(data[offset:end])
+                        self._index(record, offset)
+                    except (ValueError, KeyError, TypeError) as e:
+                        logger.warning("⚠️ %s: dropping %d damaged byte(s) from record %d on (%s)",
+                                       self.path, len(data) - offset, len(self.records), e)
+                        with open(self.path, 'r+b') as f:
+                            f.truncate(offset)
+                        break
+                    offset = end + 1
+
+            # Snapshots past the end of a cut log describe states that no longer exist
+            for seq in [s for s in self.snapshots if s >= len(self.records)]:
+                self._drop_snapshot(seq)
+
+            self.engine = GameEngine(self.state_at(self.head), self.rules) if self.head is not None else None
+            return self.engine
+
+    def _index(self, record, offset):
+        seq = record["seq"]
+        if seq != len(self.records):
+            raise ValueError(f"expected seq {len(self.records)}, found {seq}")
+
+        if "reset" in record:
+            self.records.append(("reset", None, offset))
+            self.depth[seq] = 0
+            self.ply[seq] = 0
+            self.head = seq
+        elif "action" in record:
+            base = record["base"]
+            if base not in self.depth:
+                raise ValueError(f"base {base} is not a state")
+            self.records.append(("action", base, action_from_dict(record["action"])))
+            self.depth[seq] = 0 if seq in self.snapshots else self.depth[base] + 1
+            self.ply[seq] = self.ply[base] + 1
+            self.head = seq
+        elif "undo" in record:
+            target = record["undo"]
+            if target not in self.depth:
+                raise ValueError(f"undo target {target} is not a state")
+            self.records.append(("undo", target, None))
+            self.head = target
+        else:
+            raise ValueError("unknown record")
+
+    def _load_snapshot_index(self):
+        self.snapshots = set()
+        if not os.path.isdir(self.snapshot_dir):
+            return
+        for name in os.listdir(self.snapshot_dir):
+            stem, ext = os.path.splitext(name)
+            if ext == ".json" and stem.isdigit():
+                self.snapshots.add(int(stem))
+            elif ext == ".tmp":
+                os.remove(os.path.join(self.snapshot_dir, name))
+
+    def _read_line(self, offset):
+        with open(self.path, 'rb') as f:
+            f.seek(offset)
+            return json.loads(f.readline())
+
+    def _read_snapshot(self, seq):
+        try:
+            with open(self._snapshot_path(seq), 'r') as f:
+                return json.load(f)["state"]
+        except (OSError, ValueError, KeyError) as e:
+            logger.warning("⚠️ Ignoring unreadable snapshot %d (%s)", seq, e)
+            self.snapshots.discard(seq)
+            return None
+
+    def state_at(self, seq):
+        """Game state after record `seq`, replayed from the nearest snapshot or reset"""
+        with self.lock:
+            kind, link, payload = self.records[seq]
+            if kind == "undo":
+                seq = link
+
+            pending = []
+            state = None
+            while state is None:
+                kind, link, payload = self.records[seq]
+                if seq in self.snapshots:
+                    state = self._read_snapshot(seq)
+                if state is None and kind == "reset":
+                    state = self._read_line(payload)["reset"]
+                if state is None:
+                    pending.append(payload)
+                    seq = link
+
+            engine = GameEngine(state, self.rules)
+            for action in reversed(pending):
+                engine.apply(action)
+            return engine.state
+
+    def history(self, seq=None):
+        """(seq, action) pairs from the last reset up to record `seq` (default: the current state)"""
+        with self.lock:
+            seq = self.head if seq is None else seq
+            if self.records[seq][0] == "undo":
+                seq = self.records[seq][1]
+            actions = []
+            while self.records[seq][0] == "action":
+                actions.append((seq, self.records[seq][2]))
+                seq = self.records[seq][1]
+            return actions[::-1]
+
+    def current_ply(self):
+        """Actions between the last reset and the current state"""
+        return self.ply.get(self.head, 0)
+
+    def __len__(self):
+        return len(self.records)
+
+    # --- writing -------------------------------------------------------
+
+    def _append(self, record):
+        line = json.dumps(record, separators=(",", ":")) + "\n"
+        with open(self.path, 'ab') as f:
+            offset = f.tell()
+            f.write(line.encode())
+            f.flush()
+            if self.sync:
+                os.fsync(f.fileno())
+        return offset
+
+    def apply(self, action):
+        """Validate an action, append it to the log and apply it to the current state"""
+        with self.lock:
+            self.engine.check(action)
+            seq, base = len(self.records), self.head
+            self._append({"seq": seq, "base": base, "action": action_to_dict(action)})
+            self.engine.apply(action)
+            self._snapshot = None
+
+            self.records.append(("action", base, action))
+            self.depth[seq] = self.depth[base] + 1
+            self.ply[seq] = self.ply[base] + 1
+            self.head = seq
+            if self.depth[seq] >= self.snapshot_every:
+                self.write_snapshot(seq, self.engine.state)
+            return self.engine.state
+
+    def undo(self):
+        """Go back to the state before the current one's last action"""
+        with self.lock:
+            kind, base, _ = self.records[self.head]
+            if kind != "action":
+                raise IllegalActionError("Nothing to undo")
+            seq = len(self.records)
+            self._append({"seq": seq, "undo": base})
+            self.records.append(("undo", base, None))
+            self.head = base
+            self.engine = GameEngine(self.state_at(base), self.rules)
+            return self.engine.state
+
+    def reset(self, state):
+        """Start over from a full game state"""
+        with self.lock:
+            state = copy.deepcopy(state)
+            seq = len(self.records)
+            offset = self._append({"seq": seq, "reset": state})
+            self.records.append(("reset", None, offset))
+            self.depth[seq] = 0
+            self.ply[seq] = 0
+            self.head = seq
+            self.engine = GameEngine(state, self.rules)
+            return self.engine.state
+
+    def write_snapshot(self, seq, state):
+        """Atomically write the state after record `seq` as a snapshot"""
+        os.makedirs(self.snapshot_dir, exist_ok=True)
+        path = self._snapshot_path(seq)
+        tmp = path + ".tmp"
+        with open(tmp, 'w') as f:
+            json.dump({"seq": seq, "state": state}, f, separators=(",", ":"))
+            f.flush()
+            if self.sync:
+                os.fsync(f.fileno())
+        os.replace(tmp, path)
+        self.snapshots.add(seq)
+        self.depth[seq] = 0
+
+    def _snapshot_path(self, seq):
+        return os.path.join(self.snapshot_dir, f"{seq:08d}.json")
+
+    def _drop_snapshot(self, seq):
+        self.snapshots.discard(seq)
+        try:
+            os.remove(self._snapshot_path(seq))
+        except OSError:
+            pass
@@ -0,0 +1,102 @@
+import os
+from collections import namedtuple
+import numpy as np
+
+from datafiles import load_json
+from game_data import BASE_DIR
+
+COMBAT_HANDS_PATH = os.path.join(BASE_DIR, "combat_card_hands.json")
+
+# Trials per estimate; 100k keeps the standard error under 0.2 percentage points
+DEFAULT_TRIALS = 100_000
+
+FirefightOdds = namedtuple(
+    "FirefightOdds",
+    "attacker defender district attacker_win defender_win tie trials attacker_strength defender_strength",
+)
+
+
+def load_combat_hands(path=COMBAT_HANDS_PATH):
+    """Load combat_card_hands.json ({gang_id: {"hand", "used", "upgrades"}}), re-read only when it changes"""
+    return load_json(path)
+
+
+def available_cards(rules, hands, gang_id, state=None):
+    """Strengths of the combat cards a gang can still play: hand plus upgrades, minus used
+
+    Upgrades gained through the engine are stored on the game state's gang
+    entry and are included when a state is passed.
+    """
+    hand = hands.get(gang_id, {})
+    card_ids = list(hand.get("hand", [])) + list(hand.get("upgrades", []))
+    if state is not None:
+        card_ids += state.get("gangs", {}).get(gang_id, {}).get("upgrades", [])
+    used = set(hand.get("used", []))
+
+    cards = rules.data.combat_cards
+    strengths = [cards[card_id].strength for card_id in dict.fromkeys(card_ids)
+                 if card_id in cards and card_id not in used]
+    return np.array(strengths, dtype=np.int16)
+
+
+def unit_strength(rules, unit_types):
+    """Base firefight strength of a gang's units in a district
+
+    Every unit adds 1. Drones only add strength alongside a friendly
+    non-drone unit, and Edgerunner Solos add +1 on top.
+    """
+    units = rules.data.units
+    fighters = [u for u in unit_types if u not in rules.must_end_with_friendly]
+    strength = len(fighters)
+    if fighters:
+        strength += len(unit_types) - len(fighters)
+    strength += sum(1 for u in fighters if u in units and units[u].edgerunner and units[u].unit_class == "solo")
+    return strength
+
+
+def draw_strengths(rng, strengths, trials, draw=1):
+    """Best card from `draw` cards dealt without replacement, for every trial at once"""
+    if len(strengths) == 0:
+        return np.zeros(trials, dtype=np.int16)
+    draw = min(draw, len(strengths))
+    if draw == 1:
+        return strengths[rng.integers(0, len(strengths), size=trials)]
+    # Random keys per card; the `draw` smallest keys in each row are that trial's dealt cards
+    dealt = np.argpartition(rng.random((trials, len(strengths))), draw - 1, axis=1)[:, :draw]
+    return strengths[dealt].max(axis=1)
+
+
+def firefight_odds(rules, state, district, attacker, defender, hands, trials=DEFAULT_TRIALS, draw=1, seed=None):
+    """Monte Carlo estimate of a firefight in a district
+
+    Each side's total is its unit strength plus the best of `draw` combat
+    cards drawn at random from its available cards. The higher total wins;
+    equal totals are reported as ties. All trials run as one NumPy batch.
+    """
+    units = state.get("districts", {}).get(district, {}).get("units", {})
+    attacker_base = unit_strength(rules, units.get(attacker, []))
+    defender_base = unit_strength(rules, units.get(defender, []))
+
+    rng = np.random.default_rng(seed)
+    attacker_total = attacker_base + draw_strengths(rng, available_cards(rules, hands, attacker, state), trials, draw)
+    defender_total = defender_base + draw_strengths(rng, available_cards(rules, hands, defender, state), trials, draw)
+
+    attacker_wins = np.count_nonzero(attacker_total > defender_total)
+    defender_wins = np.count_nonzero(attacker_total < defender_total)
+    ties = trials - attacker_wins - defender_wins
+
+    return FirefightOdds(
+        attacker, defender, district,
+        float(attacker_wins / trials), float(defender_wins / trials), float(ties / trials), trials,
+        attacker_base, defender_base,
+    )
+
+
+def district_firefights(rules, state, district, hands, trials=DEFAULT_TRIALS, draw=1, seed=None):
+    """Odds for every ordered (attacker, defender) pair of gangs with units in a district"""
+    units = state.get("districts", {}).get(district, {}).get("units", {})
+    gangs = [gang_id for gang_id, gang_units in units.items() if gang_units]
+    return [
+        firefight_odds(rules, state, district, attacker, defender, hands, trials, draw, seed)
+        for attacker in gangs for defender in gangs if attacker != defender
+    ]
@@ -0,0 +1,339 @@
+import copy
+import json
+from collections import Counter
+
+from engine.actions import IllegalActionError, Move, Upgrade, Build, Reclaim, Firefight, Netrun
+from engine.rules import HIDEOUT_COST, load_rules
+
+
+def empty_district():
+    return {"units": {}, "hideouts": [], "presence": [], "dominant": None}
+
+
+def update_control(district_data):
+    """Recompute presence and the dominant gang from the units in a district
+
+    The gang with the most units dominates. On a tie the current dominant
+    gang keeps control if it is one of the tied gangs, otherwise nobody does.
+    """
+    counts = {gang_id: len(units) for gang_id, units in district_data.get("units", {}).items() if units}
+    district_data["presence"] = list(counts)
+
+    if not counts:
+        district_data["dominant"] = None
+        return
+
+    best = max(counts.values())
+    leaders = [gang_id for gang_id, count in counts.items() if count == best]
+    if len(leaders) == 1:
+        district_data["dominant"] = leaders[0]
+    elif district_data.get("dominant") not in leaders:
+        district_data["dominant"] = None
+
+
+class GameEngine:
+    """Applies actions to an in-memory game state (the game_state.json dict shape)
+
+    Runs without Streamlit, so simulations, batch jobs and the UI share the
+    same rules. apply() validates an action and mutates self.state in place;
+    use clone() to branch a state for look-ahead.
+    """
+
+    def __init__(self, state, rules=None):
+        self.state = state
+        self.rules = rules if rules is not None else load_rules()
+        self.history = []
+
+    @classmethod
+    def from_file(cls, path, rules=None):
+        with open(path, 'r') as f:
+            return cls(json.load(f), rules)
+
+    def clone(self):
+        engine = GameEngine(copy.deepcopy(self.state), self.rules)
+        engine.history = list(self.history)
+        return engine
+
+    # --- state queries -------------------------------------------------
+
+    def district(self, name):
+        """District entry in the state, created empty if the state doesn't list it yet"""
+        districts = self.state.setdefault("districts", {})
+        if name not in districts:
+            districts[name] = empty_district()
+        return districts[name]
+
+    def units(self, district, gang_id):
+        return self.state.get("districts", {}).get(district, {}).get("units", {}).get(gang_id, [])
+
+    def gang_state(self, gang_id):
+        gang = self.state.get("gangs", {}).get(gang_id)
+        if gang is None:
+            raise IllegalActionError(f"Unknown gang {gang_id!r}")
+        return gang
+
+    def has_hideout(self, district):
+        return bool(self.state.get("districts", {}).get(district, {}).get("hideouts"))
+
+    # --- legal actions -------------------------------------------------
+
+    def playable_discs(self, gang_id):
+        """(disc, as_disc) pairs the gang can play right now"""
+        gang = self.state.get("gangs", {}).get(gang_id)
+        if gang is None:
+            return []
+
+        playable = []
+        for disc in gang.get("action_discs_available", []):
+            if disc == "wild":
+                for used in dict.fromkeys(gang.get("action_discs_used", [])):
+                    if used != "wild":
+                        playable.append(("wild", used))
+            elif self.rules.disc(disc) is not None:
+                playable.append((disc, None))
+        return playable
+
+    def legal_actions(self, gang_id, district=None):
+        """Every legal action for a gang, optionally limited to one source district"""
+        actions = []
+        for disc, as_disc in self.playable_discs(gang_id):
+            effective = as_disc or disc
+            rule = self.rules.disc(effective)
+            if rule.moves_classes:
+                actions.extend(self._legal_moves(gang_id, disc, as_disc, rule, district))
+            elif rule.bonus_action == "gain_upgrade":
+                for card in self._upgrades_left(gang_id):
+                    actions.append(Upgrade(gang_id, disc, card.id, as_disc))
+            elif rule.bonus_action == "build_hideout":
+                for name, data in self.state.get("districts", {}).items():
+                    if district is not None and name != district:
+                        continue
+                    if self.units(name, gang_id) and not data.get("hideouts") and self._can_pay(gang_id, HIDEOUT_COST):
+                        actions.append(Build(gang_id, disc, name, as_disc))
+
+        if self.state.get("gangs", {}).get(gang_id, {}).get("action_discs_used"):
+            actions.append(Reclaim(gang_id))
+        return actions
+
+    def _legal_moves(self, gang_id, disc, as_disc, rule, only_district):
+        moves = []
+        for source, data in self.state.get("districts", {}).items():
+            if only_district is not None and source != only_district:
+                continue
+            units = data.get("units", {}).get(gang_id, [])
+            movable = [u for u in units if self.rules.unit_classes.get(u) in rule.moves_classes]
+            if not movable:
+                continue
+
+            # One unit of each type, plus the whole movable group (techies carry their drones)
+            groups = [(unit_type,) for unit_type in dict.fromkeys(movable)]
+            if len(movable) > 1 and (rule.action_limit is None or len(movable) <= rule.action_limit):
+                groups.append(tuple(movable))
+
+            for target in sorted(self.rules.adjacency.get(source, ())):
+                for group in groups:
+                    action = Move(gang_id, disc, source, target, group, as_disc)
+                    if self._move_problem(action) is None:
+                        moves.append(action)
+        return moves
+
+    def _upgrades_left(self, gang_id):
+        owned = set(self.state.get("gangs", {}).get(gang_id, {}).get("upgrades", []))
+        return [card for card in self.rules.data.upgrade_cards.get(gang_id, ()) if card.id not in owned]
+
+    def _can_pay(self, gang_id, cost):
+        resources = self.state.get("gangs", {}).get(gang_id, {}).get("resources", {})
+        return all(resources.get(key, 0) >= amount for key, amount in cost.items())
+
+    # --- validation ----------------------------------------------------
+
+    def _disc_problem(self, action):
+        """Reason the action's disc can't be played, or None"""
+        gang = self.gang_state(action.gang)
+        if action.disc not in gang.get("action_discs_available", []):
+            return f"{action.gang} has no {action.disc!r} disc available"
+        if action.disc == "wild":
+            if not action.as_disc or action.as_disc == "wild":
+                return "A Wild disc must copy a previously used disc"
+            if action.as_disc not in gang.get("action_discs_used", []):
+                return f"{action.gang} has not used a {action.as_disc!r} disc yet"
+        elif action.as_disc:
+            return "Only a Wild disc can copy another disc"
+        if self.rules.disc(action.as_disc or action.disc) is None:
+            return f"Unknown disc {action.as_disc or action.disc!r}"
+        return None
+
+    def _move_problem(self, action):
+        effective = action.as_disc or action.disc
+        rule = self.rules.disc(effective)
+        if rule is None or not rule.moves_classes:
+            return f"The {effective!r} disc doesn't move units"
+        if not action.units:
+            return "A move needs at least one unit"
+        if rule.action_limit is not None and len(action.units) > rule.action_limit:
+            return f"The {effective!r} disc moves at most {rule.action_limit} unit(s)"
+        for unit_type in action.units:
+            if not self.rules.can_move(effective, unit_type):
+                return f"The {effective!r} disc can't move {unit_type}"
+        if not self.rules.is_adjacent(action.source, action.target):
+            return f"{action.target} is not adjacent to {action.source}"
+
+        available = Counter(self.units(action.source, action.gang))
+        needed = Counter(action.units)
+        if any(available[unit_type] < count for unit_type, count in needed.items()):
+            return f"{action.gang} doesn't have {list(action.units)} in {action.source}"
+
+        # Drones must end their move with a friendly non-drone unit
+        if any(u in self.rules.must_end_with_friendly for u in action.units):
+            escorts = [u for u in list(self.units(action.target, action.gang)) + list(action.units)
+                       if u not in self.rules.must_end_with_friendly]
+            if not escorts:
+                return "Drones must end their move with a friendly unit"
+        return None
+
+    def _firefight_problem(self, action):
+        self.gang_state(action.defender)
+        if action.gang == action.defender:
+            return "A gang can't fight itself"
+        for gang_id in (action.gang, action.defender):
+            if not self.units(action.district, gang_id):
+                return f"{gang_id} has no units in {action.district}"
+        for gang_id, _ in action.losses:
+            if gang_id not in (action.gang, action.defender):
+                return f"{gang_id} isn't in this firefight"
+        available = Counter((gang_id, unit_type) for gang_id in (action.gang, action.defender)
+                            for unit_type in self.units(action.district, gang_id))
+        if any(available[loss] < count for loss, count in Counter(action.losses).items()):
+            return f"Not every lost unit {[list(loss) for loss in action.losses]} is in {action.district}"
+        return None
+
+    def _netrun_problem(self, action):
+        token = self.gang_state(action.gang).get("net_token", 0)
+        step = next((s for s in self.rules.data.netrun_track if s.step == action.step), None)
+        if step is None:
+            return f"There is no netrun step {action.step}"
+        if action.step != token + 1:
+            return f"{action.gang}'s net token is on step {token}, so the next step is {token + 1}"
+        if not action.passed and step.netwatch_roll is None:
+            return f"Step {action.step} has no Netwatch roll to fail"
+        return None
+
+    def check(self, action):
+        """Raise IllegalActionError if the action can't be applied to the current state"""
+        if isinstance(action, Reclaim):
+            self.gang_state(action.gang)
+            return
+        if isinstance(action, (Firefight, Netrun)):
+            # Bonus actions resolved at the table; no disc is spent on them
+            self.gang_state(action.gang)
+            problem = self._firefight_problem(action) if isinstance(action, Firefight) else self._netrun_problem(action)
+            if problem is not None:
+                raise IllegalActionError(problem)
+            return
+
+        problem = self._disc_problem(action)
+        if problem is None:
+            if isinstance(action, Move):
+                problem = self._move_problem(action)
+            elif isinstance(action, Upgrade):
+                rule = self.rules.disc(action.as_disc or action.disc)
+                if rule.bonus_action != "gain_upgrade":
+                    problem = f"The {rule.disc_type!r} disc doesn't gain upgrades"
+                elif action.card not in {card.id for card in self._upgrades_left(action.gang)}:
+                    problem = f"{action.card} is not an upgrade {action.gang} can gain"
+            elif isinstance(action, Build):
+                rule = self.rules.disc(action.as_disc or action.disc)
+                if rule.bonus_action != "build_hideout":
+                    problem = f"The {rule.disc_type!r} disc doesn't build hideouts"
+                elif self.has_hideout(action.district):
+                    problem = f"{action.district} already has a Hideout"
+                elif not self.units(action.district, action.gang):
+                    problem = f"{action.gang} has no units in {action.district}"
+                elif not self._can_pay(action.gang, HIDEOUT_COST):
+                    problem = f"{action.gang} can't pay the hideout cost {HIDEOUT_COST}"
+            else:
+                problem = f"Unknown action {action!r}"
+
+        if problem is not None:
+            raise IllegalActionError(problem)
+
+    # --- applying actions ----------------------------------------------
+
+    def apply(self, action):
+        """Validate and apply an action, returning the updated state"""
+        self.check(action)
+
+        if isinstance(action, Reclaim):
+            gang = self.gang_state(action.gang)
+            gang["action_discs_available"] = gang.get("action_discs_available", []) + gang.get("action_discs_used", [])
+            gang["action_discs_used"] = []
+        elif not isinstance(action, (Firefight, Netrun)):
+            self._spend_disc(action)
+            if isinstance(action, Move):
+                self._move_units(action)
+            elif isinstance(action, Upgrade):
+                self.gang_state(action.gang).setdefault("upgrades", []).append(action.card)
+            elif isinstance(action, Build):
+                self._build_hideout(action)
+        elif isinstance(action, Firefight):
+            self._resolve_firefight(action)
+        elif isinstance(action, Netrun):
+            self._advance_netrun(action)
+
+        self.history.append(action)
+        return self.state
+
+    def _spend_disc(self, action):
+        gang = self.gang_state(action.gang)
+        gang["action_discs_available"].remove(action.disc)
+        gang.setdefault("action_discs_used", []).append(action.disc)
+
+    def _move_units(self, action):
+        source = self.district(action.source)
+        target = self.district(action.target)
+
+        remaining = list(source["units"][action.gang])
+        for unit_type in action.units:
+            remaining.remove(unit_type)
+        if remaining:
+            source["units"][action.gang] = remaining
+        else:
+            del source["units"][action.gang]
+
+        target["units"][action.gang] = target["units"].get(action.gang, []) + list(action.units)
+
+        update_control(source)
+        update_control(target)
+
+    def _resolve_firefight(self, action):
+        district = self.district(action.district)
+        for gang_id, unit_type in action.losses:
+            remaining = list(district["units"][gang_id])
+            remaining.remove(unit_type)
+            if remaining:
+                district["units"][gang_id] = remaining
+            else:
+                del district["units"][gang_id]
+            supply = self.gang_state(gang_id).setdefault("units_available", {})
+            supply[unit_type] = supply.get(unit_type, 0) + 1
+        update_control(district)
+
+    def _advance_netrun(self, action):
+        gang = self.gang_state(action.gang)
+        if not action.passed:
+            return
+        gang["net_token"] = action.step
+        step = next(s for s in self.rules.data.netrun_track if s.step == action.step)
+        resources = gang.setdefault("resources", {})
+        for key, amount in step.reward.items():
+            resources[key] = resources.get(key, 0) + amount
+
+    def _build_hideout(self, action):
+        gang = self.gang_state(action.gang)
+        resources = gang.setdefault("resources", {})
+        for key, amount in HIDEOUT_COST.items():
+            resources[key] = resources.get(key, 0) - amount
+
+        district = self.district(action.district)
+        district["hideouts"] = district.get("hideouts", []) + [action.gang]
+        gang["hideouts"] = gang.get("hideouts", []) + [action.district]
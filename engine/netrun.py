@@ -0,0 +1,142 @@
+from collections import namedtuple
+import numpy as np
+
+# Netwatch is rolled on 2d6; the roll passes when it meets the step's netwatch_roll
+NETWATCH_DICE = (2, 6)
+
+NetrunOutcome = namedtuple(
+    "NetrunOutcome",
+    "start depth expected_street_cred p_complete p_caught effect_risk effect_chance",
+)
+NetrunOutcome.__doc__ = """Outcome of a netrun that starts at `start` and tries to advance `depth` steps
+
+effect_risk maps each Netwatch penalty (text from netrun_track.json) to the
+chance of being caught at that step; effect_chance maps each reward effect to
+the chance of reaching the step that grants it.
+"""
+
+
+def roll_distribution(dice=NETWATCH_DICE):
+    """Exact probability of each total for `count` dice with `sides` sides: {total: p}"""
+    count, sides = dice
+    totals = np.zeros(count * sides + 1)
+    totals[0] = 1.0
+    for _ in range(count):
+        rolled = np.zeros_like(totals)
+        for face in range(1, sides + 1):
+            rolled[face:] += totals[:len(totals) - face] / sides
+        totals = rolled
+    return {total: float(p) for total, p in enumerate(totals) if p > 0}
+
+
+def pass_probability(threshold, dice=NETWATCH_DICE, rerolls=0):
+    """Chance of beating a Netwatch roll, with optional rerolls of a failed roll"""
+    p = sum(prob for total, prob in roll_distribution(dice).items() if total >= threshold)
+    return 1.0 - (1.0 - p) ** (rerolls + 1)
+
+
+def exact_outcomes(track, start, dice=NETWATCH_DICE, rerolls=0):
+    """Exact NetrunOutcome for every depth from `start`, computed in one pass along the track"""
+    steps = [s for s in track if s.step >= start]
+    alive = 1.0
+    expected_cred = 0.0
+    effect_risk = {}
+    effect_chance = {}
+
+    outcomes = [NetrunOutcome(start, 0, 0.0, 1.0, 0.0, {}, {})]
+    for depth, step in enumerate(steps, 1):
+        if step.netwatch_roll is not None:
+            p = pass_probability(step.netwatch_roll, dice, rerolls)
+            if step.effect:
+                effect_risk[step.effect] = effect_risk.get(step.effect, 0.0) + alive * (1.0 - p)
+            alive *= p
+        else:
+            if step.effect:
+                effect_chance[step.effect] = effect_chance.get(step.effect, 0.0) + alive
+        expected_cred += alive * step.reward.get("street_cred", 0)
+
+        outcomes.append(NetrunOutcome(start, depth, expected_cred, alive, 1.0 - alive,
+                                      dict(effect_risk), dict(effect_chance)))
+    return outcomes
+
+
+def simulate_netrun(track, start, depth, trials=100_000, dice=NETWATCH_DICE, rerolls=0, seed=None):
+    """Batched Monte Carlo version of a single (start, depth) netrun, for checking the tables
+
+    Every trial rolls all of its Netwatch checks up front as one NumPy array.
+    """
+    steps = [s for s in track if s.step >= start][:depth]
+    rng = np.random.default_rng(seed)
+    count, sides = dice
+
+    alive = np.ones(trials, dtype=bool)
+    street_cred = np.zeros(trials)
+    effect_risk = {}
+    effect_chance = {}
+    for step in steps:
+        if step.netwatch_roll is not None:
+            passed = np.zeros(trials, dtype=bool)
+            for _ in range(rerolls + 1):
+                totals = rng.integers(1, sides + 1, size=(trials, count)).sum(axis=1)
+                passed |= totals >= step.netwatch_roll
+            caught = alive & ~passed
+            if step.effect:
+                effect_risk[step.effect] = effect_risk.get(step.effect, 0.0) + float(caught.mean())
+            alive &= passed
+        elif step.effect:
+            effect_chance[step.effect] = effect_chance.get(step.effect, 0.0) + float(alive.mean())
+        street_cred += alive * step.reward.get("street_cred", 0)
+
+    p_complete = float(alive.mean())
+    return NetrunOutcome(start, len(steps), float(street_cred.mean()), p_complete, 1.0 - p_complete,
+                         effect_risk, effect_chance)
+
+
+class NetrunTables:
+    """Precomputed netrun outcomes for every (start step, depth) pair
+
+    Built once per rules set; lookups never run a simulation.
+    """
+
+    def __init__(self, track, dice=NETWATCH_DICE, rerolls=0):
+        self.track = tuple(track)
+        self.dice = dice
+        self.rerolls = rerolls
+        self.steps = [s.step for s in self.track]
+        self.table = {start: exact_outcomes(self.track, start, dice, rerolls) for start in self.steps}
+
+    def outcome(self, start, depth):
+        """NetrunOutcome for a netrun from `start` that tries `depth` steps (capped at the track end)"""
+        outcomes = self.table[start]
+        return outcomes[min(depth, len(outcomes) - 1)]
+
+    def max_depth(self, start):
+        return len(self.table[start]) - 1
+
+    def push_one_more(self, start, depth):
+        """Marginal effect of trying step depth+1 after `depth` steps from `start`
+
+        Returns (extra expected street cred, extra chance of being caught,
+        added risk per Netwatch penalty).
+        """
+        now = self.outcome(start, depth)
+        after = self.outcome(start, depth + 1)
+        added_risk = {effect: risk - now.effect_risk.get(effect, 0.0)
+                      for effect, risk in after.effect_risk.items()
+                      if risk - now.effect_risk.get(effect, 0.0) > 0}
+        return (after.expected_street_cred - now.expected_street_cred,
+                after.p_caught - now.p_caught,
+                added_risk)
+
+
+_tables = {}
+
+
+def get_netrun_tables(rules, rerolls=0):
+    """NetrunTables for the rules' track, built once per (rules, rerolls)"""
+    key = (id(rules), rerolls)
+    entry = _tables.get(key)
+    if entry is None or entry[0] is not rules:
+        entry = (rules, NetrunTables(rules.data.netrun_track, rerolls=rerolls))
+        _tables[key] = entry
+    return entry[1]
@@ -0,0 +1,53 @@
+from game_data import get_game_data
+
+# disc_logic.json names the build cost "hideout_cost" without giving a value
+HIDEOUT_COST = {"creds": 1}
+
+
+class Rules:
+    """Static rules derived from the GameData registry: adjacency by district name and unit classes"""
+    __slots__ = ('data', 'adjacency', 'unit_classes', 'must_end_with_friendly')
+
+    def __init__(self, game_data):
+        self.data = game_data
+
+        # Districts1-3player.json lists neighbours by id; game states use display names
+        self.adjacency = {}
+        for district in game_data.districts.values():
+            self.adjacency[district.name] = frozenset(
+                game_data.districts[adjacent_id].name
+                for adjacent_id in district.adjacent
+                if adjacent_id in game_data.districts
+            )
+
+        self.unit_classes = {unit.id: unit.unit_class for unit in game_data.units.values()}
+        self.must_end_with_friendly = frozenset(
+            unit.id for unit in game_data.units.values() if unit.must_end_with_friendly
+        )
+
+    @property
+    def district_names(self):
+        return list(self.adjacency)
+
+    def is_adjacent(self, source, target):
+        return target in self.adjacency.get(source, ())
+
+    def disc(self, disc_type):
+        return self.data.discs.get(disc_type)
+
+    def can_move(self, disc_type, unit_type):
+        """True if the disc is allowed to move this unit type"""
+        disc = self.data.discs.get(disc_type)
+        return disc is not None and self.unit_classes.get(unit_type) in disc.moves_classes
+
+
+_rules = None
+
+
+def load_rules():
+    """Process-wide Rules, rebuilt whenever the shared GameData registry is"""
+    global _rules
+    game_data = get_game_data()
+    if _rules is None or _rules.data is not game_data:
+        _rules = Rules(game_data)
+    return _rules
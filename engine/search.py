@@ -0,0 +1,167 @@
+import os
+import copy
+import math
+import time
+import random
+import multiprocessing
+from collections import namedtuple
+from concurrent.futures import ProcessPoolExecutor
+
+from engine.actions import Reclaim
+from engine.game import GameEngine
+from engine.rules import load_rules
+
+# Plies of random play after the root action before the position is scored
+ROLLOUT_DEPTH = 12
+
+# Workers start fresh interpreters rather than forking: the pool starts them on demand from a
+# script thread, while render threads may hold render._base_lock, an LRUCache lock or
+# datafiles._lock, and a worker forked then inherits that lock held and hangs in load_rules()
+WORKER_START_METHOD = "spawn"
+
+# UCB1 exploration constant for choosing which root action to roll out next
+EXPLORATION = 1.4
+
+SearchResult = namedtuple("SearchResult", "action stats rollouts elapsed workers")
+SearchResult.__doc__ = """Best root action plus per-action (visits, mean score) and rollout throughput"""
+
+
+def evaluate(state, gang_id, rules):
+    """Heuristic score of a state for one gang
+
+    Presence is worth 1 per district, dominance adds 2 plus that district's
+    rewards, and street cred already earned counts directly.
+    """
+    score = 0.0
+    for name, district in state.get("districts", {}).items():
+        if district.get("units", {}).get(gang_id):
+            score += 1.0
+        if district.get("dominant") == gang_id:
+            score += 2.0
+            info = rules.data.districts_by_name.get(name)
+            if info is not None:
+                score += sum(info.rewards.values())
+    score += state.get("gangs", {}).get(gang_id, {}).get("resources", {}).get("street_cred", 0)
+    return score
+
+
+def rollout(engine, gang_id, rng, depth=ROLLOUT_DEPTH):
+    """Play random legal actions for every gang in turn, then score the result for gang_id"""
+    gangs = list(engine.state.get("gangs", {}))
+    if not gangs:
+        return evaluate(engine.state, gang_id, engine.rules)
+
+    turn = (gangs.index(gang_id) + 1) % len(gangs) if gang_id in gangs else 0
+    for _ in range(depth):
+        actor = gangs[turn]
+        actions = engine.legal_actions(actor)
+        # Prefer real actions; only reclaim when nothing else is possible
+        playable = [a for a in actions if not isinstance(a, Reclaim)] or actions
+        if playable:
+            engine.apply(rng.choice(playable))
+        turn = (turn + 1) % len(gangs)
+    return evaluate(engine.state, gang_id, engine.rules)
+
+
+def run_search(state, gang_id, time_budget, seed=None, rollout_depth=ROLLOUT_DEPTH, max_rollouts=None):
+    """UCB1 search over the root actions for one worker
+
+    Returns ({action: (visits, total score)}, rollouts). Top-level so the
+    process pool can pickle it.
+    """
+    deadline = time.perf_counter() + time_budget
+    rng = random.Random(seed)
+    root = GameEngine(state, load_rules())
+    actions = root.legal_actions(gang_id)
+    if not actions:
+        return {}, 0
+
+    visits = [0] * len(actions)
+    totals = [0.0] * len(actions)
+    rollouts = 0
+    while time.perf_counter() < deadline and (max_rollouts is None or rollouts < max_rollouts):
+        if rollouts < len(actions):
+            index = rollouts
+        else:
+            log_total = math.log(rollouts)
+            index = max(range(len(actions)), key=lambda i: totals[i] / visits[i] + EXPLORATION * math.sqrt(log_total / visits[i]))
+
+        engine = GameEngine(copy.deepcopy(state), root.rules)
+        engine.apply(actions[index])
+        totals[index] += rollout(engine, gang_id, rng, rollout_depth)
+        visits[index] += 1
+        rollouts += 1
+
+    return {action: (visits[i], totals[i]) for i, action in enumerate(actions)}, rollouts
+
+
+class SearchPool:
+    """Process pool for root-parallel search
+
+    Every worker runs its own UCB1 search with a different seed for the whole
+    time budget and the visit counts are merged afterwards, so workers never
+    wait on each other and throughput scales with cores.
+    """
+
+    def __init__(self, workers=None):
+        self.workers = workers or os.cpu_count() or 1
+        self.executor = (ProcessPoolExecutor(max_workers=self.workers,
+                                             mp_context=multiprocessing.get_context(WORKER_START_METHOD))
+                         if self.workers > 1 else None)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.shutdown()
+        return False
+
+    def shutdown(self):
+        if self.executor is not None:
+            self.executor.shutdown(wait=True, cancel_futures=True)
+            self.executor = None
+
+    def warm_up(self):
+        """Start every worker process and load the rules in it"""
+        if self.executor is not None:
+            list(self.executor.map(_warm_worker, range(self.workers)))
+
+    def search(self, state, gang_id, time_budget=1.0, seed=None, rollout_depth=ROLLOUT_DEPTH):
+        """Pick the best action for gang_id within roughly time_budget seconds"""
+        start = time.perf_counter()
+        base_seed = seed if seed is not None else random.randrange(2 ** 32)
+
+        if self.executor is None:
+            results = [run_search(state, gang_id, time_budget, base_seed, rollout_depth)]
+        else:
+            futures = [self.executor.submit(run_search, state, gang_id, time_budget, base_seed + i, rollout_depth)
+                       for i in range(self.workers)]
+            results = [future.result() for future in futures]
+
+        merged = {}
+        rollouts = 0
+        for stats, count in results:
+            rollouts += count
+            for action, (visits, total) in stats.items():
+                seen_visits, seen_total = merged.get(action, (0, 0.0))
+                merged[action] = (seen_visits + visits, seen_total + total)
+
+        elapsed = time.perf_counter() - start
+        if not merged:
+            return SearchResult(None, {}, rollouts, elapsed, self.workers)
+
+        stats = {action: (visits, total / visits if visits else 0.0) for action, (visits, total) in merged.items()}
+        # The most visited root action is the most robust choice
+        best = max(stats, key=lambda a: (stats[a][0], stats[a][1]))
+        return SearchResult(best, stats, rollouts, elapsed, self.workers)
+
+
+def _warm_worker(_):
+    load_rules()
+    return os.getpid()
+
+
+def choose_action(state, gang_id, time_budget=1.0, workers=None, seed=None):
+    """One-off search with a temporary pool; keep a SearchPool around for repeated decisions"""
+    with SearchPool(workers) as pool:
+        return pool.search(state, gang_id, time_budget, seed)
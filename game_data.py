@@ -0,0 +1,249 @@
+import os
+
+from datafiles import load_json, files_signature
+
+BASE_DIR = os.path.dirname(os.path.abspath(__file__))
+
+GANGS_PATH = os.path.join(BASE_DIR, "gangs.json")
+UNITS_PATH = os.path.join(BASE_DIR, "units.json")
+DISTRICTS_PATH = os.path.join(BASE_DIR, "Districts1-3player.json")
+COMBAT_CARDS_PATH = os.path.join(BASE_DIR, "combat_cards.json")
+NETRUN_TRACK_PATH = os.path.join(BASE_DIR, "netrun_track.json")
+DISC_LOGIC_PATH = os.path.join(BASE_DIR, "disc_logic.json")
+GAME_STATE_PATH = os.path.join(BASE_DIR, "game_state.json")
+
+RULES_PATHS = (GANGS_PATH, UNITS_PATH, DISTRICTS_PATH, COMBAT_CARDS_PATH, NETRUN_TRACK_PATH, DISC_LOGIC_PATH)
+
+# Unit classes each disc's "moves_units" value lets you move
+DISC_MOVES = {
+    'solo': ('solo',),
+    'techie_and_drones': ('techie', 'drone'),
+    'netrunner': ('netrunner',),
+}
+
+# Convert color names to RGB-like values for PIL
+COLOR_MAP = {
+    'red': '#FF0000',
+    'lime': '#00FF00',
+    'blue': '#0000FF',
+    'pink': '#FF69B4',
+    'purple': '#800080',
+    'cyan': '#00FFFF',
+    'yellow': '#FFFF00',
+    'gray': '#808080'
+}
+
+# Simple color indicators for the sidebar legend
+COLOR_EMOJI = {
+    'red': '🔴',
+    'lime': '🟢',
+    'blue': '🔵',
+    'pink': '🩷',
+    'purple': '🟣',
+    'cyan': '🔵',
+    'yellow': '🟡',
+    'gray': '⚫'
+}
+
+DEFAULT_COLOR = '#808080'
+DEFAULT_EMOJI = '⚫'
+
+
+def to_pil_color(color):
+    """Resolve a gangs.json color name or hex string to a PIL color"""
+    if color in COLOR_MAP:
+        return COLOR_MAP[color]
+    if not color or not color.startswith('#'):
+        return DEFAULT_COLOR
+    return color
+
+
+class Gang:
+    """A playable gang from gangs.json with its colors resolved ahead of time"""
+    __slots__ = ('id', 'name', 'color', 'pil_color', 'emoji', 'starting_district',
+                 'ability_title', 'passive_ability', 'special_rule')
+
+    def __init__(self, name, data):
+        self.id = data['id']
+        self.name = name
+        self.color = data.get('color', 'gray')
+        self.pil_color = to_pil_color(self.color)
+        self.emoji = COLOR_EMOJI.get(self.color, DEFAULT_EMOJI)
+        self.starting_district = data.get('starting_district')
+        self.ability_title = data.get('ability_title')
+        self.passive_ability = data.get('passive_ability')
+        self.special_rule = data.get('special_rule')
+
+    def __repr__(self):
+        return f"Gang({self.id!r}, {self.name!r})"
+
+
+class UnitType:
+    """A unit definition from units.json"""
+    __slots__ = ('id', 'name', 'unit_class', 'edgerunner', 'movement_type', 'recruited_by',
+                 'health', 'special_ability', 'must_end_with_friendly', 'reclaimable')
+
+    def __init__(self, data):
+        self.id = data['id']
+        self.name = data.get('name', self.id)
+        self.unit_class = data.get('class')
+        self.edgerunner = data.get('edgerunner', False)
+        self.movement_type = data.get('movement_type')
+        self.recruited_by = data.get('recruited_by')
+        self.health = data.get('health', 1)
+        self.special_ability = data.get('special_ability')
+        self.must_end_with_friendly = data.get('must_end_with_friendly', False)
+        self.reclaimable = data.get('reclaimable', False)
+
+    def __repr__(self):
+        return f"UnitType({self.id!r})"
+
+
+class District:
+    """A board district from Districts1-3player.json"""
+    __slots__ = ('id', 'name', 'color', 'adjacent', 'rewards', 'points_of_interest', 'flavor')
+
+    def __init__(self, name, data):
+        self.id = data['id']
+        self.name = name
+        self.color = data.get('color')
+        self.adjacent = tuple(data.get('adjacent', ()))
+        self.rewards = dict(data.get('rewards', {}))
+        self.points_of_interest = tuple(data.get('points_of_interest', ()))
+        self.flavor = data.get('flavor', '')
+
+    def __repr__(self):
+        return f"District({self.id!r}, {self.name!r})"
+
+
+class CombatCard:
+    """A combat card from combat_cards.json"""
+    __slots__ = ('id', 'gang_id', 'strength', 'upgrade')
+
+    def __init__(self, gang_id, data, upgrade):
+        self.id = data['id']
+        self.gang_id = gang_id
+        self.strength = data['strength']
+        self.upgrade = upgrade
+
+    def __repr__(self):
+        return f"CombatCard({self.id!r}, strength={self.strength})"
+
+
+class NetrunStep:
+    """One step of the netrun track from netrun_track.json"""
+    __slots__ = ('step', 'color', 'netwatch_roll', 'reward', 'effect')
+
+    def __init__(self, data):
+        self.step = data['step']
+        self.color = data.get('color')
+        self.netwatch_roll = data.get('netwatch_roll')
+        self.reward = dict(data.get('reward', {}))
+        self.effect = data.get('effect')
+
+    def __repr__(self):
+        return f"NetrunStep({self.step})"
+
+
+class ActionDisc:
+    """An action disc from disc_logic.json"""
+    __slots__ = ('disc_type', 'moves_units', 'moves_classes', 'bonus_action', 'action_limit',
+                 'condition', 'rules', 'copies_from', 'description')
+
+    def __init__(self, data):
+        self.disc_type = data['disc_type']
+        self.moves_units = data.get('moves_units')
+        self.moves_classes = DISC_MOVES.get(self.moves_units, ())
+        self.bonus_action = data.get('bonus_action')
+        self.action_limit = data.get('action_limit')
+        self.condition = data.get('condition')
+        self.rules = dict(data.get('rules', {}))
+        self.copies_from = data.get('copies_from')
+        self.description = data.get('description', '')
+
+    def __repr__(self):
+        return f"ActionDisc({self.disc_type!r})"
+
+
+class GameData:
+    """Static game rules, indexed by id and display name for O(1) lookups"""
+    __slots__ = ('gangs', 'gangs_by_name', 'units', 'districts', 'districts_by_name',
+                 'combat_cards', 'starting_cards', 'upgrade_cards', 'netrun_track', 'discs')
+
+    def __init__(self, gangs, units, districts, combat_cards, netrun_track, discs=()):
+        self.gangs = {}
+        self.gangs_by_name = {}
+        for name, data in gangs.items():
+            gang = Gang(name, data)
+            self.gangs[gang.id] = gang
+            self.gangs_by_name[name] = gang
+
+        self.units = {data['id']: UnitType(data) for data in units}
+
+        self.districts = {}
+        self.districts_by_name = {}
+        for name, data in districts.items():
+            district = District(name, data)
+            self.districts[district.id] = district
+            self.districts_by_name[name] = district
+
+        self.combat_cards = {}
+        self.starting_cards = {}
+        self.upgrade_cards = {}
+        for gang_id, decks in combat_cards.items():
+            starting = tuple(CombatCard(gang_id, card, False) for card in decks.get('starting', []))
+            upgrades = tuple(CombatCard(gang_id, card, True) for card in decks.get('upgrades', []))
+            self.starting_cards[gang_id] = starting
+            self.upgrade_cards[gang_id] = upgrades
+            for card in starting + upgrades:
+                self.combat_cards[card.id] = card
+
+        self.netrun_track = tuple(sorted((NetrunStep(data) for data in netrun_track), key=lambda s: s.step))
+
+        self.discs = {}
+        for data in discs:
+            disc = ActionDisc(data)
+            self.discs[disc.disc_type] = disc
+
+    def gang(self, gang_id):
+        """Gang record for an id, or None if gangs.json doesn't know it"""
+        return self.gangs.get(gang_id)
+
+    def gang_name(self, gang_id):
+        gang = self.gangs.get(gang_id)
+        return gang.name if gang else None
+
+    def gang_color(self, gang_id):
+        """PIL color for a gang id, gray for unknown gangs"""
+        gang = self.gangs.get(gang_id)
+        return gang.pil_color if gang else DEFAULT_COLOR
+
+    def gang_emoji(self, gang_id):
+        gang = self.gangs.get(gang_id)
+        return gang.emoji if gang else DEFAULT_EMOJI
+
+    def district(self, key):
+        """District record by id ("city_center") or display name ("City Center")"""
+        return self.districts.get(key) or self.districts_by_name.get(key)
+
+    @classmethod
+    def from_files(cls, gangs_path=GANGS_PATH, units_path=UNITS_PATH, districts_path=DISTRICTS_PATH,
+                   combat_cards_path=COMBAT_CARDS_PATH, netrun_track_path=NETRUN_TRACK_PATH,
+                   disc_logic_path=DISC_LOGIC_PATH):
+        """Load every static rules file into a registry (unchanged files come from the parsed-file cache)"""
+        return cls(load_json(gangs_path), load_json(units_path), load_json(districts_path),
+                   load_json(combat_cards_path), load_json(netrun_track_path), load_json(disc_logic_path))
+
+
+_game_data = None
+_game_data_signature = None
+
+
+def get_game_data():
+    """Process-wide GameData registry, rebuilt when one of the rules files changes on disk"""
+    global _game_data, _game_data_signature
+    signature = files_signature(RULES_PATHS)
+    if _game_data is None or signature != _game_data_signature:
+        _game_data = GameData.from_files()
+        _game_data_signature = signature
+    return _game_data
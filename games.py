@@ -0,0 +1,129 @@
+import os
+import re
+import threading
+from collections import OrderedDict
+
+from engine import EventLog, GAME_LOG_PATH
+from game_data import BASE_DIR
+from perf import get_logger
+
+logger = get_logger("games")
+
+# One event log per hosted game; the default game keeps the original game_log.jsonl
+GAMES_DIR = os.environ.get("NIGHTCITY_GAMES_DIR", os.path.join(BASE_DIR, "games"))
+DEFAULT_GAME = "default"
+
+# Games whose state stays in memory; older ones hibernate and reload from their latest snapshot
+MAX_LIVE_GAMES = int(os.environ.get("NIGHTCITY_MAX_LIVE_GAMES", "64"))
+
+# Games a process hosts at most (the default one included); starting more is refused
+MAX_GAMES = int(os.environ.get("NIGHTCITY_MAX_GAMES", "256"))
+
+GAME_ID_PATTERN = re.compile(r"^[A-Za-z0-9_-]{1,64}$")
+
+
+def valid_game_id(game_id):
+    """Game ids become file names, so only letters, digits, '-' and '_' are allowed"""
+    return isinstance(game_id, str) and GAME_ID_PATTERN.match(game_id) is not None
+
+
+def game_log_path(game_id, games_dir=GAMES_DIR):
+    if game_id == DEFAULT_GAME:
+        return GAME_LOG_PATH
+    return os.path.join(games_dir, f"{game_id}.jsonl")
+
+
+class GameStore:
+    """Every game hosted by this process, keyed by game id
+
+    Each game id maps to one EventLog for the life of the process, so every
+    session at a table appends through the same object and lock. Only the
+    max_live most recently used games keep their state in memory; the rest
+    hibernate (keeping just the record index) and rebuild their state from
+    the latest snapshot when a session touches them again.
+
+    Games other than the default one only start through create(), so a
+    link to an unknown table opens nothing, and at most max_games are
+    hosted, which bounds the logs (and files) a process keeps.
+
+    initial_state is called with no arguments for the state a new game
+    starts from.
+    """
+
+    def __init__(self, initial_state, games_dir=GAMES_DIR, max_live=MAX_LIVE_GAMES, max_games=MAX_GAMES):
+        self.initial_state = initial_state
+        self.games_dir = games_dir
+        self.max_live = max_live
+        self.max_games = max_games
+        self._logs = {}
+        self._live = OrderedDict()
+        self._lock = threading.Lock()
+
+    def exists(self, game_id):
+        """True for the default game and every game started with create()"""
+        if not valid_game_id(game_id):
+            return False
+        return (game_id == DEFAULT_GAME or game_id in self._logs
+                or os.path.exists(game_log_path(game_id, self.games_dir)))
+
+    def get(self, game_id, rules=None):
+        """EventLog for a game, opening it on first use; raises KeyError for a game that was never started"""
+        if not valid_game_id(game_id):
+            raise ValueError(f"invalid game id {game_id!r}")
+        with self._lock:
+            log = self._logs.get(game_id)
+            if log is None:
+                path = game_log_path(game_id, self.games_dir)
+                if game_id != DEFAULT_GAME and not os.path.exists(path):
+                    raise KeyError(f"no game {game_id!r}")
+                log = self._open(game_id, path, rules)
+            self._touch(game_id, log)
+        return log
+
+    def create(self, game_id, rules=None):
+        """Start a new game from initial_state; raises ValueError if the id is taken or the store is full"""
+        if not valid_game_id(game_id):
+            raise ValueError(f"invalid game id {game_id!r}")
+        with self._lock:
+            path = game_log_path(game_id, self.games_dir)
+            if game_id in self._logs or os.path.exists(path):
+                raise ValueError(f"game {game_id!r} already exists")
+            hosted = len(self._hosted())
+            if hosted >= self.max_games:
+                raise ValueError(f"already hosting {hosted} games (NIGHTCITY_MAX_GAMES={self.max_games})")
+            log = self._open(game_id, path, rules)
+            self._touch(game_id, log)
+        return log
+
+    def _open(self, game_id, path, rules):
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        log = EventLog.open(path, initial_state=self.initial_state(), rules=rules)
+        self._logs[game_id] = log
+        logger.info("🎮 Opened game %s (%d open)", game_id, len(self._logs))
+        return log
+
+    def _touch(self, game_id, log):
+        """Mark a game most recently used, hibernating the least recently used past max_live"""
+        self._live[game_id] = log
+        self._live.move_to_end(game_id)
+        while len(self._live) > self.max_live:
+            idle_id, idle = self._live.popitem(last=False)
+            idle.hibernate()
+            logger.debug("💤 Game %s hibernated", idle_id)
+
+    def _hosted(self):
+        """Ids of every game with a log, on disk or open"""
+        hosted = set(self._logs) | {DEFAULT_GAME}
+        if os.path.isdir(self.games_dir):
+            hosted.update(name[:-len(".jsonl")] for name in os.listdir(self.games_dir)
+                          if name.endswith(".jsonl") and valid_game_id(name[:-len(".jsonl")]))
+        return hosted
+
+    def games(self):
+        """Ids of the games opened by this process"""
+        with self._lock:
+            return list(self._logs)
+
+    def stats(self):
+        with self._lock:
+            return {"games": len(self._logs), "live": len(self._live)}
@@ -0,0 +1,231 @@
+import heapq
+import math
+import numpy as np
+from matplotlib.path import Path
+
+from districts import DISTRICT_BOUNDARIES
+from polygons import drop_repeats
+from perf import get_logger
+
+logger = get_logger("layout")
+
+# Marker radius and gap between neighbouring markers, in original image pixels
+# (matches render.marker_radius(1.0))
+SLOT_RADIUS = 40
+SLOT_GAP = 4
+
+# Slots precomputed per district; more units than this get further rings around the anchor on demand
+MAX_SLOTS = 64
+
+# (boundaries, {district: DistrictSlots}) per boundary dict
+_layouts = {}
+
+
+def clean_polygon(polygon):
+    """Vertices as a float array without repeated points or a closing duplicate
+
+    Some collected boundaries repeat vertices (Westbrook lists its first two
+    points again at the end), which skews anything that averages vertices.
+    """
+    points = drop_repeats([(float(x), float(y)) for x, y in polygon])
+    return np.array(points, dtype=float).reshape(-1, 2)
+
+
+def area_centroid(vertices):
+    """Area-weighted centroid of a simple polygon (shoelace formula)"""
+    x, y = vertices[:, 0], vertices[:, 1]
+    x2, y2 = np.roll(x, -1), np.roll(y, -1)
+    cross = x * y2 - x2 * y
+    area = cross.sum() / 2
+    if abs(area) < 1e-9:
+        return float(x.mean()), float(y.mean())
+    return float(((x + x2) * cross).sum() / (6 * area)), float(((y + y2) * cross).sum() / (6 * area))
+
+
+def edge_distances(points, vertices):
+    """Distance from every point to the nearest polygon edge, shape (len(points),)"""
+    a = vertices
+    b = np.roll(vertices, -1, axis=0)
+    ab = b - a
+    length_sq = np.maximum((ab ** 2).sum(axis=1), 1e-12)
+    ap = points[:, None, :] - a[None, :, :]
+    t = np.clip((ap * ab[None]).sum(axis=2) / length_sq[None], 0.0, 1.0)
+    closest = a[None] + t[..., None] * ab[None]
+    return np.sqrt(((points[:, None, :] - closest) ** 2).sum(axis=2)).min(axis=1)
+
+
+def signed_distances(points, vertices, path=None):
+    """Edge distance, positive inside the polygon and negative outside"""
+    path = path if path is not None else Path(vertices)
+    inside = path.contains_points(points)
+    distance = edge_distances(points, vertices)
+    return np.where(inside, distance, -distance)
+
+
+def pole_of_inaccessibility(vertices, precision=1.0):
+    """Interior point farthest from the polygon's edges (the polylabel quadtree search)
+
+    Unlike the centroid this always lies inside the polygon, even for the
+    concave districts, and it is the point with the most room for markers.
+    """
+    path = Path(vertices)
+    xmin, ymin = vertices.min(axis=0)
+    xmax, ymax = vertices.max(axis=0)
+    cell_size = min(xmax - xmin, ymax - ymin)
+    if cell_size == 0:
+        return float(xmin), float(ymin)
+
+    def cell(x, y, half):
+        d = float(signed_distances(np.array([[x, y]]), vertices, path)[0])
+        # (priority, distance at centre, x, y, half size); best possible distance inside the cell first
+        return (-(d + half * math.sqrt(2)), d, x, y, half)
+
+    cx, cy = area_centroid(vertices)
+    best = cell(cx, cy, 0)
+    half = cell_size / 2
+    queue = []
+    for x in np.arange(xmin, xmax, cell_size):
+        for y in np.arange(ymin, ymax, cell_size):
+            heapq.heappush(queue, cell(x + half, y + half, half))
+
+    while queue:
+        priority, d, x, y, h = heapq.heappop(queue)
+        if d > best[1]:
+            best = (priority, d, x, y, h)
+        # Stop splitting cells that can't beat the best by more than the precision
+        if -priority - best[1] <= precision:
+            continue
+        h /= 2
+        for dx in (-h, h):
+            for dy in (-h, h):
+                heapq.heappush(queue, cell(x + dx, y + dy, h))
+    return float(best[2]), float(best[3])
+
+
+class DistrictSlots:
+    """Anchor point and packed, non-overlapping marker slots for one district
+
+    slots is an (N, 2) float array in original image coordinates, nearest to
+    the anchor first; units take slots in order.
+    """
+    __slots__ = ('name', 'anchor', 'centroid', 'slots')
+
+    def __init__(self, name, anchor, centroid, slots):
+        self.name = name
+        self.anchor = anchor
+        self.centroid = centroid
+        self.slots = slots
+
+    def positions(self, count, scale_factor=1.0):
+        """First `count` slots scaled to display coordinates, as int (x, y) tuples
+
+        Past the precomputed slots the table grows by whole lattice rings
+        around the anchor, so extra markers spill outwards instead of
+        stacking on the first ones.
+        """
+        if count == 0 or len(self.slots) == 0:
+            return []
+        slots = self.slots
+        if count > len(slots):
+            slots = np.concatenate([slots, overflow_slots(slots, self.anchor, count - len(slots))])
+            self.slots = slots
+        scaled = slots[:count] * scale_factor
+        return [(int(x), int(y)) for x, y in scaled]
+
+
+def hex_lattice(anchor, xmin, ymin, xmax, ymax, spacing):
+    """Hexagonal lattice points covering a box, aligned so that one falls exactly on the anchor"""
+    row_height = spacing * math.sqrt(3) / 2
+    rows = np.arange(math.floor((ymin - anchor[1]) / row_height), math.ceil((ymax - anchor[1]) / row_height) + 1)
+    points = []
+    for row in rows:
+        y = anchor[1] + row * row_height
+        shift = spacing / 2 if row % 2 else 0.0
+        start = math.floor((xmin - anchor[0] - shift) / spacing)
+        stop = math.ceil((xmax - anchor[0] - shift) / spacing) + 1
+        for col in range(start, stop):
+            points.append((anchor[0] + shift + col * spacing, y))
+    return np.array(points, dtype=float).reshape(-1, 2)
+
+
+def overflow_slots(slots, anchor, count, radius=SLOT_RADIUS, gap=SLOT_GAP):
+    """`count` more lattice points, nearest the anchor first, that no existing slot occupies
+
+    They continue the packing lattice past the district's own slots (and, for
+    crowded districts, past its outline), widening the search one ring
+    band at a time until enough are free.
+    """
+    spacing = 2 * radius + gap
+    reach = spacing * (math.sqrt(len(slots) + count) + 1)
+    while True:
+        candidates = hex_lattice(anchor, anchor[0] - reach, anchor[1] - reach,
+                                 anchor[0] + reach, anchor[1] + reach, spacing)
+        taken = np.hypot(*(candidates[:, None, :] - slots[None, :, :]).transpose(2, 0, 1)).min(axis=1) < spacing / 2
+        free = candidates[~taken]
+        free = free[np.argsort(np.hypot(free[:, 0] - anchor[0], free[:, 1] - anchor[1]), kind="stable")]
+        if len(free) >= count:
+            return free[:count]
+        reach *= 2
+
+
+def pack_slots(vertices, anchor, radius=SLOT_RADIUS, gap=SLOT_GAP, max_slots=MAX_SLOTS, exclude=()):
+    """Hexagonally packed slot centres inside a polygon, sorted by distance from the anchor
+
+    Slots whose whole marker fits inside the polygon come first; if a district
+    is too small for that, slots that only keep the marker centre inside fill
+    the rest. Slots inside any `exclude` path (neighbouring districts whose
+    collected outlines overlap this one) go last. The anchor itself is always
+    slot 0.
+    """
+    spacing = 2 * radius + gap
+    xmin, ymin = vertices.min(axis=0)
+    xmax, ymax = vertices.max(axis=0)
+    candidates = hex_lattice(anchor, xmin, ymin, xmax, ymax, spacing)
+
+    clearance = signed_distances(candidates, vertices)
+    order = np.argsort(np.hypot(candidates[:, 0] - anchor[0], candidates[:, 1] - anchor[1]), kind="stable")
+    candidates, clearance = candidates[order], clearance[order]
+
+    overlapped = np.zeros(len(candidates), dtype=bool)
+    for path in exclude:
+        overlapped |= path.contains_points(candidates)
+
+    fits = candidates[(clearance >= radius) & ~overlapped]
+    inside = candidates[(clearance >= 0) & (clearance < radius) & ~overlapped]
+    shared = candidates[(clearance >= 0) & overlapped]
+    slots = np.concatenate([fits, inside, shared])[:max_slots]
+    if len(slots) == 0 or not np.allclose(slots[0], anchor):
+        slots = np.concatenate([np.array([anchor]), slots])[:max_slots]
+    return slots
+
+
+def build_layout(boundaries):
+    """DistrictSlots for every district with a usable polygon"""
+    polygons = {name: clean_polygon(polygon) for name, polygon in boundaries.items()}
+    paths = {name: Path(vertices) for name, vertices in polygons.items() if len(vertices) >= 3}
+
+    layout = {}
+    for name, vertices in polygons.items():
+        if name not in paths:
+            continue
+        anchor = pole_of_inaccessibility(vertices)
+        others = [path for other, path in paths.items() if other != name]
+        layout[name] = DistrictSlots(name, anchor, area_centroid(vertices), pack_slots(vertices, anchor, exclude=others))
+        logger.debug("📐 %s: anchor (%.0f, %.0f), %d slots", name, anchor[0], anchor[1], len(layout[name].slots))
+    return layout
+
+
+def get_layout(boundaries=None):
+    """Slot tables for a boundary set, built once per boundary dict"""
+    if boundaries is None:
+        boundaries = DISTRICT_BOUNDARIES
+    entry = _layouts.get(id(boundaries))
+    if entry is None or entry[0] is not boundaries:
+        entry = (boundaries, build_layout(boundaries))
+        _layouts[id(boundaries)] = entry
+    return entry[1]
+
+
+def district_slots(district_name, boundaries=None):
+    """DistrictSlots for one district, or None if it has no usable boundary"""
+    return get_layout(boundaries).get(district_name)
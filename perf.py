@@ -0,0 +1,137 @@
+import os
+import time
+import random
+import logging
+import threading
+from collections import deque
+
+# Recent samples kept per span for the percentile panel
+SPAN_HISTORY = 200
+
+# Debug lines from hot paths are only emitted for this fraction of calls
+DEBUG_SAMPLE_RATE = float(os.environ.get("NIGHTCITY_LOG_SAMPLE", "0.1"))
+
+_enabled = os.environ.get("NIGHTCITY_PERF", "") not in ("", "0")
+# Recording also stays on until this time.monotonic() deadline (see enable_for)
+_enabled_until = 0.0
+_samples = {}
+# Sessions record and read spans from their own threads
+_samples_lock = threading.Lock()
+
+_logger = logging.getLogger("nightcity")
+if not _logger.handlers:
+    _handler = logging.StreamHandler()
+    _handler.setFormatter(logging.Formatter("%(asctime)s %(levelname)s %(name)s: %(message)s"))
+    _logger.addHandler(_handler)
+    _logger.setLevel(os.environ.get("NIGHTCITY_LOG_LEVEL", "WARNING").upper())
+    _logger.propagate = False
+
+
+def get_logger(name):
+    """Logger under the shared "nightcity" logger (level set by NIGHTCITY_LOG_LEVEL)"""
+    return _logger.getChild(name)
+
+
+def log_sampled(logger, level, msg, *args, rate=None):
+    """Log msg for roughly one call in 1/rate, and only if the level is enabled"""
+    if not logger.isEnabledFor(level):
+        return
+    if rate is None:
+        rate = DEBUG_SAMPLE_RATE
+    if rate < 1.0 and random.random() >= rate:
+        return
+    logger.log(level, msg, *args)
+
+
+def set_enabled(enabled):
+    """Turn span recording on or off for the whole process"""
+    global _enabled
+    _enabled = bool(enabled)
+
+
+def enable_for(seconds):
+    """Record spans for at least the next `seconds`, whatever set_enabled() says
+
+    Every session viewing the timings renews this, so recording stays on
+    while any of them is open and lapses once all have gone quiet; no
+    session can turn it off for the others.
+    """
+    global _enabled_until
+    _enabled_until = max(_enabled_until, time.monotonic() + seconds)
+
+
+def is_enabled():
+    return _enabled or time.monotonic() < _enabled_until
+
+
+class _Span:
+    __slots__ = ("name", "start")
+
+    def __init__(self, name):
+        self.name = name
+
+    def __enter__(self):
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        record(self.name, time.perf_counter() - self.start)
+        return False
+
+
+class _NullSpan:
+    __slots__ = ()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        return False
+
+
+_NULL_SPAN = _NullSpan()
+
+
+def span(name):
+    """Context manager timing a named span; a shared no-op when recording is off"""
+    if not is_enabled():
+        return _NULL_SPAN
+    return _Span(name)
+
+
+def record(name, seconds):
+    """Add one duration sample to a span's recent history"""
+    with _samples_lock:
+        samples = _samples.get(name)
+        if samples is None:
+            samples = _samples[name] = deque(maxlen=SPAN_HISTORY)
+        samples.append(seconds)
+
+
+def _percentile(sorted_values, fraction):
+    index = min(int(round(fraction * (len(sorted_values) - 1))), len(sorted_values) - 1)
+    return sorted_values[index]
+
+
+def span_stats():
+    """{span name: {"count", "p50_ms", "p95_ms", "last_ms"}} over the recent samples"""
+    # Copy under the lock: other sessions add spans and samples while this one reads
+    with _samples_lock:
+        snapshot = [(name, list(samples)) for name, samples in _samples.items()]
+    stats = {}
+    for name, samples in snapshot:
+        if not samples:
+            continue
+        ordered = sorted(samples)
+        stats[name] = {
+            "count": len(ordered),
+            "p50_ms": _percentile(ordered, 0.50) * 1e3,
+            "p95_ms": _percentile(ordered, 0.95) * 1e3,
+            "last_ms": samples[-1] * 1e3,
+        }
+    return stats
+
+
+def reset_spans():
+    with _samples_lock:
+        _samples.clear()
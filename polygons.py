@@ -0,0 +1,270 @@
+import os
+import sys
+import json
+import hashlib
+import numpy as np
+
+from perf import get_logger
+from datafiles import write_json_atomic
+
+logger = get_logger("polygons")
+
+BASE_DIR = os.path.dirname(os.path.abspath(__file__))
+# Raw polygons the game is compiled from ({name: [[x, y], ...]})
+SOURCE_PATH = os.path.join(BASE_DIR, "district_boundaries.json")
+# app_clean_collector.py's working copy; only promote_draft() copies it over the source
+DRAFT_PATH = os.path.join(BASE_DIR, "district_boundaries.draft.json")
+# Cleaned, simplified polygons the apps load (python polygons.py rebuilds it)
+COMPILED_PATH = os.path.join(BASE_DIR, "district_boundaries.compiled.json")
+COMPILED_VERSION = 1
+
+# Douglas-Peucker tolerance in original image pixels; well under a click's precision
+SIMPLIFY_TOLERANCE = 1.5
+
+
+def drop_repeats(points):
+    """Points without consecutive repeats or a closing copy of the opening vertices
+
+    Covers runs of the same click, a closing copy of the first vertex, and
+    Westbrook-style repeats of the first few vertices at the end. Repeats
+    anywhere else are real vertices (a ring can pass through a point twice),
+    and a stroke that doubles back is a spike for remove_collinear.
+    """
+    result = []
+    for point in points:
+        if not result or point != result[-1]:
+            result.append(point)
+    trimmed = True
+    while trimmed and len(result) > 1:
+        trimmed = False
+        for k in range(len(result) // 2, 0, -1):
+            if result[-k:] == result[:k]:
+                del result[-k:]
+                trimmed = True
+                break
+    return result
+
+
+def dedupe_points(points):
+    """Points rounded to whole pixels, then drop_repeats"""
+    return drop_repeats([(int(round(x)), int(round(y))) for x, y in points])
+
+
+def signed_area(points):
+    """Shoelace area; positive when the ring runs clockwise on screen (y points down)"""
+    if len(points) < 3:
+        return 0.0
+    p = np.asarray(points, dtype=float)
+    x, y = p[:, 0], p[:, 1]
+    return float((x * np.roll(y, -1) - np.roll(x, -1) * y).sum() / 2)
+
+
+def remove_collinear(points):
+    """Drop vertices that sit on the straight line through their neighbours (including spikes)"""
+    points = list(points)
+    changed = True
+    while changed and len(points) > 3:
+        changed = False
+        for i in range(len(points)):
+            (ax, ay), (bx, by), (cx, cy) = points[i - 1], points[i], points[(i + 1) % len(points)]
+            if (bx - ax) * (cy - by) - (by - ay) * (cx - bx) == 0:
+                del points[i]
+                changed = True
+                break
+    return points
+
+
+def douglas_peucker(points, tolerance):
+    """Simplify an open polyline, keeping its endpoints"""
+    if len(points) < 3:
+        return list(points)
+    p = np.asarray(points, dtype=float)
+    start, end = p[0], p[-1]
+    direction = end - start
+    length = np.hypot(*direction)
+    if length == 0:
+        distances = np.hypot(*(p - start).T)
+    else:
+        distances = np.abs(direction[0] * (p[:, 1] - start[1]) - direction[1] * (p[:, 0] - start[0])) / length
+    index = int(np.argmax(distances))
+    if distances[index] <= tolerance:
+        return [points[0], points[-1]]
+    left = douglas_peucker(points[:index + 1], tolerance)
+    return left[:-1] + douglas_peucker(points[index:], tolerance)
+
+
+def simplify_ring(points, tolerance=SIMPLIFY_TOLERANCE):
+    """Douglas-Peucker for a closed ring, split at the vertex farthest from the first one"""
+    if len(points) <= 3 or tolerance <= 0:
+        return list(points)
+    p = np.asarray(points, dtype=float)
+    far = int(np.argmax(np.hypot(*(p - p[0]).T)))
+    first = douglas_peucker(points[:far + 1], tolerance)
+    second = douglas_peucker(points[far:] + points[:1], tolerance)
+    ring = first[:-1] + second[:-1]
+    return ring if len(ring) >= 3 else list(points)
+
+
+def _crossing(a, b, c, d):
+    """True if segments ab and cd properly cross (touching at an endpoint doesn't count)"""
+    def orient(p, q, r):
+        value = (q[0] - p[0]) * (r[1] - p[1]) - (q[1] - p[1]) * (r[0] - p[0])
+        return (value > 0) - (value < 0)
+    o1, o2, o3, o4 = orient(a, b, c), orient(a, b, d), orient(c, d, a), orient(c, d, b)
+    return o1 * o2 < 0 and o3 * o4 < 0
+
+
+def find_self_intersection(points):
+    """(i, j) for the first pair of non-adjacent edges i and j (i < j) that cross, or None"""
+    n = len(points)
+    for i in range(n):
+        a, b = points[i], points[(i + 1) % n]
+        for j in range(i + 2, n):
+            if i == 0 and j == n - 1:
+                continue
+            if _crossing(a, b, points[j], points[(j + 1) % n]):
+                return i, j
+    return None
+
+
+def intersection_point(a, b, c, d):
+    """Where the lines through ab and cd meet, rounded to whole pixels"""
+    denominator = (a[0] - b[0]) * (c[1] - d[1]) - (a[1] - b[1]) * (c[0] - d[0])
+    t = ((a[0] - c[0]) * (c[1] - d[1]) - (a[1] - c[1]) * (c[0] - d[0])) / denominator
+    return (int(round(a[0] + t * (b[0] - a[0]))), int(round(a[1] + t * (b[1] - a[1]))))
+
+
+def remove_self_intersections(points):
+    """Untangle a ring by cutting off the smaller loop at each crossing
+
+    Edges i and j crossing splits the ring at the crossing point into the
+    loop through vertices i+1..j and the rest; the loop with less area is a
+    stray click or a doubled-back stroke, so it's dropped and the crossing
+    point (rounded to whole pixels) closes the loop that's kept.
+    """
+    points = list(points)
+    while len(points) > 3:
+        crossing = find_self_intersection(points)
+        if crossing is None:
+            break
+        i, j = crossing
+        n = len(points)
+        point = intersection_point(points[i], points[(i + 1) % n], points[j], points[(j + 1) % n])
+        loop = dedupe_points(points[i + 1:j + 1] + [point])
+        rest = dedupe_points(points[j + 1:] + points[:i + 1] + [point])
+        points = rest if abs(signed_area(rest)) >= abs(signed_area(loop)) else loop
+    return points
+
+
+def clean_ring(points, tolerance=SIMPLIFY_TOLERANCE):
+    """The full pipeline for one polygon; returns [] if fewer than 3 usable vertices remain"""
+    ring = dedupe_points(points)
+    ring = remove_collinear(ring)
+    ring = remove_self_intersections(ring)
+    ring = simplify_ring(ring, tolerance)
+    # Simplifying can pull an edge across another, so untangle again
+    ring = remove_collinear(remove_self_intersections(ring))
+    if len(ring) < 3 or signed_area(ring) == 0:
+        return []
+    # One winding for every district: clockwise on screen
+    if signed_area(ring) < 0:
+        ring.reverse()
+    return ring
+
+
+def compile_boundaries(raw, tolerance=SIMPLIFY_TOLERANCE):
+    """Clean every polygon in a {name: [[x, y], ...]} dict
+
+    Returns (districts, stats): districts maps each name with a usable
+    polygon to its cleaned vertices; stats maps every input name to
+    {"input": vertex count, "output": vertex count}.
+    """
+    districts = {}
+    stats = {}
+    for name, points in raw.items():
+        ring = clean_ring(points, tolerance)
+        stats[name] = {"input": len(points), "output": len(ring)}
+        if ring:
+            districts[name] = ring
+        else:
+            logger.warning("⚠️ %s has fewer than 3 usable boundary points; left out of the compiled boundaries", name)
+    return districts, stats
+
+
+def source_digest(path):
+    with open(path, 'rb') as f:
+        return hashlib.sha1(f.read()).hexdigest()
+
+
+def build_compiled(source=SOURCE_PATH, output=COMPILED_PATH, tolerance=SIMPLIFY_TOLERANCE):
+    """Compile the collector's JSON into the versioned boundary artifact; returns the artifact dict"""
+    with open(source, 'r') as f:
+        raw = json.load(f)
+    districts, stats = compile_boundaries(raw, tolerance)
+    compiled = {
+        "version": COMPILED_VERSION,
+        "source": os.path.basename(source),
+        "source_sha1": source_digest(source),
+        "tolerance": tolerance,
+        "districts": {name: [list(p) for p in ring] for name, ring in districts.items()},
+        "stats": stats,
+    }
+    tmp = output + ".tmp"
+    with open(tmp, 'w') as f:
+        json.dump(compiled, f, indent=1)
+    os.replace(tmp, output)
+    logger.info("🗺️ Compiled %d district boundaries: %d -> %d vertices", len(districts),
+                sum(s["input"] for s in stats.values()), sum(s["output"] for s in stats.values()))
+    return compiled
+
+
+def load_compiled(source=SOURCE_PATH, output=COMPILED_PATH):
+    """Compiled boundaries as {name: [(x, y), ...]}, recompiling if the artifact is missing or stale
+
+    The artifact is stale when it was built by another version of this
+    pipeline or from different source bytes. Without a source file the
+    artifact is used as is.
+    """
+    compiled = None
+    try:
+        with open(output, 'r') as f:
+            compiled = json.load(f)
+        if compiled.get("version") != COMPILED_VERSION:
+            compiled = None
+        elif os.path.exists(source) and compiled.get("source_sha1") != source_digest(source):
+            compiled = None
+    except (OSError, ValueError):
+        compiled = None
+
+    if compiled is None:
+        compiled = build_compiled(source, output)
+    return {name: [tuple(p) for p in ring] for name, ring in compiled["districts"].items()}
+
+
+def load_source(source=SOURCE_PATH):
+    """The collector's raw polygons as {name: [(x, y), ...]} (empty if there is no file yet)"""
+    try:
+        with open(source, 'r') as f:
+            raw = json.load(f)
+    except FileNotFoundError:
+        return {}
+    return {name: [tuple(p) for p in points] for name, points in raw.items()}
+
+
+def promote_draft(draft=DRAFT_PATH, source=SOURCE_PATH, output=COMPILED_PATH):
+    """Replace the source polygons with the collector's draft and recompile; returns the artifact dict"""
+    with open(draft, 'r') as f:
+        raw = json.load(f)
+    write_json_atomic(source, raw)
+    logger.info("📌 Promoted %s to %s", os.path.basename(draft), os.path.basename(source))
+    return build_compiled(source, output)
+
+
+if __name__ == "__main__":
+    # python polygons.py [source.json [output.json]]
+    source = sys.argv[1] if len(sys.argv) > 1 else SOURCE_PATH
+    output = sys.argv[2] if len(sys.argv) > 2 else COMPILED_PATH
+    compiled = build_compiled(source, output)
+    for name, counts in compiled["stats"].items():
+        print(f"🗺️ {name}: {counts['input']} -> {counts['output']} vertices")
+    print(f"📦 {output}")
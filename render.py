@@ -0,0 +1,339 @@
+import json
+import logging
+import math
+import hashlib
+import itertools
+import threading
+from collections import OrderedDict
+from PIL import Image, ImageDraw
+from districts import DISTRICT_BOUNDARIES
+from layout import district_slots, clean_polygon, area_centroid
+from perf import get_logger, log_sampled
+
+logger = get_logger("render")
+
+# Upper bounds for the render caches (entries, not bytes)
+LAYER_CACHE_SIZE = 128
+FRAME_CACHE_SIZE = 16
+SPRITE_CACHE_SIZE = 256
+
+
+class LRUCache:
+    """Small bounded least-recently-used cache, safe to share with render worker threads"""
+
+    def __init__(self, maxsize):
+        self.maxsize = maxsize
+        self._data = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, key, default=None):
+        with self._lock:
+            if key in self._data:
+                self._data.move_to_end(key)
+                self.hits += 1
+                return self._data[key]
+            self.misses += 1
+            return default
+
+    def put(self, key, value):
+        with self._lock:
+            self._data[key] = value
+            self._data.move_to_end(key)
+            while len(self._data) > self.maxsize:
+                self._data.popitem(last=False)
+
+    def clear(self):
+        with self._lock:
+            self._data.clear()
+            self.hits = 0
+            self.misses = 0
+
+    def __contains__(self, key):
+        with self._lock:
+            return key in self._data
+
+    def __len__(self):
+        with self._lock:
+            return len(self._data)
+
+
+# Base board layers (RGBA copies of the display image), per-district unit layers and final frames
+_base_layers = LRUCache(4)
+_base_lock = threading.Lock()
+_image_tokens = itertools.count()
+_layer_cache = LRUCache(LAYER_CACHE_SIZE)
+_frame_cache = LRUCache(FRAME_CACHE_SIZE)
+
+# Pre-rendered unit markers, keyed by (color, marker kind, scale)
+_sprite_atlas = LRUCache(SPRITE_CACHE_SIZE)
+
+# Cache miss marker for lookups whose cached value may be None (districts without a layer)
+_MISSING = object()
+
+
+def clear_render_caches():
+    """Drop every cached sprite, layer and frame"""
+    _sprite_atlas.clear()
+    _base_layers.clear()
+    _layer_cache.clear()
+    _frame_cache.clear()
+
+
+def marker_kind(unit_type):
+    """Marker style for a unit type: drones get an inner white dot, everything else is a plain dot"""
+    return "drone" if "drone" in unit_type else "unit"
+
+
+def marker_radius(scale_factor):
+    """Outer radius of a unit marker at the given scale"""
+    return max(int(40 * scale_factor), 1)  # Make dots much larger like the circles in the image
+
+
+def get_unit_sprite(gang_color, kind, scale_factor):
+    """RGBA unit marker centred in a (2r+1)-pixel square, rendered once per (color, kind, scale)"""
+    key = (gang_color, kind, scale_factor)
+    sprite = _sprite_atlas.get(key)
+    if sprite is not None:
+        return sprite
+
+    radius = marker_radius(scale_factor)
+    sprite = Image.new('RGBA', (2 * radius + 1, 2 * radius + 1), (0, 0, 0, 0))
+    draw = ImageDraw.Draw(sprite)
+    x = y = radius
+
+    # Draw unit dot with very thick white outline for maximum visibility
+    draw.ellipse([x-radius, y-radius, x+radius, y+radius],
+                 fill=gang_color, outline='white', width=int(5 * scale_factor))
+
+    # Add black inner outline for better contrast
+    inner_radius = radius - int(3 * scale_factor)
+    if inner_radius > 0:
+        draw.ellipse([x-inner_radius, y-inner_radius, x+inner_radius, y+inner_radius],
+                     fill=gang_color, outline='black', width=int(3 * scale_factor))
+
+    if kind == "drone":
+        # Draw smaller white dot for drones with thick black outline
+        small_radius = int(12 * scale_factor)
+        draw.ellipse([x-small_radius, y-small_radius, x+small_radius, y+small_radius],
+                     fill='white', outline='black', width=int(4 * scale_factor))
+
+    _sprite_atlas.put(key, sprite)
+    return sprite
+
+
+def stamp_sprite(target, sprite, x, y):
+    """Alpha-composite a marker sprite centred on (x, y), clipping at the target's edges"""
+    radius = sprite.width // 2
+    left, top = x - radius, y - radius
+    source = (max(-left, 0), max(-top, 0))
+    dest = (max(left, 0), max(top, 0))
+    if source[0] >= sprite.width or source[1] >= sprite.height:
+        return
+    target.alpha_composite(sprite, dest=dest, source=source)
+
+
+def get_district_center(district_name, boundaries):
+    """Area centroid of a district polygon (repeated vertices don't pull it off-centre)"""
+    if not boundaries:
+        return None
+
+    vertices = clean_polygon(boundaries)
+    if len(vertices) < 3:
+        center_x, center_y = vertices.mean(axis=0)
+    else:
+        center_x, center_y = area_centroid(vertices)
+
+    return (int(center_x), int(center_y))
+
+
+def create_unit_positions(center, unit_count, spread=30):
+    """Create positions for units around the district center"""
+    if not center or unit_count == 0:
+        return []
+
+    positions = []
+    center_x, center_y = center
+
+    if unit_count == 1:
+        positions.append((center_x, center_y))
+    else:
+        # Arrange units in a circle around the center
+        for i in range(unit_count):
+            angle = (2 * math.pi * i) / unit_count
+            offset_x = int(spread * math.cos(angle))
+            offset_y = int(spread * math.sin(angle))
+
+            pos_x = center_x + offset_x
+            pos_y = center_y + offset_y
+            positions.append((pos_x, pos_y))
+
+    return positions
+
+
+def resolve_boundary_key(district_name):
+    """Map a game state district name onto a DISTRICT_BOUNDARIES key (handles case differences)"""
+    boundary_key = district_name
+    if boundary_key not in DISTRICT_BOUNDARIES:
+        # Try title case
+        boundary_key = district_name.title()
+        if boundary_key not in DISTRICT_BOUNDARIES:
+            # Try with space handling
+            boundary_key = district_name.replace('_', ' ').title()
+            if boundary_key not in DISTRICT_BOUNDARIES:
+                return None
+    return boundary_key
+
+
+def district_layer_key(district_name, units_by_gang, gang_colors, scale_factor, image_size):
+    """Hash of everything that affects a district's unit layer"""
+    payload = json.dumps([district_name, units_by_gang, gang_colors, scale_factor, image_size])
+    return hashlib.sha1(payload.encode("utf-8")).hexdigest()
+
+
+def district_markers(district_name, units_by_gang, scale_factor):
+    """Unit markers for a district as [((x, y), gang_id, kind)] at the given scale
+
+    Shared by the raster layers and the SVG overlay. Positions come from the
+    layout engine's cached slot table, so no geometry runs per frame.
+    Returns None when the district has no boundary to place units in.
+    """
+    boundary_key = resolve_boundary_key(district_name)
+    if boundary_key is None:
+        logger.warning("❌ No boundary found for %s", district_name)
+        return None
+
+    # Units take the district's precomputed slots in order, gang by gang
+    slots = district_slots(boundary_key)
+    if slots is None:
+        logger.warning("❌ No slots for %s", district_name)
+        return None
+
+    placed = [(gang_id, unit_type) for gang_id, units in units_by_gang.items() for unit_type in units]
+    positions = slots.positions(len(placed), scale_factor)
+    return [(pos, gang_id, marker_kind(unit_type)) for pos, (gang_id, unit_type) in zip(positions, placed)]
+
+
+def render_district_layer(district_name, units_by_gang, gang_colors, scale_factor, image_size):
+    """Rasterise one district's units onto a transparent layer
+
+    Returns (layer, (left, top), units_drawn), where the layer only covers the
+    markers' bounding box, or None when the district has nothing to draw.
+    """
+    placed = district_markers(district_name, units_by_gang, scale_factor)
+    if not placed:
+        return None
+
+    # Work out where every marker goes before allocating the layer
+    radius = marker_radius(scale_factor)
+    markers = [(pos, get_unit_sprite(gang_colors[gang_id], kind, scale_factor)) for pos, gang_id, kind in placed]
+
+    # Clip the layer to the image so it can be composited without bounds checks
+    width, height = image_size
+    left = max(min(x for (x, _), _ in markers) - radius, 0)
+    top = max(min(y for (_, y), _ in markers) - radius, 0)
+    right = min(max(x for (x, _), _ in markers) + radius + 1, width)
+    bottom = min(max(y for (_, y), _ in markers) + radius + 1, height)
+    if left >= right or top >= bottom:
+        return None
+
+    # One alpha composite per unit from the shared sprite atlas
+    layer = Image.new('RGBA', (right - left, bottom - top), (0, 0, 0, 0))
+    for (x, y), sprite in markers:
+        stamp_sprite(layer, sprite, x - left, y - top)
+
+    logger.debug("🎨 Rasterised %d units for %s", len(markers), district_name)
+    return layer, (left, top), len(markers)
+
+
+def _base_entry(image):
+    """(image, RGBA copy, token) for a board image, converted once per image object
+
+    The token is never reused, unlike id(image), so it can stand in for the
+    image in keys that outlive it.
+    """
+    with _base_lock:
+        entry = _base_layers.get(id(image))
+        if entry is None or entry[0] is not image:
+            entry = (image, image.convert('RGBA'), next(_image_tokens))
+            _base_layers.put(id(image), entry)
+        return entry
+
+
+def image_key(image):
+    """Stable key for an image object (never reused, unlike id(image))"""
+    return _base_entry(image)[2]
+
+
+def get_base_layer(image):
+    """RGBA copy of the board image, converted once per image object"""
+    return _base_entry(image)[1]
+
+
+def _frame_layers(image, game_state, game_data, scale_factor):
+    """(layer key, district, units, colors) for every district with units"""
+    layer_keys = []
+    for district_name, district_data in game_state['districts'].items():
+        units_by_gang = district_data.get('units')
+        if not units_by_gang:
+            continue
+        gang_colors = {gang_id: game_data.gang_color(gang_id) for gang_id in units_by_gang}
+        key = district_layer_key(district_name, units_by_gang, gang_colors, scale_factor, image_size=image.size)
+        layer_keys.append((key, district_name, units_by_gang, gang_colors))
+    return layer_keys
+
+
+def frame_key(image, game_state, game_data, scale_factor):
+    """Hashable key for the frame draw_units_on_image would return; equal keys mean identical frames"""
+    return (image_key(image), tuple(key for key, _, _, _ in _frame_layers(image, game_state, game_data, scale_factor)))
+
+
+def units_snapshot(game_state):
+    """Copy of just the unit placement draw_units_on_image reads
+
+    The engine mutates its state in place, so a frame rendered on another
+    thread draws from one of these instead of the live state.
+    """
+    return {'districts': {name: {'units': {gang_id: list(units) for gang_id, units in data['units'].items()}}
+                          for name, data in game_state['districts'].items() if data.get('units')}}
+
+
+def draw_units_on_image(image, game_state, game_data, scale_factor):
+    """Draw gang units as colored dots on the image
+
+    The frame is composited from cached layers: the base board is converted
+    once, each district's units are rasterised into their own layer keyed by a
+    hash of that district's units, and only districts whose units changed are
+    redrawn. An unchanged game state returns the previously composited frame.
+    The returned image is shared with the cache and must not be modified.
+    """
+    image_size = image.size
+
+    # Collect the layer key of every district with units
+    layer_keys = _frame_layers(image, game_state, game_data, scale_factor)
+
+    frame_key = (image_key(image), tuple(key for key, _, _, _ in layer_keys))
+    cached_frame = _frame_cache.get(frame_key)
+    if cached_frame is not None and cached_frame[0] is image:
+        return cached_frame[1]
+
+    frame = get_base_layer(image).copy()
+    units_drawn = 0
+    for key, district_name, units_by_gang, gang_colors in layer_keys:
+        # One locked lookup: another render thread can evict the key between a check and a get
+        layer = _layer_cache.get(key, _MISSING)
+        if layer is _MISSING:
+            layer = render_district_layer(district_name, units_by_gang, gang_colors, scale_factor, image_size)
+            _layer_cache.put(key, layer)
+
+        if layer is None:
+            continue
+        layer_img, dest, count = layer
+        frame.alpha_composite(layer_img, dest=dest)
+        units_drawn += count
+
+    frame = frame.convert(image.mode)
+    _frame_cache.put(frame_key, (image, frame))
+    log_sampled(logger, logging.DEBUG, "🎨 Composited %d district layers, %d units", len(layer_keys), units_drawn)
+    return frame
@@ -0,0 +1,132 @@
+import os
+import time
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+from encoder import encode_frame, cached_frame
+from render import LRUCache
+from perf import get_logger
+
+logger = get_logger("renderer")
+
+# Threads drawing and encoding map frames off the script thread; 0 renders inline as before
+RENDER_WORKERS = int(os.environ.get("NIGHTCITY_RENDER_WORKERS", "2"))
+
+# Views remembered per process (one per table, map and quality), each holding its last frame
+RENDER_SLOTS = 256
+
+
+class _Slot:
+    __slots__ = ("frame", "key", "pending", "future", "failed")
+
+    def __init__(self):
+        self.frame = None
+        self.key = None
+        self.pending = None
+        self.future = None
+        self.failed = None
+
+
+class FrameRenderer:
+    """Renders and encodes frames on a thread pool so reruns never wait for PIL
+
+    Each view of a frame is a slot, e.g. the main map of one table at one
+    quality. request() returns at once. If the frame for the key is already
+    encoded, it returns that frame. Otherwise it returns the slot's last
+    completed frame and queues a render. A slot renders one key at a time. A
+    new key cancels the queued render. A render that has already started
+    runs to completion. Its frame is cached, but the slot does not show it.
+    """
+
+    def __init__(self, workers=RENDER_WORKERS):
+        self.workers = workers
+        self.executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="render") if workers > 0 else None
+        self._slots = LRUCache(RENDER_SLOTS)
+        self._lock = threading.Lock()
+        self.completed = 0
+        self.cancelled = 0
+        self.superseded = 0
+
+    def request(self, slot, key, render, format="PNG", quality=None):
+        """(frame, ready) for a slot
+
+        frame is the encoded frame for key when ready is True. Otherwise it is
+        the slot's last completed frame, or None if the slot has none yet.
+        render() runs on a worker and must not read state that can change
+        after this call, so pass it snapshots (see render.units_snapshot).
+        """
+        frame = cached_frame(key, format, quality)
+        with self._lock:
+            entry = self._slots.get(slot)
+            if entry is None:
+                entry = _Slot()
+                self._slots.put(slot, entry)
+            if frame is not None:
+                if entry.pending not in (None, key):
+                    self._drop_pending(entry)
+                self._show(entry, key, frame)
+                return frame, True
+            if self.executor is None:
+                frame = encode_frame(key, render, format, quality)
+                self._show(entry, key, frame)
+                return frame, True
+            if entry.failed == key:
+                return entry.frame, True
+            if entry.pending != key:
+                if entry.pending is not None:
+                    self._drop_pending(entry)
+                entry.pending = key
+                entry.future = self.executor.submit(self._render, entry, slot, key, render, format, quality)
+            return entry.frame, False
+
+    def pending(self, slot):
+        """True while a render for the slot is queued or running"""
+        with self._lock:
+            entry = self._slots.get(slot)
+            return entry is not None and entry.pending is not None
+
+    def _drop_pending(self, entry):
+        """Forget a superseded render, cancelling it if no worker has started it"""
+        if entry.future is not None and entry.future.cancel():
+            self.cancelled += 1
+            logger.debug("🚫 Cancelled a superseded render")
+        entry.pending = None
+        entry.future = None
+
+    def _show(self, entry, key, frame):
+        entry.frame = frame
+        entry.key = key
+        if entry.pending == key:
+            entry.pending = None
+            entry.future = None
+
+    def _render(self, entry, slot, key, render, format, quality):
+        start = time.perf_counter()
+        try:
+            frame = encode_frame(key, render, format, quality)
+        except Exception as e:
+            logger.error("❌ Render for %s failed: %s", slot, e)
+            with self._lock:
+                if entry.pending == key:
+                    entry.pending = None
+                    entry.future = None
+                    entry.failed = key
+            return None
+        with self._lock:
+            if entry.pending == key:
+                self._show(entry, key, frame)
+                self.completed += 1
+                logger.debug("🖼️ Rendered %s in %.0f ms", slot, (time.perf_counter() - start) * 1e3)
+            else:
+                self.superseded += 1
+        return frame
+
+    def stats(self):
+        with self._lock:
+            return {"workers": self.workers, "completed": self.completed,
+                    "cancelled": self.cancelled, "superseded": self.superseded}
+
+    def shutdown(self):
+        if self.executor is not None:
+            self.executor.shutdown(wait=True, cancel_futures=True)
+            self.executor = None
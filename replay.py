@@ -0,0 +1,299 @@
+import io
+import os
+import sys
+import zlib
+import struct
+import argparse
+import multiprocessing
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+
+from PIL import Image, ImageColor, GifImagePlugin
+
+from assets import load_board_image, load_level, PYRAMID_LEVELS
+from game_data import get_game_data, BASE_DIR
+from render import draw_units_on_image, units_snapshot
+from engine import EventLog, GameEngine, GAME_LOG_PATH
+from perf import get_logger
+
+logger = get_logger("replay")
+
+# Exported replays go here unless a path is given
+REPLAY_DIR = os.environ.get("NIGHTCITY_REPLAY_DIR", os.path.join(BASE_DIR, "replays"))
+
+REPLAY_FORMATS = ("gif", "apng", "frames")
+
+# Time each state stays on screen in animated exports
+FRAME_DURATION_MS = 250
+
+# Consecutive states per worker task; neighbouring states share most district layers
+CHUNK_FRAMES = 8
+
+# Workers start fresh interpreters rather than forking: a fork taken while a render thread
+# holds render._base_lock or an LRUCache lock copies that lock held, and the worker hangs on it
+WORKER_START_METHOD = "spawn"
+
+# zlib level for APNG and PNG frames; level 6 takes ~4x as long for files ~10% smaller
+PNG_COMPRESS_LEVEL = 1
+
+PNG_SIGNATURE = b"\x89PNG\r\n\x1a\n"
+
+
+def replay_states(game_log, seq=None):
+    """Unit snapshots from the last reset up to record seq (default: the current state)
+
+    Yields the starting state, then the state after each action. The game is
+    played forward once, so a long replay costs one pass over its actions
+    rather than a snapshot load per state.
+    """
+    actions = game_log.history(seq)
+    if actions:
+        start = game_log.records[actions[0][0]][1]
+    else:
+        start = game_log.head if seq is None else seq
+    engine = GameEngine(game_log.state_at(start), game_log.rules)
+    yield units_snapshot(engine.state)
+    for _, action in actions:
+        engine.apply(action)
+        yield units_snapshot(engine.state)
+
+
+def replay_palette(image, game_data):
+    """Shared 256-colour palette for GIF frames: the board's main colours plus every marker colour
+
+    One global palette keeps colours from flickering between frames and lets
+    every frame skip its local colour table.
+    """
+    markers = {ImageColor.getrgb(color) for color in
+               [game_data.gang_color(gang_id) for gang_id in game_data.gangs] + ['#808080', 'white', 'black']}
+    markers = sorted(markers)
+    board = image.convert('RGB').quantize(colors=256 - len(markers), method=Image.Quantize.MEDIANCUT)
+    return board.getpalette()[:(256 - len(markers)) * 3] + [c for rgb in markers for c in rgb]
+
+
+def palette_image(palette):
+    image = Image.new('P', (1, 1))
+    image.putpalette(palette)
+    return image
+
+
+def png_chunks(data):
+    """(type, payload) for every chunk in a PNG file"""
+    offset = len(PNG_SIGNATURE)
+    while offset < len(data):
+        length, kind = struct.unpack(">I4s", data[offset:offset + 8])
+        yield kind, data[offset + 8:offset + 8 + length]
+        offset += 12 + length
+
+
+def png_chunk(kind, payload):
+    return struct.pack(">I", len(payload)) + kind + payload + struct.pack(">I", zlib.crc32(kind + payload))
+
+
+# --- worker side -----------------------------------------------------
+
+_worker = {}
+
+
+def _init_worker(level, format, palette, duration, output):
+    """Load the board level and rules once per worker process"""
+    display_img, _, scale_factor = load_board_image()
+    image = display_img if level == "display" else load_level(level)
+    _worker.update(image=image, scale_factor=scale_factor * PYRAMID_LEVELS[level], game_data=get_game_data(),
+                   format=format, palette=palette_image(palette) if palette else None,
+                   duration=duration, output=output)
+
+
+def _render_frame(snapshot):
+    return draw_units_on_image(_worker["image"], snapshot, _worker["game_data"], _worker["scale_factor"])
+
+
+def _encode_frame(frame, index):
+    """One frame in the export's wire form: GIF frame blocks, PNG image data, or a file written to disk"""
+    if _worker["format"] == "gif":
+        indexed = frame.convert('RGB').quantize(palette=_worker["palette"], dither=Image.Dither.NONE)
+        return b"".join(GifImagePlugin.getdata(indexed, duration=_worker["duration"]))
+    if _worker["format"] == "apng":
+        buffer = io.BytesIO()
+        frame.convert('RGB').save(buffer, format="PNG", compress_level=PNG_COMPRESS_LEVEL)
+        return b"".join(payload for kind, payload in png_chunks(buffer.getvalue()) if kind == b"IDAT")
+    path = os.path.join(_worker["output"], f"frame_{index:05d}.png")
+    frame.convert('RGB').save(path, format="PNG", compress_level=PNG_COMPRESS_LEVEL)
+    return path
+
+
+def _render_chunk(first_index, snapshots):
+    return [_encode_frame(_render_frame(snapshot), first_index + i) for i, snapshot in enumerate(snapshots)]
+
+
+# --- writers -----------------------------------------------------------
+
+class GifWriter:
+    """Streams GIF frames to a file; frames arrive already encoded against the shared palette"""
+
+    def __init__(self, path, image, palette, duration):
+        self.f = open(path, 'wb')
+        self.frames = 0
+        header = palette_image(palette).resize(image.size)
+        for block in GifImagePlugin.getheader(header, info={"loop": 0, "duration": duration, "optimize": False})[0]:
+            self.f.write(block)
+
+    def write(self, data):
+        self.f.write(data)
+        self.frames += 1
+
+    def close(self):
+        self.f.write(b";")
+        self.f.close()
+
+
+class ApngWriter:
+    """Streams an animated PNG; the frame count in acTL is patched in on close"""
+
+    def __init__(self, path, image, duration):
+        self.f = open(path, 'wb')
+        self.size = image.size
+        self.duration = duration
+        self.frames = 0
+        self.sequence = 0
+        self.f.write(PNG_SIGNATURE)
+        # 8-bit truecolour, like every frame the workers encode
+        self.f.write(png_chunk(b"IHDR", struct.pack(">IIBBBBB", *self.size, 8, 2, 0, 0, 0)))
+        self.actl_offset = self.f.tell()
+        self.f.write(png_chunk(b"acTL", struct.pack(">II", 0, 0)))
+
+    def write(self, data):
+        self.f.write(png_chunk(b"fcTL", struct.pack(">IIIIIHHBB", self.sequence, *self.size, 0, 0,
+                                                    self.duration, 1000, 0, 0)))
+        self.sequence += 1
+        if self.frames == 0:
+            self.f.write(png_chunk(b"IDAT", data))
+        else:
+            self.f.write(png_chunk(b"fdAT", struct.pack(">I", self.sequence) + data))
+            self.sequence += 1
+        self.frames += 1
+
+    def close(self):
+        self.f.write(png_chunk(b"IEND", b""))
+        self.f.seek(self.actl_offset)
+        self.f.write(png_chunk(b"acTL", struct.pack(">II", self.frames, 0)))
+        self.f.close()
+
+
+class FrameCounter:
+    """Writer for image sequences: the workers save the files, so only count them"""
+
+    def __init__(self):
+        self.frames = 0
+
+    def write(self, path):
+        self.frames += 1
+
+    def close(self):
+        pass
+
+
+def _chunks(states, size):
+    """(first index, [snapshot, ...]) batches of consecutive states"""
+    batch = []
+    index = 0
+    for snapshot in states:
+        batch.append(snapshot)
+        if len(batch) == size:
+            yield index, batch
+            index += size
+            batch = []
+    if batch:
+        yield index, batch
+
+
+def replay_format(path):
+    """Export format implied by an output path: .gif, .png/.apng, or a directory for numbered frames"""
+    extension = os.path.splitext(path)[1].lower()
+    if extension == ".gif":
+        return "gif"
+    if extension in (".png", ".apng"):
+        return "apng"
+    return "frames"
+
+
+def export_replay(states, path, format=None, level="display", workers=None, duration=FRAME_DURATION_MS):
+    """Render one frame per state into an animated GIF/APNG or a directory of numbered PNGs
+
+    states is any iterable of game states (see replay_states). Frames are
+    rendered and encoded in batches across a process pool. A bounded window
+    of batches is in flight, and finished batches are written in order as
+    they arrive. Memory therefore stays flat however long the replay is.
+    Returns the number of frames written.
+    """
+    format = format or replay_format(path)
+    if format not in REPLAY_FORMATS:
+        raise ValueError(f"unknown replay format {format!r} (expected one of {', '.join(REPLAY_FORMATS)})")
+    if level not in PYRAMID_LEVELS:
+        raise ValueError(f"unknown board level {level!r}")
+    workers = workers or os.cpu_count() or 1
+
+    display_img, _, _ = load_board_image()
+    image = display_img if level == "display" else load_level(level)
+    palette = replay_palette(image, get_game_data()) if format == "gif" else None
+
+    if format == "frames":
+        os.makedirs(path, exist_ok=True)
+        writer = FrameCounter()
+    else:
+        os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        writer = GifWriter(path, image, palette, duration) if format == "gif" else ApngWriter(path, image, duration)
+
+    try:
+        with ProcessPoolExecutor(max_workers=workers, mp_context=multiprocessing.get_context(WORKER_START_METHOD),
+                                 initializer=_init_worker,
+                                 initargs=(level, format, palette, duration, path)) as executor:
+            in_flight = deque()
+            for first_index, batch in _chunks(states, CHUNK_FRAMES):
+                in_flight.append(executor.submit(_render_chunk, first_index, batch))
+                if len(in_flight) >= 2 * workers:
+                    for data in in_flight.popleft().result():
+                        writer.write(data)
+            while in_flight:
+                for data in in_flight.popleft().result():
+                    writer.write(data)
+    finally:
+        writer.close()
+
+    logger.info("🎞️ Exported %d replay frames to %s", writer.frames, path)
+    return writer.frames
+
+
+def replay_reader(path):
+    """Callable returning an exported replay's bytes, for st.download_button to call only on download"""
+    def read():
+        with open(path, 'rb') as f:
+            return f.read()
+    return read
+
+
+def replay_path(game_id, ply, format, replay_dir=REPLAY_DIR):
+    """Default output path for a game's replay up to a ply"""
+    extension = {"gif": ".gif", "apng": ".png", "frames": ""}[format]
+    return os.path.join(replay_dir, f"{game_id}-{ply}{extension}")
+
+
+if __name__ == "__main__":
+    # python replay.py [game_log.jsonl] output.gif|output.png|output_dir [--level debug] [--workers N]
+    parser = argparse.ArgumentParser(description="Render a logged game into an animated replay")
+    parser.add_argument("paths", nargs="+", metavar="[log] output")
+    parser.add_argument("--level", default="display", choices=list(PYRAMID_LEVELS))
+    parser.add_argument("--workers", type=int)
+    parser.add_argument("--duration", type=int, default=FRAME_DURATION_MS, help="milliseconds per frame")
+    args = parser.parse_args()
+    if len(args.paths) > 2:
+        parser.error("expected at most a log path and an output path")
+    log_path, output = args.paths if len(args.paths) == 2 else (GAME_LOG_PATH, args.paths[0])
+    if not os.path.exists(log_path):
+        sys.exit(f"❌ No game log at {log_path}")
+
+    game_log = EventLog(log_path)
+    game_log.load()
+    frames = export_replay(replay_states(game_log), output, level=args.level, workers=args.workers,
+                           duration=args.duration)
+    print(f"🎞️ {frames} frames -> {output}")
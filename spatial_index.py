@@ -0,0 +1,154 @@
+import json
+import math
+import numpy as np
+from matplotlib.path import Path
+
+
+class DistrictGridIndex:
+    """Uniform-grid index over district polygons
+
+    Each grid cell lists the districts whose bounding box overlaps it, so a
+    query only runs the polygon test on the handful of districts near the
+    point instead of scanning every district. Ties go to the district that
+    comes first in the boundary dict, the same as districts.detect_district.
+    """
+
+    def __init__(self, boundaries, cell_size=None):
+        self.names = []
+        self.paths = []
+        bboxes = []
+        for name, polygon in boundaries.items():
+            vertices = np.asarray(polygon, dtype=float).reshape(-1, 2)
+            if len(vertices) < 3:
+                continue
+            self.names.append(name)
+            self.paths.append(Path(vertices))
+            bboxes.append((vertices[:, 0].min(), vertices[:, 1].min(), vertices[:, 0].max(), vertices[:, 1].max()))
+
+        self.bboxes = np.array(bboxes, dtype=float).reshape(-1, 4)
+        self.name_to_index = {name: i for i, name in enumerate(self.names)}
+
+        if len(self.bboxes) == 0:
+            self.origin = (0.0, 0.0)
+            self.cell_size = 1.0
+            self.shape = (1, 1)
+            self.cells = [()]
+            return
+
+        self.origin = (self.bboxes[:, 0].min(), self.bboxes[:, 1].min())
+        if cell_size is None:
+            # One cell per average district footprint keeps candidate lists short
+            widths = self.bboxes[:, 2] - self.bboxes[:, 0]
+            heights = self.bboxes[:, 3] - self.bboxes[:, 1]
+            cell_size = max(float(np.sqrt(np.mean(widths * heights))), 1.0)
+        self.cell_size = cell_size
+
+        cols = int((self.bboxes[:, 2].max() - self.origin[0]) // cell_size) + 1
+        rows = int((self.bboxes[:, 3].max() - self.origin[1]) // cell_size) + 1
+        self.shape = (rows, cols)
+
+        buckets = [[] for _ in range(rows * cols)]
+        for index, (xmin, ymin, xmax, ymax) in enumerate(self.bboxes):
+            c0, r0 = self._cell_of(xmin, ymin)
+            c1, r1 = self._cell_of(xmax, ymax)
+            for row in range(r0, r1 + 1):
+                for col in range(c0, c1 + 1):
+                    buckets[row * cols + col].append(index)
+        # Indices were appended in boundary order, so each bucket is already sorted
+        self.cells = [tuple(bucket) for bucket in buckets]
+
+    @classmethod
+    def from_json(cls, path, cell_size=None):
+        """Build an index from a district_boundaries*.json file ({name: [[x, y], ...]})"""
+        with open(path, 'r') as f:
+            boundaries = json.load(f)
+        return cls(boundaries, cell_size=cell_size)
+
+    def _cell_of(self, x, y):
+        col = int((x - self.origin[0]) // self.cell_size)
+        row = int((y - self.origin[1]) // self.cell_size)
+        return col, row
+
+    def candidates(self, x, y):
+        """District indices whose bounding box cell covers (x, y)"""
+        col, row = self._cell_of(x, y)
+        rows, cols = self.shape
+        if not (0 <= col < cols and 0 <= row < rows):
+            return ()
+        return self.cells[row * cols + col]
+
+    def detect_district(self, x, y):
+        """Detect which district a point belongs to"""
+        for index in self.candidates(x, y):
+            xmin, ymin, xmax, ymax = self.bboxes[index]
+            if xmin <= x <= xmax and ymin <= y <= ymax and self.paths[index].contains_point((x, y)):
+                return self.names[index]
+        return None
+
+    def detect_districts(self, points):
+        """Classify an (N, 2) array of points; returns district indices with -1 for none"""
+        points = np.asarray(points, dtype=float).reshape(-1, 2)
+        result = np.full(len(points), -1, dtype=np.int32)
+        if len(points) == 0 or len(self.paths) == 0:
+            return result
+
+        rows, cols = self.shape
+        col = np.floor((points[:, 0] - self.origin[0]) / self.cell_size).astype(np.int64)
+        row = np.floor((points[:, 1] - self.origin[1]) / self.cell_size).astype(np.int64)
+        on_grid = np.flatnonzero((col >= 0) & (col < cols) & (row >= 0) & (row < rows))
+
+        # Group the points by grid cell and only test each cell's candidates
+        cell_ids = row[on_grid] * cols + col[on_grid]
+        order = np.argsort(cell_ids, kind="stable")
+        sorted_ids = cell_ids[order]
+        starts = np.flatnonzero(np.r_[True, sorted_ids[1:] != sorted_ids[:-1]])
+        ends = np.r_[starts[1:], len(sorted_ids)]
+
+        for start, end in zip(starts, ends):
+            members = on_grid[order[start:end]]
+            for index in self.cells[sorted_ids[start]]:
+                if len(members) == 0:
+                    break
+                inside = self.paths[index].contains_points(points[members])
+                result[members[inside]] = index
+                members = members[~inside]
+
+        return result
+
+
+def generate_synthetic_board(region_count, size=(1024, 1536), jitter=0.3, edge_points=2, seed=0):
+    """Generate a board of region_count non-overlapping polygons tiling the given size
+
+    Regions are cells of a jittered lattice, so neighbours share edges like
+    the real districts do. Each side gets edge_points extra vertices so the
+    polygon test does realistic work. Returns {name: [(x, y), ...]}.
+    """
+    width, height = size
+    cols = max(1, math.ceil(math.sqrt(region_count * width / height)))
+    rows = max(1, math.ceil(region_count / cols))
+    cell_w = width / cols
+    cell_h = height / rows
+
+    rng = np.random.default_rng(seed)
+    lattice_x = np.linspace(0, width, cols + 1)[None, :].repeat(rows + 1, axis=0)
+    lattice_y = np.linspace(0, height, rows + 1)[:, None].repeat(cols + 1, axis=1)
+    # Only move interior lattice points so the board keeps a straight border
+    lattice_x[1:-1, 1:-1] += rng.uniform(-jitter, jitter, (rows - 1, cols - 1)) * cell_w
+    lattice_y[1:-1, 1:-1] += rng.uniform(-jitter, jitter, (rows - 1, cols - 1)) * cell_h
+
+    def corner(r, c):
+        return (float(lattice_x[r, c]), float(lattice_y[r, c]))
+
+    def side(a, b):
+        steps = edge_points + 1
+        return [(a[0] + (b[0] - a[0]) * i / steps, a[1] + (b[1] - a[1]) * i / steps) for i in range(steps)]
+
+    boundaries = {}
+    for i in range(region_count):
+        r, c = divmod(i, cols)
+        top_left, top_right = corner(r, c), corner(r, c + 1)
+        bottom_right, bottom_left = corner(r + 1, c + 1), corner(r + 1, c)
+        polygon = side(top_left, top_right) + side(top_right, bottom_right) + side(bottom_right, bottom_left) + side(bottom_left, top_left)
+        boundaries[f"Region {i + 1}"] = [(round(x, 2), round(y, 2)) for x, y in polygon]
+
+    return boundaries
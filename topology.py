@@ -0,0 +1,160 @@
+import numpy as np
+from collections import namedtuple
+from matplotlib.path import Path
+
+from districts import DISTRICT_BOUNDARIES
+from layout import clean_polygon, edge_distances
+from perf import get_logger
+
+logger = get_logger("topology")
+
+# Two outlines touch where one's edge comes within this many original image pixels of
+# the other's (hand-collected neighbours leave small gaps and overlaps along shared borders)
+CONTACT_TOLERANCE = 15
+# Shared border needed to count as adjacent, so corners that only meet at a point don't
+MIN_CONTACT = 40
+# Spacing of the points sampled along each outline, in pixels
+SAMPLE_SPACING = 5
+
+AdjacencyReport = namedtuple(
+    "AdjacencyReport",
+    "derived declared only_in_geometry only_in_rules no_boundary no_rules contact",
+)
+AdjacencyReport.__doc__ = """Polygon-derived adjacency compared with the district JSON
+
+only_in_geometry and only_in_rules are sorted (district, district) pairs;
+no_boundary lists districts in the rules without an outline and no_rules
+outlines without a district. contact maps each derived pair to its shared
+border length in pixels.
+"""
+
+
+def outline_samples(vertices, spacing=SAMPLE_SPACING):
+    """Points every `spacing` pixels along a closed polygon outline"""
+    ends = np.roll(vertices, -1, axis=0)
+    lengths = np.hypot(*(ends - vertices).T)
+    counts = np.maximum(1, np.ceil(lengths / spacing).astype(int))
+    edge = np.repeat(np.arange(len(vertices)), counts)
+    t = (np.arange(counts.sum()) - np.repeat(np.cumsum(counts) - counts, counts)) / np.repeat(counts, counts)
+    return vertices[edge] + t[:, None] * (ends[edge] - vertices[edge])
+
+
+def contact_length(samples, vertices, path, tolerance=CONTACT_TOLERANCE, spacing=SAMPLE_SPACING):
+    """Length of an outline (given as samples) lying on or inside another polygon"""
+    touching = (edge_distances(samples, vertices) <= tolerance) | path.contains_points(samples)
+    return float(touching.sum() * spacing)
+
+
+def derive_adjacency(boundaries=DISTRICT_BOUNDARIES, tolerance=CONTACT_TOLERANCE, min_contact=MIN_CONTACT):
+    """Adjacency from shared or near-touching polygon edges
+
+    Returns ({district: frozenset of neighbours}, {(a, b): contact length}).
+    Only pairs whose bounding boxes come within the tolerance are measured,
+    so the cost grows with the number of real neighbours, not with every
+    pair of districts.
+    """
+    names = []
+    polygons = []
+    for name, polygon in boundaries.items():
+        vertices = clean_polygon(polygon)
+        if len(vertices) >= 3:
+            names.append(name)
+            polygons.append(vertices)
+    if not names:
+        return {}, {}
+
+    boxes = np.array([np.concatenate([v.min(axis=0) - tolerance, v.max(axis=0) + tolerance]) for v in polygons])
+    candidates = []
+    for i in range(len(boxes) - 1):
+        rest = boxes[i + 1:]
+        overlap = ((rest[:, 0] <= boxes[i, 2]) & (boxes[i, 0] <= rest[:, 2])
+                   & (rest[:, 1] <= boxes[i, 3]) & (boxes[i, 1] <= rest[:, 3]))
+        candidates.extend((i, i + 1 + j) for j in np.flatnonzero(overlap))
+
+    samples = [outline_samples(v) for v in polygons]
+    paths = [Path(v) for v in polygons]
+    adjacency = {name: set() for name in names}
+    contact = {}
+    for i, j in candidates:
+        # Either outline may be the one that strays across the border, so take the longer contact
+        length = max(contact_length(samples[i], polygons[j], paths[j], tolerance),
+                     contact_length(samples[j], polygons[i], paths[i], tolerance))
+        if length >= min_contact:
+            a, b = names[i], names[j]
+            adjacency[a].add(b)
+            adjacency[b].add(a)
+            contact[tuple(sorted((a, b)))] = length
+    logger.debug("🗺️ %d candidate pairs, %d adjacent", len(candidates), len(contact))
+    return {name: frozenset(neighbours) for name, neighbours in adjacency.items()}, contact
+
+
+def edge_set(adjacency):
+    return {tuple(sorted((a, b))) for a, neighbours in adjacency.items() for b in neighbours if a != b}
+
+
+def reconcile_adjacency(rules=None, boundaries=DISTRICT_BOUNDARIES, tolerance=CONTACT_TOLERANCE,
+                        min_contact=MIN_CONTACT):
+    """Compare polygon-derived adjacency with the hand-maintained JSON and log every mismatch"""
+    if rules is None:
+        from engine import load_rules
+        rules = load_rules()
+    derived, contact = derive_adjacency(boundaries, tolerance, min_contact)
+    declared = rules.adjacency
+
+    # Only compare districts that exist on both sides; the rest are reported separately
+    shared = set(derived) & set(declared)
+    derived_edges = {e for e in edge_set(derived) if set(e) <= shared}
+    declared_edges = {e for e in edge_set(declared) if set(e) <= shared}
+    report = AdjacencyReport(
+        derived=derived,
+        declared=declared,
+        only_in_geometry=sorted(derived_edges - declared_edges),
+        only_in_rules=sorted(declared_edges - derived_edges),
+        no_boundary=sorted(set(declared) - set(derived)),
+        no_rules=sorted(set(derived) - set(declared)),
+        contact=contact,
+    )
+
+    for a, b in report.only_in_geometry:
+        logger.warning("🗺️ %s and %s share %.0f px of border but aren't adjacent in the rules", a, b, contact[(a, b)])
+    for a, b in report.only_in_rules:
+        logger.warning("🗺️ %s and %s are adjacent in the rules but their outlines don't touch", a, b)
+    for name in report.no_boundary:
+        logger.warning("🗺️ %s has no usable boundary polygon", name)
+    for name in report.no_rules:
+        logger.warning("🗺️ Boundary %s doesn't match any district in the rules", name)
+    if not (report.only_in_geometry or report.only_in_rules or report.no_boundary or report.no_rules):
+        logger.info("🗺️ Boundary adjacency matches the rules (%d borders)", len(derived_edges))
+    return report
+
+
+_reports = {}
+
+
+def get_adjacency_report(rules, boundaries=DISTRICT_BOUNDARIES):
+    """reconcile_adjacency() once per (rules, boundaries) pair"""
+    key = (id(rules), id(boundaries))
+    entry = _reports.get(key)
+    if entry is None or entry[0] is not rules or entry[1] is not boundaries:
+        entry = (rules, boundaries, reconcile_adjacency(rules, boundaries))
+        _reports[key] = entry
+    return entry[2]
+
+
+if __name__ == "__main__":
+    from engine import load_rules
+    from engine.distances import get_distance_table
+
+    rules = load_rules()
+    report = reconcile_adjacency(rules)
+    for (a, b), length in sorted(report.contact.items()):
+        marker = "" if (a, b) not in report.only_in_geometry else "  (missing from rules)"
+        print(f"🗺️ {a} - {b}: {length:.0f} px{marker}")
+    for a, b in report.only_in_rules:
+        print(f"⚠️ {a} - {b}: adjacent in rules only")
+
+    table = get_distance_table(rules)
+    print(f"🧭 Moves per round: {table.ranges}")
+    width = max(len(name) for name in table.names)
+    for name, row in zip(table.names, table.distances):
+        print(f"{name:>{width}} " + " ".join(f"{d:2d}" for d in row))
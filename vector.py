@@ -0,0 +1,91 @@
+import os
+from xml.sax.saxutils import quoteattr
+
+import streamlit.components.v1 as components
+
+from districts import DISTRICT_BOUNDARIES
+from render import district_markers, marker_radius
+
+BASE_DIR = os.path.dirname(os.path.abspath(__file__))
+SVG_MAP_FRONTEND = os.path.join(BASE_DIR, "components", "svg_map")
+
+# Outline and highlight styles for the district polygons
+OUTLINE_COLOR = "#00e5ff"
+OUTLINE_WIDTH = 4
+HIGHLIGHT_FILL = "rgba(255, 255, 0, 0.25)"
+
+_svg_map = components.declare_component("svg_map", path=SVG_MAP_FRONTEND)
+
+
+def marker_symbol(symbol_id, color, kind):
+    """SVG <symbol> for a unit marker at original-image scale, matching render.get_unit_sprite"""
+    radius = marker_radius(1.0)
+    # PIL draws outlines inside the ellipse; SVG strokes are centred on the edge
+    parts = [
+        f'<circle r="{radius - 2.5}" fill={quoteattr(color)} stroke="white" stroke-width="5"/>',
+        f'<circle r="{radius - 3 - 1.5}" fill={quoteattr(color)} stroke="black" stroke-width="3"/>',
+    ]
+    if kind == "drone":
+        parts.append('<circle r="10" fill="white" stroke="black" stroke-width="4"/>')
+    return f'<symbol id="{symbol_id}" overflow="visible">{"".join(parts)}</symbol>'
+
+
+def svg_overlay(game_state, game_data, show_units=True, show_outlines=True, highlight=None,
+                boundaries=DISTRICT_BOUNDARIES):
+    """SVG markup for units, district outlines and a highlighted district, in original image coordinates
+
+    Only the overlay is generated here; the board is a separate, static
+    background, so a state change re-sends a few KB of markup instead of a
+    re-encoded bitmap.
+    """
+    defs = {}
+    body = []
+
+    if show_outlines or highlight:
+        for name, polygon in boundaries.items():
+            if not show_outlines and name != highlight:
+                continue
+            points = " ".join(f"{x},{y}" for x, y in polygon)
+            fill = HIGHLIGHT_FILL if name == highlight else "none"
+            stroke = f'stroke="{OUTLINE_COLOR}" stroke-width="{OUTLINE_WIDTH}"' if show_outlines else 'stroke="none"'
+            body.append(f'<polygon points="{points}" fill="{fill}" {stroke}><title>{name}</title></polygon>')
+
+    if show_units and game_state:
+        for district_name, district_data in game_state.get('districts', {}).items():
+            units_by_gang = district_data.get('units')
+            if not units_by_gang:
+                continue
+            for (x, y), gang_id, kind in district_markers(district_name, units_by_gang, 1.0) or ():
+                symbol_id = f"{gang_id}-{kind}"
+                if symbol_id not in defs:
+                    defs[symbol_id] = marker_symbol(symbol_id, game_data.gang_color(gang_id), kind)
+                body.append(f'<use href="#{symbol_id}" x="{x}" y="{y}"/>')
+
+    return f'<defs>{"".join(defs.values())}</defs>{"".join(body)}'
+
+
+def background_url(frame, element_id):
+    """URL for an encoded background frame
+
+    Registered with Streamlit's media file manager (the same store st.image
+    uses), so the browser fetches it once per distinct frame and caches it.
+    Falls back to a data URL outside a running Streamlit server.
+    """
+    try:
+        from streamlit import runtime
+        if runtime.exists():
+            return runtime.get_instance().media_file_mgr.add(frame.data, frame.mime_type, element_id)
+    except Exception:
+        pass
+    return frame.data_url()
+
+
+def svg_map(background, overlay, original_size, display_width, key=None):
+    """Board with an SVG overlay; returns the last click like streamlit_image_coordinates
+
+    The value has display-pixel "x"/"y" plus "orig_x"/"orig_y", mapped
+    through the SVG's viewBox (the original image size) in the browser, so
+    they land exactly in original image space.
+    """
+    return _svg_map(background=background, overlay=overlay, original_width=original_size[0],
+                    original_height=original_size[1], width=display_width, key=key, default=None)